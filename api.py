@@ -1,17 +1,71 @@
 import os
-import uuid
-import threading
+import json
+import time
+import asyncio
+import anyio
+from contextlib import AsyncExitStack, asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from src.manager import FullContextManager
+from services import metrics, registry
+from src.session_store import SessionStore
+from src.session_backend import SessionBusy, SessionConflict
+from src.session_gate import QueueFull, SessionGate
+from src.batch import BatchProcessor, parse_items
 
 load_dotenv()
 
-app = FastAPI(title="Belediye Chatbot API")
+# Bellekte en fazla SESSION_MAX_RESIDENT oturum; boşta kalanlar diske bırakılır, ilk istekte geri yüklenir
+store = SessionStore.from_env()
+# Oturum başına sıralı işleme; kuyruk dolunca 429
+gate = SessionGate(
+    max_queue=int(os.getenv("SESSION_QUEUE_LIMIT", "4")),
+    idempotency_ttl=float(os.getenv("IDEMPOTENCY_TTL", "300")),
+)
+# Yanıtlara aşama sürelerini içeren Server-Timing başlığı eklenir (METRICS_TIMING_HEADER=0 ile kapatılır)
+TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "1") == "1"
 
-sessions: dict[str, FullContextManager] = {}
-sessions_lock = threading.Lock()
+SESSIONS_GAUGE = metrics.registry.gauge("chatbot_sessions", "Oturum sayıları (bellekte, turu işlenen, kuyrukta)", ("state",))
+
+
+def _collect_session_metrics():
+    store_stats = store.stats()
+    gate_stats = gate.stats()
+    SESSIONS_GAUGE.set(store_stats["resident"], state="resident")
+    SESSIONS_GAUGE.set(store_stats["leased"], state="active")
+    SESSIONS_GAUGE.set(gate_stats["queued_requests"], state="queued")
+
+
+metrics.registry.add_collector(_collect_session_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(registry.warm_up)
+    sweeper = asyncio.create_task(store.run_sweeper(float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))))
+    yield
+    sweeper.cancel()
+
+
+app = FastAPI(title="Belediye Chatbot API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not TIMING_HEADER:
+        return await call_next(request)
+
+    timings, token = metrics.start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.end_request(token)
+    # Akışlı yanıtlarda başlık ilk bayttan önce gönderildiği için sadece o ana kadarki süreler yer alır
+    timings["total"] = time.perf_counter() - start
+    response.headers["Server-Timing"] = metrics.server_timing(timings)
+    return response
 
 
 class ChatRequest(BaseModel):
@@ -31,30 +85,40 @@ class SessionResponse(BaseModel):
 
 
 @app.post("/sessions", response_model=SessionResponse)
-def create_session():
-    session_id = uuid.uuid4().hex[:8]
-    filename = f"data/session_{session_id}.json"
-
-    manager = FullContextManager(filename=filename, reset=True)
-    with sessions_lock:
-        sessions[session_id] = manager
+async def create_session():
+    session_id, manager = await store.create()
 
     return SessionResponse(
         session_id=session_id,
-        data=manager.data,
+        data=manager.export_data(),
         next_question=manager.last_question,
     )
 
 
-@app.post("/sessions/{session_id}/chat", response_model=ChatResponse)
-def chat(session_id: str, req: ChatRequest):
-    with sessions_lock:
-        manager = sessions.get(session_id)
-    if not manager:
-        raise HTTPException(status_code=404, detail="Session not found")
+async def _run_turn(session_id, message):
+    try:
+        async with store.session(session_id) as manager:
+            if not manager:
+                raise HTTPException(status_code=404, detail="Session not found")
 
-    response = manager.chat(req.message)
+            return await manager.chat_async(message)
+    except (SessionBusy, SessionConflict):
+        raise HTTPException(status_code=409, detail="Session is busy, please retry")
 
+
+@app.post("/sessions/{session_id}/chat", response_model=ChatResponse)
+async def chat(session_id: str, req: ChatRequest, http_response: Response,
+               idempotency_key: str | None = Header(default=None)):
+    try:
+        response, replayed = await gate.run(
+            session_id, lambda: _run_turn(session_id, req.message), idempotency_key
+        )
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many pending messages for this session",
+                            headers={"Retry-After": "1"})
+
+    if replayed:
+        http_response.headers["Idempotent-Replayed"] = "true"
     completed = response == "SESSION_COMPLETED_SUCCESSFULLY"
 
     return ChatResponse(
@@ -64,28 +128,232 @@ def chat(session_id: str, req: ChatRequest):
     )
 
 
+async def _open_turn(session_id):
+    # Sıra ve oturum kilidi akış boyunca tutulur; yanıt başlamadan hata kodları dönebilsin diye önceden alınır
+    stack = AsyncExitStack()
+    try:
+        await stack.enter_async_context(gate.hold(session_id))
+        manager = await stack.enter_async_context(store.session(session_id))
+    except QueueFull:
+        await stack.aclose()
+        raise HTTPException(status_code=429, detail="Too many pending messages for this session",
+                            headers={"Retry-After": "1"})
+    except (SessionBusy, SessionConflict):
+        await stack.aclose()
+        raise HTTPException(status_code=409, detail="Session is busy, please retry")
+
+    if not manager:
+        await stack.aclose()
+        raise HTTPException(status_code=404, detail="Session not found")
+    return stack, manager
+
+
+def _sse(event):
+    payload = json.dumps(event, ensure_ascii=False)
+    return f"event: {event['event']}\ndata: {payload}\n\n"
+
+
+class TurnStreamingResponse(StreamingResponse):
+    # Sıra ve oturum kilidi yanıt bitince bırakılır; istemci gövde başlamadan koparsa veya gövde hiç okunmazsa da
+    def __init__(self, content, stack, **kwargs):
+        super().__init__(content, **kwargs)
+        self.stack = stack
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+                await self.stack.aclose()
+
+
+@app.post("/sessions/{session_id}/chat/stream")
+async def chat_stream(session_id: str, req: ChatRequest):
+    stack, manager = await _open_turn(session_id)
+
+    async def events():
+        async for event in manager.chat_stream(req.message):
+            yield _sse(event)
+
+    return TurnStreamingResponse(
+        events(),
+        stack,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/sessions/{session_id}/ws")
+async def chat_ws(websocket: WebSocket, session_id: str):
+    await websocket.accept()
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                payload = json.loads(text)
+            except ValueError:
+                payload = None
+            # {"message": "..."} ya da düz metin; HTTP uçlarındaki ChatRequest gibi metin dışı değer reddedilir
+            message = payload.get("message") if isinstance(payload, dict) else text
+            if not isinstance(message, str):
+                await websocket.send_json({"event": "error", "status": 422, "detail": "message must be a string"})
+                continue
+
+            try:
+                stack, manager = await _open_turn(session_id)
+            except HTTPException as e:
+                await websocket.send_json({"event": "error", "status": e.status_code, "detail": e.detail})
+                if e.status_code == 404:
+                    await websocket.close(code=4404)
+                    return
+                continue
+
+            async with stack:
+                async for event in manager.chat_stream(message):
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/sessions/{session_id}", response_model=SessionResponse)
-def get_session(session_id: str):
-    with sessions_lock:
-        manager = sessions.get(session_id)
+async def get_session(session_id: str):
+    manager = await store.get(session_id)
     if not manager:
         raise HTTPException(status_code=404, detail="Session not found")
 
     return SessionResponse(
         session_id=session_id,
-        data=manager.data,
+        data=manager.export_data(),
         next_question=manager.last_question,
     )
 
 
 @app.delete("/sessions/{session_id}")
-def delete_session(session_id: str):
-    with sessions_lock:
-        manager = sessions.pop(session_id, None)
-    if not manager:
+async def delete_session(session_id: str):
+    if not await store.delete(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-
-    if os.path.exists(manager.filename):
-        os.remove(manager.filename)
+    gate.forget(session_id)
 
     return {"detail": "Session deleted"}
+
+
+@app.get("/stats/sessions")
+async def session_stats():
+    return {**store.stats(), "gate": gate.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/projects")
+async def list_projects(
+    district: str | None = None,
+    category: str | None = None,
+    projectType: str | None = None,
+    priority: str | None = None,
+    start_from: str | None = None,
+    start_to: str | None = None,
+    end_from: str | None = None,
+    end_to: str | None = None,
+    budget_min: float | None = None,
+    budget_max: float | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+):
+    filters = {
+        "district": district, "category": category, "projectType": projectType, "priority": priority,
+        "start_from": start_from, "start_to": start_to, "end_from": end_from, "end_to": end_to,
+        "budget_min": budget_min, "budget_max": budget_max,
+    }
+    try:
+        items, next_cursor = await asyncio.to_thread(registry.get_project_store().query, filters, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@app.get("/projects/nearby")
+async def nearby_projects(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float | None = Query(default=None, gt=0, le=50000),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    # radius (metre) verilirse yarıçap içindekiler, verilmezse en yakın `limit` proje
+    items = await asyncio.to_thread(registry.get_project_store().nearby, lat, lon, radius, limit)
+    return {"items": items}
+
+
+@app.get("/projects/bbox")
+async def projects_in_bbox(
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    limit: int = Query(default=500, ge=1, le=5000),
+):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    items = await asyncio.to_thread(
+        registry.get_project_store().in_bbox, min_lat, min_lon, max_lat, max_lon, limit
+    )
+    return {"items": items}
+
+
+@app.get("/projects/{project_id}/nearby")
+async def projects_near_project(
+    project_id: str,
+    radius: float | None = Query(default=300, gt=0, le=50000),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    project_store = registry.get_project_store()
+    point = await asyncio.to_thread(project_store.point, project_id)
+    if point is None:
+        if not await asyncio.to_thread(project_store.get, project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        raise HTTPException(status_code=422, detail="Project has no coordinates")
+    items = await asyncio.to_thread(project_store.nearby, *point, radius, limit, project_id)
+    return {"items": items}
+
+
+@app.get("/projects/{project_id}")
+async def get_project(project_id: str):
+    project = await asyncio.to_thread(registry.get_project_store().get, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+
+@app.post("/batch")
+async def batch(request: Request, concurrency: int | None = None, geocode: bool = True):
+    # Gövde: NDJSON (application/x-ndjson) ya da JSON liste / {"items": [...]}; yanıt NDJSON akışıdır
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = list(parse_items(body.splitlines()))
+    else:
+        try:
+            payload = json.loads(body or b"[]")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be NDJSON or a JSON list")
+        if isinstance(payload, dict):
+            payload = payload.get("items", [])
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body must be NDJSON or a JSON list")
+        items = list(parse_items(payload))
+
+    limit = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    # Sunucu zaten ortak proje deposunu kullanıyor; toplu girişte mükerrerler ona karşı (sadece okunarak) aranır
+    processor = BatchProcessor(
+        concurrency=max(1, min(concurrency or limit, limit)), geocode=geocode,
+        dedup_service=registry.get_dedup_service(),
+    )
+
+    async def results():
+        async for result in processor.run(items):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        yield json.dumps(processor.stats(), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
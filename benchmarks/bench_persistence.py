@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.manager import FullContextManager
+from src.storage import JsonFileStorage, JournalStorage
+
+
+class LegacyStorage(JsonFileStorage):
+    # Eski davranış: her turda yerinde, atomik olmayan tam yazım
+    def save(self, data):
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        self.bytes_written += os.path.getsize(self.filename)
+
+
+class ScriptedAI:
+    def __init__(self, turns):
+        self.turns = turns
+        self.index = 0
+
+    def process_ai_response(self, **kwargs):
+        patch = self.turns[self.index % len(self.turns)]
+        self.index += 1
+        return json.loads(json.dumps(patch))
+
+
+class FixedGeo:
+    def get_coordinates(self, district, street=None):
+        return "40.1950, 29.0600"
+
+
+def script(turns):
+    base = [
+        {"projectName": "Nilüfer Altyapı Yenileme"},
+        {"description": "Ana isale hattının yenilenmesi ve yol onarımı"},
+        {"category": "Su İşleri", "projectType": "Yeni Yatırım", "priority": "Yüksek"},
+        {"location": {"district": "Nilüfer", "street": "Fethiye Mahallesi"}},
+        {"location": {"endPoint": "40.2000, 29.0700"}},
+        {"scope": {"length": 1200, "width": 8}},
+        {"dates": {"plannedStart": "2026-11-01", "duration": "45"}},
+        {"budget": {"total": "3500000", "used": "250000"}},
+        {"team": {"projectManager": {"name": "Ayşe Yılmaz", "phone": "05321234567"}}},
+    ]
+    # Sonraki turlar: malzeme notları büyüdükçe proje de büyür
+    for i in range(turns - len(base)):
+        base.append({"scope": {"materialSummary": f"Revizyon {i}: " + "100'lük boru, C35 beton; " * (1 + i // 10)},
+                     "budget": {"used": str(250000 + i * 1000)}})
+    return base[:turns]
+
+
+def run(name, factory, turns, directory):
+    filename = os.path.join(directory, f"{name}.json")
+    manager = FullContextManager(filename=filename, reset=True, ai_service=ScriptedAI(script(turns)),
+                                 geo_service=FixedGeo(), background_geocode=False, persistence="memory")
+    storage = manager.storage = factory(filename)
+    manager.save()
+    storage.bytes_written = 0
+
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        manager.chat("devam")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    if isinstance(storage, JournalStorage):
+        storage.close()
+        restored = FullContextManager(filename=filename, ai_service=manager.ai_service, geo_service=FixedGeo(),
+                                      background_geocode=False, persistence="journal",
+                                      project_store=manager.project_store, dedup_service=False)
+        assert restored.data == manager.data, "günlük tekrar oynatımı farklı sonuç verdi"
+
+    latencies.sort()
+    return {
+        "mode": name,
+        "bytes_written": storage.bytes_written,
+        "bytes_per_turn": storage.bytes_written // turns,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oturum kalıcılığı: tam yazım vs. ekleme günlüğü")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--compact-every", type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_persistence_")
+    try:
+        modes = [
+            ("legacy", LegacyStorage),
+            ("json_atomic", JsonFileStorage),
+            ("journal_always", lambda f: JournalStorage(f, fsync="always", compact_every=args.compact_every)),
+            ("journal_interval", lambda f: JournalStorage(f, fsync="interval", compact_every=args.compact_every)),
+            ("journal_never", lambda f: JournalStorage(f, fsync="never", compact_every=args.compact_every)),
+        ]
+        print(f"{'mod':<18} {'yazılan bayt':>14} {'bayt/tur':>10} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, factory in modes:
+            result = run(name, factory, args.turns, directory)
+            print(f"{result['mode']:<18} {result['bytes_written']:>14} {result['bytes_per_turn']:>10} "
+                  f"{result['p50_ms']:>9} {result['p95_ms']:>9}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
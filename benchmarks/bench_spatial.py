@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.spatial_index import GridIndex, haversine
+
+# Bursa il sınırlarını kabaca kapsayan kutu
+BURSA = (39.6, 28.2, 40.6, 30.0)
+
+
+def random_points(count, seed):
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = BURSA
+    # Noktaların çoğu merkez ilçelerde yoğunlaşır
+    points = []
+    for i in range(count):
+        if rng.random() < 0.7:
+            lat, lon = rng.gauss(40.20, 0.04), rng.gauss(29.02, 0.06)
+        else:
+            lat, lon = rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+        points.append((f"PRJ-{i:06d}", lat, lon))
+    return points
+
+
+def timed(func, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        func(*query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return round(statistics.median(latencies), 3), round(latencies[int(len(latencies) * 0.95) - 1], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Izgara indeksi vs. doğrusal tarama")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    points = random_points(args.points, args.seed)
+    index = GridIndex()
+    start = time.perf_counter()
+    for item_id, lat, lon in points:
+        index.upsert(item_id, lat, lon)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(args.seed + 1)
+    centers = [(lat, lon) for _, lat, lon in rng.sample(points, args.queries)]
+    far_away = [(0.0, 0.0), (-45.0, -120.0), (70.0, 150.0)] * 3
+    viewports = [(lat - 0.01, lon - 0.015, lat + 0.01, lon + 0.015) for lat, lon in centers]
+
+    def scan_within(lat, lon):
+        return [p for p in points if haversine(lat, lon, p[1], p[2]) <= args.radius]
+
+    def scan_bbox(min_lat, min_lon, max_lat, max_lon):
+        return [p for p in points if min_lat <= p[1] <= max_lat and min_lon <= p[2] <= max_lon]
+
+    scan_queries = args.queries // 10 or 1
+    rows = [
+        ("within (grid)", timed(lambda lat, lon: index.within(lat, lon, args.radius), centers)),
+        ("within (scan)", timed(scan_within, centers[:scan_queries])),
+        ("nearest k=10 (grid)", timed(lambda lat, lon: index.nearest(lat, lon, k=10), centers)),
+        # Verinin çok uzağından sorgu (ör. lat=0, lon=0): halka taraması sınırsız büyümemeli
+        ("nearest k=10 (uzak)", timed(lambda lat, lon: index.nearest(lat, lon, k=10), far_away)),
+        ("bbox (grid)", timed(index.bbox, viewports)),
+        ("bbox (scan)", timed(scan_bbox, viewports[:scan_queries])),
+    ]
+
+    # Yerinde güncelleme maliyeti: konumu değişen projeler
+    moves = rng.sample(points, min(10_000, len(points)))
+    start = time.perf_counter()
+    for item_id, lat, lon in moves:
+        index.upsert(item_id, lat + 0.001, lon + 0.001)
+    update_us = (time.perf_counter() - start) / len(moves) * 1e6
+
+    print(f"{args.points} nokta, indeks kurulumu {build_s:.2f} s, güncelleme {update_us:.1f} µs/nokta")
+    print(f"{'sorgu':<22} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, (p50, p95) in rows:
+        print(f"{name:<22} {p50:>10} {p95:>10}")
+
+
+if __name__ == "__main__":
+    main()
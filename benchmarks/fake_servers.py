@@ -0,0 +1,193 @@
+import os
+import re
+import sys
+import json
+import random
+import asyncio
+import argparse
+from collections import Counter
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Gemini ve Nominatim yerine geçen yerel sunucular; API anahtarı ve ağ olmadan yük testi için.
+# api.py'yi bunlara yönlendirmek için:
+#   GEMINI_BASE_URL=http://127.0.0.1:8081 NOMINATIM_DOMAIN=127.0.0.1:8082 NOMINATIM_SCHEME=http
+
+SCENARIOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json")
+USER_MESSAGE = re.compile(r'KULLANICI MESAJI:\s*"(.*)"\s*ÇIKTI FORMATI', re.S)
+FALLBACK_PATCH = {"_system_status": "IRRELEVANT"}
+
+
+def load_script(path=SCENARIOS_PATH):
+    # Mesaj şablonu -> patch; "{n}" oturum numarasıdır ve patch içine aynen taşınır
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    script = []
+    for scenario in scenarios:
+        for turn in scenario["turns"]:
+            if "patch" not in turn:
+                continue
+            pattern = re.escape(turn["message"]).replace(re.escape("{n}"), r"(?P<n>\d+)")
+            script.append((re.compile(pattern), json.dumps(turn["patch"], ensure_ascii=False)))
+    return script
+
+
+class Latency:
+    def __init__(self, mean_ms, jitter_ms, rng):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng
+
+    async def wait(self):
+        delay = max(0.0, self.rng.gauss(self.mean_ms, self.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def create_gemini_app(script, latency, error_rate, rng):
+    app = FastAPI(title="Sahte Gemini")
+    counts = Counter()
+
+    def reply_for(body):
+        prompt = " ".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        match = USER_MESSAGE.search(prompt)
+        message = match.group(1).strip() if match else ""
+        for pattern, patch in script:
+            found = pattern.fullmatch(message)
+            if found:
+                counts["scripted"] += 1
+                n = found.groupdict().get("n")
+                return (patch.replace("{n}", n) if n else patch), prompt
+        counts["fallback"] += 1
+        return json.dumps(FALLBACK_PATCH), prompt
+
+    def usage(prompt, text):
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        return {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        }
+
+    def candidate(text):
+        return {"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}
+
+    def error():
+        counts["errors"] += 1
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"code": 503, "message": "Sahte sunucu: model aşırı yüklü", "status": "UNAVAILABLE"}},
+        )
+
+    @app.post("/{version}/cachedContents")
+    async def create_cache(version: str):
+        # Kural bloğu önbelleği desteklenmiyor; istemci system_instruction ile devam eder
+        return JSONResponse(
+            status_code=400,
+            content={"error": {"code": 400, "message": "Cached content is not supported", "status": "INVALID_ARGUMENT"}},
+        )
+
+    @app.post("/{version}/models/{model_action}")
+    async def generate(version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        body = await request.json()
+        counts["requests"] += 1
+        await latency.wait()
+        if rng.random() < error_rate:
+            return error()
+
+        text, prompt = reply_for(body)
+        if action == "streamGenerateContent":
+            async def events():
+                step = max(1, len(text) // 4)
+                for start in range(0, len(text), step):
+                    chunk = {"candidates": [candidate(text[start:start + step])], "modelVersion": model}
+                    if start + step >= len(text):
+                        chunk["usageMetadata"] = usage(prompt, text)
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n"
+                    await asyncio.sleep(0)
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return {"candidates": [candidate(text)], "usageMetadata": usage(prompt, text), "modelVersion": model}
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(counts)
+
+    return app
+
+
+def create_nominatim_app(latency, miss_rate, rng):
+    app = FastAPI(title="Sahte Nominatim")
+    counts = Counter()
+
+    @app.get("/search")
+    async def search(q: str = ""):
+        counts["requests"] += 1
+        await latency.wait()
+        if not q or rng.random() < miss_rate:
+            counts["misses"] += 1
+            return []
+        # Sorgudan türetilen sabit bir nokta: aynı adres her seferinde aynı koordinatı alır
+        seeded = random.Random(q)
+        lat, lon = 40.20 + seeded.uniform(-0.05, 0.05), 29.02 + seeded.uniform(-0.08, 0.08)
+        return [{
+            "place_id": abs(hash(q)) % 10**8,
+            "lat": f"{lat:.6f}",
+            "lon": f"{lon:.6f}",
+            "display_name": q,
+            "boundingbox": [f"{lat - 0.001:.6f}", f"{lat + 0.001:.6f}", f"{lon - 0.001:.6f}", f"{lon + 0.001:.6f}"],
+        }]
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(counts)
+
+    return app
+
+
+async def serve(args):
+    rng = random.Random(args.seed)
+    gemini = create_gemini_app(
+        load_script(args.scenarios), Latency(args.gemini_latency_ms, args.gemini_jitter_ms, rng),
+        args.gemini_error_rate, rng,
+    )
+    nominatim = create_nominatim_app(
+        Latency(args.nominatim_latency_ms, args.nominatim_jitter_ms, rng), args.nominatim_miss_rate, rng,
+    )
+    servers = [
+        uvicorn.Server(uvicorn.Config(gemini, host=args.host, port=args.gemini_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(nominatim, host=args.host, port=args.nominatim_port, log_level="warning")),
+    ]
+    print(
+        f"🧪 Sahte Gemini http://{args.host}:{args.gemini_port}, "
+        f"sahte Nominatim http://{args.host}:{args.nominatim_port}",
+        file=sys.stderr,
+    )
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yük testi için sahte Gemini ve Nominatim sunucuları")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--gemini-port", type=int, default=8081)
+    parser.add_argument("--nominatim-port", type=int, default=8082)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=100)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="503 dönen isteklerin oranı")
+    parser.add_argument("--nominatim-latency-ms", type=float, default=150)
+    parser.add_argument("--nominatim-jitter-ms", type=float, default=50)
+    parser.add_argument("--nominatim-miss-rate", type=float, default=0.0, help="Sonuç bulunamayan sorguların oranı")
+    parser.add_argument("--scenarios", default=SCENARIOS_PATH)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS_PATH = os.path.join(ROOT, "benchmarks", "scenarios.json")
+FINAL_RESPONSES = {"SESSION_COMPLETED_SUCCESSFULLY", "SESSION_CANCELLED"}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 1)
+
+
+def rss_mb(pid):
+    # Süreç ve alt süreçlerinin (uvicorn --workers) toplam RSS'i; /proc yoksa None
+    if not pid or not os.path.isdir("/proc"):
+        return None
+    pids = {pid}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        pids.add(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    total_kb = 0
+    for item in pids:
+        try:
+            with open(f"/proc/{item}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+class LoadGenerator:
+    def __init__(self, base_url, scenarios, sessions, concurrency, think_ms=0, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.scenarios = scenarios
+        self.sessions = sessions
+        self.concurrency = concurrency
+        self.think_ms = think_ms
+        self.timeout = timeout
+        self.turn_latencies = []
+        self.create_latencies = []
+        self.statuses = Counter()
+        self.outcomes = Counter()
+        self.turns = 0
+        self.completed_sessions = 0
+
+    async def _request(self, client, method, path, latencies, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            self.statuses[str(response.status_code)] += 1
+            return response
+        except httpx.HTTPError as e:
+            self.statuses[type(e).__name__] += 1
+            return None
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def run_session(self, client, number):
+        scenario = self.scenarios[number % len(self.scenarios)]
+        response = await self._request(client, "POST", "/sessions", self.create_latencies)
+        if response is None or response.status_code != 200:
+            return
+        session_id = response.json()["session_id"]
+
+        for turn in scenario["turns"]:
+            if self.think_ms:
+                await asyncio.sleep(self.think_ms / 1000)
+            message = turn["message"].replace("{n}", str(number))
+            response = await self._request(
+                client, "POST", f"/sessions/{session_id}/chat", self.turn_latencies, json={"message": message}
+            )
+            self.turns += 1
+            if response is None or response.status_code != 200:
+                self.outcomes["error"] += 1
+                break
+            reply = response.json()["response"]
+            if reply in FINAL_RESPONSES:
+                self.outcomes[reply] += 1
+                break
+        else:
+            self.outcomes["open"] += 1
+        self.completed_sessions += 1
+
+        await client.delete(f"/sessions/{session_id}")
+
+    async def run(self, pid=None):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        queue = asyncio.Queue()
+        for number in range(self.sessions):
+            queue.put_nowait(number)
+
+        peak_rss = rss_mb(pid)
+        start_rss = peak_rss
+
+        async def worker(client):
+            while True:
+                try:
+                    number = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.run_session(client, number)
+
+        async def sample_rss():
+            nonlocal peak_rss
+            while True:
+                await asyncio.sleep(0.5)
+                value = rss_mb(pid)
+                if value is not None and (peak_rss is None or value > peak_rss):
+                    peak_rss = value
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            sampler = asyncio.create_task(sample_rss())
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - start
+            sampler.cancel()
+            metrics_text = None
+            try:
+                metrics_text = (await client.get("/metrics")).text
+            except httpx.HTTPError:
+                pass
+
+        return {
+            "sessions": self.completed_sessions,
+            "turns": self.turns,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 2),
+            "sessions_per_s": round(self.completed_sessions / elapsed, 2) if elapsed else 0.0,
+            "turns_per_s": round(self.turns / elapsed, 2) if elapsed else 0.0,
+            "turn_p50_ms": percentile(self.turn_latencies, 0.50),
+            "turn_p95_ms": percentile(self.turn_latencies, 0.95),
+            "turn_p99_ms": percentile(self.turn_latencies, 0.99),
+            "create_p50_ms": percentile(self.create_latencies, 0.50),
+            "create_p99_ms": percentile(self.create_latencies, 0.99),
+            "rss_start_mb": start_rss,
+            "rss_peak_mb": rss_mb(pid) if peak_rss is None else max(peak_rss, rss_mb(pid) or 0),
+            "statuses": dict(self.statuses),
+            "outcomes": dict(self.outcomes),
+            "stages": stage_summary(metrics_text),
+        }
+
+
+def stage_summary(metrics_text):
+    # /metrics histogramlarından aşama başına ortalama süre (ms)
+    sums, counts = {}, {}
+    for line in (metrics_text or "").splitlines():
+        if not line.startswith("chatbot_stage_duration_seconds_"):
+            continue
+        name, value = line.rsplit(" ", 1)
+        stage = name.split('stage="', 1)[1].split('"', 1)[0]
+        if name.startswith("chatbot_stage_duration_seconds_sum"):
+            sums[stage] = float(value)
+        elif name.startswith("chatbot_stage_duration_seconds_count"):
+            counts[stage] = float(value)
+    return {stage: round(sums[stage] / counts[stage] * 1000, 2) for stage in sums if counts.get(stage)}
+
+
+def wait_until_ready(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Süreç beklenmedik şekilde kapandı: {process.args}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Zaman aşımı: {url}")
+
+
+def spawn(args, workdir):
+    # Sahte sunucular + api.py ayrı süreçlerde; API tüm dış çağrılarını sahte sunuculara yapar
+    fakes = subprocess.Popen(
+        [
+            sys.executable, os.path.join(ROOT, "benchmarks", "fake_servers.py"),
+            "--gemini-port", str(args.gemini_port), "--nominatim-port", str(args.nominatim_port),
+            "--gemini-latency-ms", str(args.gemini_latency_ms),
+            "--gemini-error-rate", str(args.gemini_error_rate),
+            "--nominatim-latency-ms", str(args.nominatim_latency_ms),
+        ],
+        cwd=ROOT,
+    )
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "fake-key",
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{args.gemini_port}",
+        "NOMINATIM_DOMAIN": f"127.0.0.1:{args.nominatim_port}",
+        "NOMINATIM_SCHEME": "http",
+        "NOMINATIM_RATE": os.getenv("NOMINATIM_RATE", "1000"),
+        "SESSION_DIR": os.path.join(workdir, "sessions"),
+        "SESSION_DB_PATH": os.path.join(workdir, "sessions.sqlite3"),
+        "PROJECT_STORE_PATH": os.path.join(workdir, "projects.sqlite3"),
+        "GEOCODE_CACHE_PATH": os.path.join(workdir, "geocache.sqlite3"),
+    }
+    api = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(args.api_port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.gemini_port}/_stats", fakes)
+        wait_until_ready(f"http://127.0.0.1:{args.api_port}/stats/sessions", api)
+    except Exception:
+        stop([fakes, api])
+        raise
+    return [fakes, api]
+
+
+def stop(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Senaryolu çok turlu sohbetlerle api.py yük testi")
+    parser.add_argument("--base-url", default=None, help="Çalışan API adresi (verilmezse --spawn gerekir)")
+    parser.add_argument("--spawn", action="store_true", help="Sahte sunucuları ve API'yi bu betik başlatsın")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--think-ms", type=float, default=0, help="Turlar arası kullanıcı bekleme süresi")
+    parser.add_argument("--scenarios", default=SCENARIOS_PATH)
+    parser.add_argument("--pid", type=int, default=None, help="RSS ölçümü için API süreç kimliği")
+    parser.add_argument("--json", dest="json_path", default=None, help="Sonucu JSON olarak yaz (karşılaştırma için)")
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--gemini-port", type=int, default=8081)
+    parser.add_argument("--nominatim-port", type=int, default=8082)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--nominatim-latency-ms", type=float, default=150)
+    parser.add_argument("--verbose", action="store_true", help="API loglarını göster")
+    args = parser.parse_args()
+
+    if not args.base_url and not args.spawn:
+        parser.error("--base-url veya --spawn verilmeli")
+
+    with open(args.scenarios, encoding="utf-8") as f:
+        scenarios = json.load(f)
+
+    processes = []
+    workdir = tempfile.mkdtemp(prefix="loadgen_")
+    try:
+        pid = args.pid
+        base_url = args.base_url
+        if args.spawn:
+            processes = spawn(args, workdir)
+            pid = processes[1].pid
+            base_url = f"http://127.0.0.1:{args.api_port}"
+
+        generator = LoadGenerator(base_url, scenarios, args.sessions, args.concurrency, args.think_ms)
+        result = asyncio.run(generator.run(pid))
+    finally:
+        stop(processes)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for key, value in result.items():
+        print(f"{key:<16} {value}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
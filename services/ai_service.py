@@ -1,7 +1,14 @@
 from datetime import datetime
 import json
+import time
+import asyncio
 import logging
+import threading
 import google.genai as genai
+from services import metrics
+from services.resilience import ResilientCaller
+from services.patch_schema import build_response_schema, coerce_patch
+from services.state_encoder import StateEncoder
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,23 +21,32 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class AIService:
-    def __init__(self, api_key, model_id="gemini-2.0-flash"):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key, model_id="gemini-2.0-flash", client=None,
+                 state_token_budget=None, relevant_state_only=False,
+                 context_cache=True, context_cache_ttl=3600, resilience=None, structured_output=True):
+        self.client = client or genai.Client(api_key=api_key)
         self.model_id = model_id
+        # Süre sınırı, yeniden deneme, paralel istek, devre kesici ve yedek model
+        self.resilience = resilience or ResilientCaller(model_id)
         self.logger = logging.getLogger(__name__)
+        self.state_encoder = StateEncoder(token_budget=state_token_budget, relevant_only=relevant_state_only)
+        # Model çıktısı patch şemasıyla sınırlanır (boş yapı + kontrol alanları)
+        self.response_schema = build_response_schema() if structured_output else None
 
-    def _build_prompt(self, user_input, current_project_state, last_question=None):
-            cur_date = datetime.now().strftime("%Y-%m-%d")
-            current_state_json = json.dumps(current_project_state, indent=2, ensure_ascii=False)
-            context_hint = ""
-            if last_question:
-                context_hint = f"BAĞLAM İPUCU: Kullanıcıya en son şu soruyu sordun: '{last_question}'. Eğer kullanıcı sadece bir sayı veya kısa cevap verdiyse, bu soruyla ilişkilendir."
+        self.system_instruction = self._build_system_instruction()
+        self.context_cache = context_cache
+        self.context_cache_ttl = context_cache_ttl
+        self._cache_name = None
+        self._cache_expires_at = 0
+        self._cache_retry_at = 0
+        self._cache_lock = threading.Lock()
+
+    def _build_system_instruction(self):
+            # Her çağrıda aynı kalan kural bloğu; system_instruction / context cache olarak gönderilir
             return f"""
             ROL: Sen belediyede çalışan tecrübeli bir Veri Analistisin.
             GÖREV: Kullanıcının doğal dildeki ifadesini teknik proje verisine dönüştür.
             
-            ŞU ANKİ TARİH: {cur_date}
-
             --- ZEKİ SINIFLANDIRMA KURALLARI (GENELLEME YAP) ---
             
             1. KATEGORİ (category) TESPİTİ:
@@ -177,8 +193,25 @@ class AIService:
             - Tüm veriyi silmek istediğini anla.
             - Çıktı: {{ "_system_status": "RESET_ALL" }}
             - Başka hiçbir şey ekleme.
-            
-            MEVCUT VERİ (CONTEXT):
+            """
+
+    def _build_prompt(self, user_input, current_project_state, last_question=None):
+            cur_date = datetime.now().strftime("%Y-%m-%d")
+            current_state_json = self.state_encoder.encode(current_project_state, last_question)
+            # Tur başına ölçüm paylaşılan serviste tutulmaz, metriğe yazılır (oturumlar birbirini ezmez)
+            stats = self.state_encoder.measure(current_project_state, current_state_json)
+            metrics.PROMPT_STATE_TOKENS.observe(stats["state_tokens"], format="compact")
+            metrics.PROMPT_STATE_TOKENS.observe(stats["legacy_state_tokens"], format="legacy")
+            self.logger.debug(
+                f"Prompt durum boyutu: ~{stats['state_tokens']} token (tasarruf: ~{stats['saved_tokens']} token)"
+            )
+            context_hint = ""
+            if last_question:
+                context_hint = f"BAĞLAM İPUCU: Kullanıcıya en son şu soruyu sordun: '{last_question}'. Eğer kullanıcı sadece bir sayı veya kısa cevap verdiyse, bu soruyla ilişkilendir."
+            return f"""
+            ŞU ANKİ TARİH: {cur_date}
+
+            MEVCUT VERİ (CONTEXT - boş alanlar gösterilmez):
             {current_state_json}
             {context_hint}
 
@@ -189,26 +222,243 @@ class AIService:
             Sadece güncellenen alanları içeren bir JSON nesnesi döndür.
             """
 
+    def _cached_content(self):
+            if not self.context_cache:
+                return None
+
+            with self._cache_lock:
+                now = time.time()
+                # Süresi dolmadan biraz önce yenilenir
+                if self._cache_name and now < self._cache_expires_at - 60:
+                    return self._cache_name
+                if now < self._cache_retry_at:
+                    return None
+
+                try:
+                    cache = self.client.caches.create(
+                        model=self.model_id,
+                        config=genai.types.CreateCachedContentConfig(
+                            display_name="belediye-chatbot-rules",
+                            system_instruction=self.system_instruction,
+                            ttl=f"{int(self.context_cache_ttl)}s",
+                        )
+                    )
+                    self._cache_name = cache.name
+                    self._cache_expires_at = now + self.context_cache_ttl
+                    self.logger.info(f"🗄️ Kural bloğu önbelleğe alındı: {cache.name}")
+                except Exception as e:
+                    self._cache_name = None
+                    if isinstance(e, genai.errors.ClientError) and e.code == 400:
+                        # Model desteklemiyor veya içerik minimum token sınırının altında
+                        self.logger.warning(f"Context cache kullanılamıyor, system_instruction ile devam: {e}")
+                        self.context_cache = False
+                    else:
+                        self.logger.warning(f"Context cache oluşturulamadı: {e}")
+                        self._cache_retry_at = now + 300
+                return self._cache_name
+
+    @staticmethod
+    def _is_cache_error(error):
+            return error.code in (403, 404) or "cache" in str(error).lower()
+
+    def _invalidate_cache(self, name):
+            with self._cache_lock:
+                if self._cache_name == name:
+                    self._cache_name = None
+                    self._cache_expires_at = 0
+
+    def _generate_config(self, cached_content=None, timeout=None):
+            # timeout: saniye; istek düzeyinde HTTP zaman aşımı olarak gönderilir
+            http_options = genai.types.HttpOptions(timeout=max(1, int(timeout * 1000))) if timeout else None
+            if cached_content:
+                return genai.types.GenerateContentConfig(
+                    cached_content=cached_content,
+                    response_mime_type="application/json",
+                    response_schema=self.response_schema,
+                    temperature=0,
+                    http_options=http_options
+                )
+            return genai.types.GenerateContentConfig(
+                system_instruction=self.system_instruction,
+                response_mime_type="application/json",
+                response_schema=self.response_schema,
+                temperature=0,
+                http_options=http_options
+            )
+
+    def _generate(self, prompt, model_id=None, timeout=None):
+            model_id = model_id or self.model_id
+            # Kural bloğu önbelleği birincil modele bağlı; yedek model system_instruction ile çağrılır
+            cached = self._cached_content() if model_id == self.model_id else None
+            try:
+                return self.client.models.generate_content(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(cached, timeout)
+                )
+            except genai.errors.ClientError as e:
+                if not cached or not self._is_cache_error(e):
+                    raise
+                # Önbellek sunucu tarafında silinmiş/süresi dolmuş olabilir
+                self.logger.warning(f"Önbellekli istek başarısız, önbelleksiz tekrar deneniyor: {e}")
+                self._invalidate_cache(cached)
+                return self.client.models.generate_content(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(timeout=timeout)
+                )
+
+    async def _generate_async(self, prompt, model_id=None, timeout=None):
+            model_id = model_id or self.model_id
+            cached = await asyncio.to_thread(self._cached_content) if model_id == self.model_id else None
+            try:
+                return await self.client.aio.models.generate_content(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(cached, timeout)
+                )
+            except genai.errors.ClientError as e:
+                if not cached or not self._is_cache_error(e):
+                    raise
+                self.logger.warning(f"Önbellekli istek başarısız, önbelleksiz tekrar deneniyor: {e}")
+                self._invalidate_cache(cached)
+                return await self.client.aio.models.generate_content(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(timeout=timeout)
+                )
+
+    async def _generate_stream(self, prompt, model_id=None, timeout=None):
+            model_id = model_id or self.model_id
+            cached = await asyncio.to_thread(self._cached_content) if model_id == self.model_id else None
+            received = False
+            try:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(cached, timeout)
+                )
+                async for chunk in stream:
+                    received = True
+                    yield chunk
+            except genai.errors.ClientError as e:
+                # İstek ilk parçadan önce düştüyse önbelleksiz tekrar denenebilir
+                if received or not cached or not self._is_cache_error(e):
+                    raise
+                self.logger.warning(f"Önbellekli istek başarısız, önbelleksiz tekrar deneniyor: {e}")
+                self._invalidate_cache(cached)
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=model_id,
+                    contents=prompt,
+                    config=self._generate_config(timeout=timeout)
+                )
+                async for chunk in stream:
+                    yield chunk
+
+    def _call_model(self, prompt):
+            try:
+                with metrics.timed("llm"):
+                    response = self.resilience.call(
+                        lambda model_id, timeout: self._generate(prompt, model_id, timeout)
+                    )
+            except Exception:
+                metrics.LLM_CALLS.inc(mode="sync", outcome="error")
+                raise
+            metrics.LLM_CALLS.inc(mode="sync", outcome="ok")
+            metrics.record_usage(getattr(response, "usage_metadata", None))
+            return response
+
+    async def _call_model_async(self, prompt):
+            try:
+                with metrics.timed("llm"):
+                    response = await self.resilience.call_async(
+                        lambda model_id, timeout: self._generate_async(prompt, model_id, timeout)
+                    )
+            except Exception:
+                metrics.LLM_CALLS.inc(mode="async", outcome="error")
+                raise
+            metrics.LLM_CALLS.inc(mode="async", outcome="ok")
+            metrics.record_usage(getattr(response, "usage_metadata", None))
+            return response
+
+    def _parse_response(self, response):
+            return self._parse_text(response.text)
+
+    def _parse_text(self, text):
+            with metrics.timed("parse"):
+                try:
+                    patch_data = coerce_patch(text)
+                except ValueError:
+                    metrics.PARSE_FAILURES.inc()
+                    raise
+
+            self.logger.debug(f"AI Çıktısı: {json.dumps(patch_data, ensure_ascii=False)}")
+            return patch_data
+
     def process_ai_response(self, user_input, current_data, last_question):
             try:
                 self.logger.info(f"Kullanıcı Mesajı: {user_input}")
                 
                 prompt = self._build_prompt(user_input, current_data, last_question)
                 
-                response = self.client.models.generate_content(
-                    model=self.model_id,
-                    contents=prompt,
-                    config=genai.types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        temperature=0
-                    )
-                )
-                raw_text = response.text.strip().replace("```json", "").replace("```", "")
-                patch_data = json.loads(raw_text)
-                
-                self.logger.debug(f"AI Çıktısı: {json.dumps(patch_data, ensure_ascii=False)}")
-                return patch_data
+                response = self._call_model(prompt)
+                return self._parse_response(response)
+
+            except Exception as e:
+                self.logger.error(f"AI Yanıtı işlenemedi: {e}")
+                return None
+
+    async def process_ai_response_async(self, user_input, current_data, last_question):
+            try:
+                self.logger.info(f"Kullanıcı Mesajı: {user_input}")
+
+                prompt = self._build_prompt(user_input, current_data, last_question)
+
+                response = await self._call_model_async(prompt)
+                return self._parse_response(response)
+
+            except Exception as e:
+                self.logger.error(f"AI Yanıtı işlenemedi: {e}")
+                return None
+
+    async def stream_ai_response(self, user_input, current_data, last_question):
+            # Model ürettikçe ("chunk", toplam karakter), en sonda ("patch", patch) verir
+            patch = None
+            try:
+                self.logger.info(f"Kullanıcı Mesajı (akış): {user_input}")
+
+                prompt = self._build_prompt(user_input, current_data, last_question)
+
+                parts = []
+                received = 0
+                usage = None
+                # Akışta parça gönderildikten sonra tekrar denenemez; sadece model seçimi ve süre sınırı uygulanır
+                model_id = self.resilience.pick_model()
+                start = time.perf_counter()
+                try:
+                    async for chunk in self._generate_stream(prompt, model_id, self.resilience.deadline):
+                        text = chunk.text or ""
+                        parts.append(text)
+                        received += len(text)
+                        # Token sayıları son parçada gelir
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        yield "chunk", received
+                except (GeneratorExit, asyncio.CancelledError) as e:
+                    # İstemci bağlantıyı kesti veya tur iptal edildi: başarı ya da hata sayılmaz
+                    self.resilience.record(model_id, start, e)
+                    metrics.LLM_CALLS.inc(mode="stream", outcome="cancelled")
+                    raise
+                except Exception as e:
+                    self.resilience.record(model_id, start, e)
+                    metrics.LLM_CALLS.inc(mode="stream", outcome="error")
+                    raise
+                finally:
+                    metrics.observe("llm", time.perf_counter() - start)
+                self.resilience.record(model_id, start)
+                metrics.LLM_CALLS.inc(mode="stream", outcome="ok")
+                metrics.record_usage(usage)
+                patch = self._parse_text("".join(parts))
 
             except Exception as e:
                 self.logger.error(f"AI Yanıtı işlenemedi: {e}")
-                return None
\ No newline at end of file
+            yield "patch", patch
@@ -0,0 +1,186 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import NamedTuple
+from services.text_utils import normalize_tr
+from services.spatial_index import haversine, parse_point
+
+_PRIME = (1 << 61) - 1
+
+
+class DuplicateMatch(NamedTuple):
+    project_id: str
+    project_name: str
+    score: float
+    similarity: float
+    distance_m: float | None
+
+
+def shingles(text, size=3):
+    # Türkçe karakterler katlanmış, kısaltmalar açılmış metnin karakter üçlüleri
+    value = normalize_tr(text)
+    if not value:
+        return set()
+    padded = f" {value} "
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def project_text(project):
+    return " ".join(filter(None, [project.get("projectName"), project.get("description")]))
+
+
+class MinHashLSH:
+    # 64 permütasyon, 16 bant x 4 satır: Jaccard ~0.5 üzerindeki çiftler yüksek olasılıkla aynı kovaya düşer
+    def __init__(self, num_perm=64, bands=16, seed=7):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        params = hashlib.blake2b(str(seed).encode(), digest_size=64).digest()
+        self._coeffs = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(params + i.to_bytes(2, "big"), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], "big") % (_PRIME - 1) + 1
+            b = int.from_bytes(digest[8:], "big") % _PRIME
+            self._coeffs.append((a, b))
+        self._buckets = defaultdict(set)
+        self._keys = {}
+
+    def signature(self, items):
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big") for item in items]
+        if not hashes:
+            return None
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._coeffs)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, item_id, signature):
+        self.remove(item_id)
+        keys = self._band_keys(signature)
+        for key in keys:
+            self._buckets[key].add(item_id)
+        self._keys[item_id] = keys
+
+    def remove(self, item_id):
+        for key in self._keys.pop(item_id, []):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def candidates(self, signature):
+        found = set()
+        for key in self._band_keys(signature):
+            found |= self._buckets.get(key, set())
+        return found
+
+
+class DuplicateDetector:
+    def __init__(self, project_store=None, threshold=0.6, radius_m=250):
+        self.project_store = project_store
+        self.threshold = threshold
+        self.radius_m = radius_m
+        self.logger = logging.getLogger(__name__)
+        self.lsh = MinHashLSH()
+        self._docs = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._seq = 0
+        self._refreshed = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        # Diğer işçilerin kaydettiği projeler depodaki seq filigranıyla indekse alınır
+        store = self.project_store
+        if store is None or not force and time.monotonic() - self._refreshed < store.refresh_interval:
+            return
+        with self._refresh_lock:
+            self._refreshed = time.monotonic()
+            while True:
+                rows = store.changes_since(self._seq, limit=500)
+                for seq, project in rows:
+                    self.index(project)
+                    self._seq = seq
+                if len(rows) < 500:
+                    return
+
+    def index(self, project):
+        project_id = project.get("id")
+        items = shingles(project_text(project))
+        if not project_id or not items:
+            return
+        signature = self.lsh.signature(items)
+        location = project.get("location") or {}
+        with self._lock:
+            self.lsh.add(project_id, signature)
+            self._docs[project_id] = (
+                items,
+                normalize_tr(project.get("category")) or None,
+                normalize_tr(location.get("district")) or None,
+                project.get("projectName"),
+            )
+
+    def remove(self, project_id):
+        with self._lock:
+            self.lsh.remove(project_id)
+            self._docs.pop(project_id, None)
+
+    def find(self, project, exclude=()):
+        items = shingles(project_text(project))
+        if not items:
+            return None
+        self.refresh()
+        location = project.get("location") or {}
+        point = parse_point(location.get("startPoint"))
+        category = normalize_tr(project.get("category")) or None
+        district = normalize_tr(location.get("district")) or None
+
+        # Aday kümesi: LSH kovaları + konumu yakın olanlar; tüm projeler taranmaz
+        signature = self.lsh.signature(items)
+        with self._lock:
+            candidates = self.lsh.candidates(signature)
+        spatial = getattr(self.project_store, "spatial", None)
+        if point and spatial is not None:
+            candidates |= {item_id for item_id, _ in spatial.within(*point, self.radius_m)}
+
+        best = None
+        for candidate in candidates:
+            if candidate in exclude or candidate == project.get("id"):
+                continue
+            with self._lock:
+                doc = self._docs.get(candidate)
+            if doc is None:
+                continue
+            other_items, other_category, other_district, other_name = doc
+            if category and other_category and category != other_category:
+                continue
+            if district and other_district and district != other_district:
+                continue
+
+            similarity = jaccard(items, other_items)
+            other_point = spatial.get(candidate) if spatial is not None else None
+            distance = haversine(*point, *other_point) if point and other_point else None
+            if distance is not None:
+                if distance > self.radius_m:
+                    continue
+                score = 0.7 * similarity + 0.3 * (1 - distance / self.radius_m)
+            else:
+                # Koordinat yoksa sadece metin benzerliği; aynı ilçe şartı yukarıda aranır
+                score = similarity
+
+            if score >= self.threshold and (best is None or score > best.score):
+                best = DuplicateMatch(candidate, other_name, round(score, 3), round(similarity, 3),
+                                      round(distance, 1) if distance is not None else None)
+
+        if best:
+            self.logger.info(f"🔁 Olası mükerrer kayıt: {best.project_id} (skor {best.score})")
+        return best
@@ -0,0 +1,282 @@
+import re
+import logging
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import NamedTuple
+from services.text_utils import fold_tr, format_amount, parse_decimal
+
+
+class SlotMatch(NamedTuple):
+    slot: str
+    patch: dict
+    confidence: float
+
+
+# Son sorulan sorudaki anahtar kelime -> doldurulacak alan
+QUESTION_SLOTS = [
+    ("butce", "budget.total"),
+    ("uzunlugu", "scope.length"),
+    ("genisligi", "scope.width"),
+    ("toplam alan", "scope.totalArea"),
+    ("kac gun", "dates.duration"),
+    ("ne zaman baslayacak", "dates.plannedStart"),
+    ("telefon", "team.projectManager.phone"),
+]
+
+UNITS = {
+    "sifir": 0, "bir": 1, "iki": 2, "uc": 3, "dort": 4, "bes": 5, "alti": 6, "yedi": 7,
+    "sekiz": 8, "dokuz": 9, "on": 10, "yirmi": 20, "otuz": 30, "kirk": 40, "elli": 50,
+    "altmis": 60, "yetmis": 70, "seksen": 80, "doksan": 90,
+}
+MAGNITUDES = {"bin": 1_000, "milyon": 1_000_000, "mn": 1_000_000, "milyar": 1_000_000_000}
+
+LENGTH_UNITS = {"km": 1000, "kilometre": 1000, "m": 1, "mt": 1, "metre": 1, "cm": 0.01,
+                "santim": 0.01, "santimetre": 0.01, "mil": 1609.344}
+AREA_UNITS = {"m2": 1, "metrekare": 1, "km2": 1_000_000, "donum": 1000, "hektar": 10_000, "ha": 10_000}
+DURATION_UNITS = {"gun": 1, "hafta": 7, "ay": 30, "yil": 365, "sene": 365}
+CURRENCY = {"tl", "try", "lira", "turk"}
+
+MONTHS = ["ocak", "subat", "mart", "nisan", "mayis", "haziran", "temmuz", "agustos",
+          "eylul", "ekim", "kasim", "aralik"]
+WEEKDAYS = ["pazartesi", "sali", "carsamba", "persembe", "cuma", "cumartesi", "pazar"]
+
+# Cevabın anlamını değiştirmeyen dolgu kelimeler; bunların dışında bir kelime varsa LLM'e bırakılır
+FILLERS = {
+    "olsun", "olacak", "civari", "civarinda", "yaklasik", "tahminen", "kadar", "toplam", "toplamda",
+    "butce", "butcesi", "butcemiz", "uzunluk", "uzunlugu", "genislik", "genisligi", "alan", "alani",
+    "sure", "suresi", "surecek", "surer", "surmesi", "baslasin", "baslayacak", "baslar", "baslangic",
+    "itibaren", "tarihinde", "tarihi", "gibi", "ta", "te", "da", "de", "dir", "tir", "icinde",
+    "proje", "projenin", "is", "isin", "calisma", "en", "az", "fazla", "ayrildi", "ayrilan",
+    "ve", "yani", "tel", "telefon", "numarasi", "numara", "no", "cep", "x", "ile", "lik", "luk",
+    "sonra", "once", "gelecek", "onumuzdeki", "haftaya",
+}
+
+
+class SlotExtractor:
+    def __init__(self, threshold=0.9, today=None):
+        self.threshold = threshold
+        self._today = today
+        self.logger = logging.getLogger(__name__)
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def today(self):
+        return self._today or date.today()
+
+    def extract(self, user_input, last_question):
+        slot = self.slot_for(last_question)
+        match = None
+        if slot:
+            try:
+                match = self._extract(slot, user_input)
+            except (ValueError, OverflowError):
+                match = None
+
+        with self._lock:
+            self._counters["requests"] += 1
+            if slot:
+                self._counters["slot_questions"] += 1
+            if match and match.confidence >= self.threshold:
+                self._counters["hits"] += 1
+                self._counters[f"slot:{match.slot}"] += 1
+
+        if match and match.confidence >= self.threshold:
+            self.logger.info(f"⚡ Yerel çıkarım: {match.slot} = {match.patch}")
+            return match
+        return None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters.get("requests", 0)
+        counters["hit_rate"] = counters.get("hits", 0) / requests if requests else 0.0
+        return counters
+
+    @staticmethod
+    def slot_for(last_question):
+        if not last_question:
+            return None
+        question = fold_tr(last_question)
+        for keyword, slot in QUESTION_SLOTS:
+            if keyword in question:
+                return slot
+        return None
+
+    @staticmethod
+    def _tokens(text):
+        return re.findall(r"\d+(?:[.,]\d+)*|[a-z0-9]+", fold_tr(text).replace("²", "2"))
+
+    @staticmethod
+    def _patch(slot, value):
+        patch = {}
+        node = patch
+        *parents, leaf = slot.split(".")
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+        return patch
+
+    def _extract(self, slot, text):
+        tokens = self._tokens(text)
+        if not tokens:
+            return None
+
+        if slot == "budget.total":
+            amount, rest = self._parse_quantity(tokens, {})
+            if amount is None or amount <= 0 or not self._only_fillers(rest, CURRENCY):
+                return None
+            # Kuruş hassasiyeti korunur: "1,5" -> "1.5", "1,5 milyon" -> "1500000"
+            return SlotMatch(slot, {"budget": {"total": format_amount(amount), "currency": "TRY"}}, 0.95)
+
+        if slot in ("scope.length", "scope.width"):
+            amount, rest = self._parse_quantity(tokens, LENGTH_UNITS)
+            if amount is None or amount <= 0 or not self._only_fillers(rest):
+                return None
+            return SlotMatch(slot, self._patch(slot, self._number(amount)), 0.95)
+
+        if slot == "scope.totalArea":
+            amount, rest = self._parse_quantity(tokens, AREA_UNITS)
+            if amount is None or amount <= 0 or not self._only_fillers(rest, {"metre", "kare"}):
+                return None
+            return SlotMatch(slot, self._patch(slot, self._number(amount)), 0.95)
+
+        if slot == "dates.duration":
+            amount, rest = self._parse_quantity(tokens, DURATION_UNITS)
+            if amount is None or amount <= 0 or not self._only_fillers(rest):
+                return None
+            return SlotMatch(slot, self._patch(slot, str(int(round(amount)))), 0.95)
+
+        if slot == "dates.plannedStart":
+            start = self._parse_date(tokens)
+            if not start:
+                return None
+            return SlotMatch(slot, self._patch(slot, start.strftime("%Y-%m-%d")), 0.95)
+
+        if slot == "team.projectManager.phone":
+            digits = "".join(t for t in tokens if t.isdigit())
+            words = [t for t in tokens if not t.isdigit()]
+            if not 10 <= len(digits) <= 12 or not self._only_fillers(words):
+                return None
+            return SlotMatch(slot, self._patch(slot, digits), 0.95)
+
+        return None
+
+    @staticmethod
+    def _only_fillers(tokens, extra=()):
+        return all(t in FILLERS or t in extra for t in tokens)
+
+    @staticmethod
+    def _number(value):
+        return int(value) if float(value).is_integer() else round(value, 3)
+
+    def _parse_quantity(self, tokens, units):
+        # "üç buçuk milyon", "3,5 milyon TL", "3.2 km", "2 hafta"; birim varsa değer birime çevrilir
+        total = 0.0
+        current = None
+        unit = None
+        seen_number = False
+        rest = []
+
+        for token in tokens:
+            numeric = parse_decimal(token) if token[0].isdigit() else None
+            if numeric is not None:
+                if current is not None:
+                    return None, tokens
+                current = numeric
+                seen_number = True
+            elif token in UNITS:
+                value = UNITS[token]
+                if current is not None and (current % 10 or value >= 10 and current % 100):
+                    return None, tokens
+                current = (current or 0) + value
+                seen_number = True
+            elif token == "yuz":
+                current = (current or 1) * 100
+                seen_number = True
+            elif token in MAGNITUDES:
+                total += (current if current is not None else 1) * MAGNITUDES[token]
+                current = None
+                seen_number = True
+            elif token in ("bucuk", "yarim"):
+                if token == "yarim" and current is None:
+                    current = 0.5
+                elif current is not None:
+                    current += 0.5
+                else:
+                    return None, tokens
+                seen_number = True
+            elif token in units and unit is None:
+                unit = units[token]
+            else:
+                rest.append(token)
+
+        if not seen_number:
+            return None, tokens
+        amount = total + (current or 0)
+
+        # Birimsiz cevap sorunun birimiyle yorumlanır: "(metre)", "(m2)", "kaç gün"
+        return amount * (unit or 1), rest
+
+    def _parse_date(self, tokens):
+        today = self.today()
+        core = [t for t in tokens if t not in FILLERS or t in ("haftaya", "gelecek", "onumuzdeki", "sonra")]
+        text = " ".join(core)
+
+        relative = {"bugun": 0, "yarin": 1, "obur gun": 2, "ertesi gun": 1}
+        if text in relative:
+            return today + timedelta(days=relative[text])
+
+        offset = re.fullmatch(r"(\S+) (gun|hafta|ay) sonra", text)
+        if offset:
+            amount, rest = self._parse_quantity([offset.group(1)], {})
+            if amount and not rest:
+                return today + timedelta(days=int(amount) * DURATION_UNITS[offset.group(2)])
+            return None
+
+        if text in ("haftaya", "gelecek hafta", "onumuzdeki hafta"):
+            return today + timedelta(days=7)
+
+        for index, name in enumerate(WEEKDAYS):
+            if core and core[-1].startswith(name) and (len(core) == 1 or core[:-1] in (["haftaya"], ["gelecek", "hafta"])):
+                ahead = (index - today.weekday()) % 7 or 7
+                if len(core) > 1 and ahead < 7:
+                    ahead += 7
+                return today + timedelta(days=ahead)
+
+        # 2026-03-01, 01.03.2026, 1/3/2026
+        iso = re.fullmatch(r"(\d{4}) (\d{1,2}) (\d{1,2})", text)
+        if iso:
+            return date(int(iso.group(1)), int(iso.group(2)), int(iso.group(3)))
+        dotted = re.fullmatch(r"(\d{1,2})[ .,](\d{1,2})[ .,](\d{4})", text)
+        if dotted:
+            return date(int(dotted.group(3)), int(dotted.group(2)), int(dotted.group(1)))
+
+        # "1 Mayıs", "1 Mayıs 2026", "Mayısın 15'i"
+        month = None
+        numbers = []
+        for token in core:
+            found = next((i for i, m in enumerate(MONTHS, 1) if token.startswith(m)), None)
+            if found and month is None:
+                month = found
+            elif token.isdigit():
+                numbers.append(int(token))
+            elif token not in ("i", "si", "u", "su", "inde", "unda", "inda"):
+                return None
+        if month and numbers and len(numbers) <= 2:
+            day = numbers[0]
+            year = numbers[1] if len(numbers) == 2 and numbers[1] > 999 else None
+            if len(numbers) == 2 and year is None:
+                return None
+            return self._resolve(day, month, year, today)
+        return None
+
+    @staticmethod
+    def _resolve(day, month, year, today):
+        if year:
+            return date(year, month, day)
+        candidate = date(today.year, month, day)
+        # Planlanan başlangıç ileriye dönüktür; geçmişte kalan gün/ay gelecek yıla aittir
+        if candidate < today:
+            candidate = date(today.year + 1, month, day)
+        return candidate
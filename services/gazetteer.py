@@ -0,0 +1,228 @@
+import os
+import csv
+import bisect
+import logging
+import argparse
+import threading
+from collections import Counter, defaultdict
+from typing import NamedTuple
+from services.text_utils import normalize_tr
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "resources", "bursa_gazetteer.tsv")
+
+# Yer türünü belirten kelimeler anahtardan çıkarılır, sorguda geçiyorsa tür tercihi olarak kullanılır
+TYPE_WORDS = {
+    "ilcesi": "ilce", "ilce": "ilce",
+    "mahallesi": "mahalle", "koyu": "mahalle",
+    "caddesi": "cadde", "bulvari": "cadde", "sokak": "cadde",
+}
+KINDS = ("ilce", "mahalle", "cadde")
+
+
+class Place(NamedTuple):
+    key: str
+    kind: str
+    district: str
+    name: str
+    lat: float
+    lon: float
+
+    @property
+    def coords(self):
+        return f"{self.lat}, {self.lon}"
+
+
+def clean_name(text):
+    # "Fethiye Mah." -> ("fethiye", "mahalle")
+    tokens = normalize_tr(text).split()
+    hint = next((TYPE_WORDS[t] for t in reversed(tokens) if t in TYPE_WORDS), None)
+    return " ".join(t for t in tokens if t not in TYPE_WORDS), hint
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b, cutoff=0.0):
+    # Normalize edilmiş Levenshtein benzerliği (1 - mesafe / uzun olanın boyu)
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    budget = int((1 - cutoff) * longest)
+    if abs(len(a) - len(b)) > budget:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > budget:
+            return 0.0
+        previous = current
+    return 1 - previous[-1] / longest
+
+
+class Gazetteer:
+    # Anahtara göre sıralı TSV: key, kind, district, name, lat, lon. Birebir eşleşme ikili arama ile,
+    # yazım hataları karakter üçlüsü adayları + düzenleme mesafesi ile çözülür.
+    def __init__(self, path=DEFAULT_PATH, min_score=0.8, max_candidates=25):
+        self.path = path
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+        self.logger = logging.getLogger(__name__)
+        self._keys = []
+        self._places = []
+        self._trigrams = None
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load(path)
+        else:
+            self.logger.warning(f"⚠️ Yer adı sözlüğü bulunamadı: {path}")
+
+    def __len__(self):
+        return len(self._places)
+
+    def _load(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                key, kind, district, name, lat, lon = line.rstrip("\n").split("\t")
+                self._places.append(Place(key, kind, district, name, float(lat), float(lon)))
+        self._places.sort(key=lambda place: place.key)
+        self._keys = [place.key for place in self._places]
+        self.logger.info(f"🗺️ Yer adı sözlüğü yüklendi: {len(self._places)} kayıt")
+
+    def _index(self):
+        # Üçlü indeksi ilk bulanık sorguda kurulur
+        if self._trigrams is None:
+            with self._lock:
+                if self._trigrams is None:
+                    index = defaultdict(list)
+                    for position, key in enumerate(self._keys):
+                        for gram in trigrams(key):
+                            index[gram].append(position)
+                    self._trigrams = dict(index)
+        return self._trigrams
+
+    def _exact(self, key):
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key, lo=start)
+        return self._places[start:end]
+
+    def _fuzzy(self, key):
+        index = self._index()
+        counts = Counter()
+        for gram in trigrams(key):
+            counts.update(index.get(gram, ()))
+        scored = []
+        for position, _ in counts.most_common(self.max_candidates):
+            place = self._places[position]
+            score = similarity(key, place.key, self.min_score)
+            if score >= self.min_score:
+                scored.append((score, place))
+        return scored
+
+    def match(self, text, kinds=KINDS, district=None, exact=False):
+        key, hint = clean_name(text)
+        if not key:
+            return None
+
+        def allowed(place):
+            return place.kind in kinds and (district is None or place.district == district)
+
+        scored = [(1.0, place) for place in self._exact(key) if allowed(place)]
+        if not scored and not exact:
+            scored = [(score, place) for score, place in self._fuzzy(key) if allowed(place)]
+        if not scored:
+            return None
+        # Eşit skorda sorgudaki tür kelimesine ("mahallesi", "caddesi") uyan kayıt seçilir
+        score, place = max(scored, key=lambda item: (item[0], item[1].kind == hint))
+        return place, score
+
+    def area(self, text, exact=False):
+        # İlçe alanı bazen mahalleyi de içerir: "nilufer fetiye", "Fethiye, Nilüfer"
+        parts = [part for part in str(text or "").replace("/", ",").split(",") if part.strip()]
+        tokens = normalize_tr(" ".join(parts)).split()
+        if not tokens:
+            return None
+
+        whole = self.match(" ".join(tokens), kinds=("ilce",), exact=exact)
+        if whole:
+            return whole[0]
+
+        best = None
+        for split in range(1, len(tokens)):
+            for district_part, rest in (
+                (tokens[:split], tokens[split:]),
+                (tokens[split:], tokens[:split]),
+            ):
+                district = self.match(" ".join(district_part), kinds=("ilce",), exact=exact)
+                if not district:
+                    continue
+                inner = self.match(
+                    " ".join(rest), kinds=("mahalle", "cadde"), district=district[0].district, exact=exact
+                )
+                candidate = inner or district
+                score = district[1] + (inner[1] if inner else 0)
+                if best is None or score > best[1]:
+                    best = (candidate[0], score)
+        if best:
+            return best[0]
+
+        # İlçe yazılmadan doğrudan mahalle verilmiş olabilir
+        found = self.match(" ".join(tokens), kinds=("mahalle",), exact=exact)
+        return found[0] if found else None
+
+
+def build(sources, output):
+    # Kaynaklar: başlıklı CSV (name, kind, district, lat, lon) veya mevcut sözlük TSV'si (birleştirme için)
+    places = {}
+    districts = {}
+    for source in sources:
+        with open(source, encoding="utf-8") as f:
+            if source.endswith(".tsv"):
+                rows = (
+                    dict(zip(("key", "kind", "district", "name", "lat", "lon"), line.rstrip("\n").split("\t")))
+                    for line in f if line.strip() and not line.startswith("#")
+                )
+            else:
+                rows = csv.DictReader(f)
+            for row in rows:
+                kind = row["kind"].strip()
+                if kind not in KINDS:
+                    raise ValueError(f"Geçersiz yer türü: {kind}")
+                key = clean_name(row["name"])[0]
+                district = key if kind == "ilce" else clean_name(row["district"])[0]
+                if kind == "ilce":
+                    districts[key] = row["name"].strip()
+                places[(key, kind, district)] = (
+                    key, kind, district, row["name"].strip(),
+                    f"{float(row['lat']):.5f}", f"{float(row['lon']):.5f}",
+                )
+
+    missing = {place[2] for place in places.values()} - set(districts)
+    if missing:
+        raise ValueError(f"Sözlükte ilçe kaydı olmayanlar: {', '.join(sorted(missing))}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8", newline="\n") as f:
+        f.write("# key\tkind\tdistrict\tname\tlat\tlon\n")
+        for place in sorted(places.values()):
+            f.write("\t".join(place) + "\n")
+    return len(places)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yer adı sözlüğünü (ilçe/mahalle/cadde merkez noktaları) üretir")
+    parser.add_argument("sources", nargs="+", help="CSV (name,kind,district,lat,lon) veya mevcut sözlük TSV'si")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    count = build(args.sources, args.output)
+    print(f"✅ {count} kayıt yazıldı: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
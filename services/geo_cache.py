@@ -0,0 +1,81 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+
+class GeoCache:
+    def __init__(self, path="data/geocache.sqlite3", max_items=4096,
+                 ttl=30 * 24 * 3600, negative_ttl=24 * 3600):
+        self.path = path
+        self.max_items = max_items
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.logger = logging.getLogger(__name__)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS geocache ("
+                    "key TEXT PRIMARY KEY, value TEXT, expires_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Geocode önbelleği açılamadı ({path}): {e}")
+                self._conn = None
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return True, value
+                del self._memory[key]
+
+            if self._conn is None:
+                return False, None
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM geocache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self.logger.error(f"Geocode önbellek okuma hatası: {e}")
+                return False, None
+
+            if row is None or row[1] <= now:
+                return False, None
+            self._remember(key, row[0], row[1])
+            return True, row[0]
+
+    def set(self, key, value):
+        expires_at = time.time() + (self.ttl if value is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Geocode önbellek yazma hatası: {e}")
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
@@ -1,29 +1,122 @@
 from geopy.geocoders import Nominatim
+import asyncio
 import logging
+import threading
+from services import metrics
+from services.geo_cache import GeoCache
+from services.rate_limiter import TokenBucket
+from services.text_utils import normalize_tr
 
 class GeoService:
-    def __init__(self, city="Bursa", country="Türkiye", user_agent="municipal_bot"):
-        self.geolocator = Nominatim(user_agent=user_agent)
+    def __init__(self, city="Bursa", country="Türkiye", user_agent="municipal_bot", geolocator=None,
+                 cache=None, limiter=None, gazetteer=None):
+        self.geolocator = geolocator or Nominatim(user_agent=user_agent)
         self.city = city
         self.country = country
         self.logger = logging.getLogger(__name__)
+        # Şehre ait yerel yer adı sözlüğü; bulunamayan sorgular Nominatim'e gider
+        self.gazetteer = gazetteer
+
+        # Nominatim kullanım politikası: saniyede en fazla 1 istek
+        self.cache = cache or GeoCache(path=None)
+        self.limiter = limiter or TokenBucket(rate=1.0)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def get_local_coordinates(self, district: str, street: str = None) -> str:
+        # Yerel sözlük sadece birebir eşleşen ilçe/mahalle adlarında kullanılır (yaklaşık merkez noktaları);
+        # sokak, cadde ve yazım hatalı adlar Nominatim'e gider
+        if not self.gazetteer:
+            return None
+        found = self.gazetteer.area(district, exact=True)
+        if not found or found.kind not in ("ilce", "mahalle"):
+            return None
+        if street:
+            parts = [part for part in street.split(",") if part.strip()]
+            hits = [
+                self.gazetteer.match(part, kinds=("mahalle",), district=found.district, exact=True)
+                for part in parts
+            ]
+            if not parts or not all(hits):
+                return None
+            found = hits[-1][0]
+        self.logger.debug(f"📍 Konum yerel sözlükten bulundu: {found.name} ({found.district})")
+        metrics.GEOCODES.inc(source="gazetteer")
+        return found.coords
 
     def get_coordinates(self, district: str, street: str = None) -> str:
+        with metrics.timed("geocode"):
+            return self._resolve(district, street)
+
+    def _resolve(self, district, street):
+        coords = self.get_local_coordinates(district, street)
+        if coords:
+            return coords
+
+        # Yazım hatalı ilçe adı, Nominatim sorgusunda sözlükteki doğru adla değiştirilir
+        area = self.gazetteer.area(district) if self.gazetteer else None
+        district_name = self._district_name(area) or district
+
         queries = []
         if street and district:
-            queries.append(f"{street}, {district}, {self.city}, {self.country}")
-        
-        if district:
+            queries.append(f"{street}, {district_name}, {self.city}, {self.country}")
+
+        if district and not area:
             queries.append(f"{district}, {self.city}, {self.country}")
 
         for query in queries:
             try:
-                location = self.geolocator.geocode(query, timeout=5)
-                if location:
+                coords = self._lookup(query)
+                if coords:
                     self.logger.info(f"📍 Konum bulundu: {query}")
-                    return f"{location.latitude}, {location.longitude}"
+                    metrics.GEOCODES.inc(source="nominatim")
+                    return coords
             except Exception as e:
                 self.logger.error(f"❌ Harita sorgu hatası ({query}): {e}")
-        
+
+        if area:
+            # Sokak bulunamadıysa mahalle/ilçe merkez noktası kullanılır
+            metrics.GEOCODES.inc(source="centroid")
+            return area.coords
+
         self.logger.warning(f"⚠️ Konum belirlenemedi: {district} / {street}")
-        return None
\ No newline at end of file
+        metrics.GEOCODES.inc(source="miss")
+        return None
+
+    def _district_name(self, area):
+        if not area:
+            return None
+        district = self.gazetteer.match(area.district, kinds=("ilce",))
+        return district[0].name if district else None
+
+    def _lookup(self, query):
+        key = normalize_tr(query)
+        hit, coords = self.cache.get(key)
+        if hit:
+            return coords
+
+        # Aynı sorgu için eşzamanlı çağrılar tek bir Nominatim isteğinde birleştirilir
+        with self._inflight_lock:
+            done = self._inflight.get(key)
+            leader = done is None
+            if leader:
+                done = self._inflight[key] = threading.Event()
+
+        if not leader:
+            done.wait(timeout=30)
+            return self.cache.get(key)[1]
+
+        try:
+            self.limiter.acquire()
+            location = self.geolocator.geocode(query, timeout=5)
+            coords = f"{location.latitude}, {location.longitude}" if location else None
+            self.cache.set(key, coords)
+            return coords
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    async def get_coordinates_async(self, district: str, street: str = None) -> str:
+        # geopy senkron çalışıyor; event loop'u bloklamamak için thread'e alınır
+        return await asyncio.to_thread(self.get_coordinates, district, street)
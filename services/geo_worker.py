@@ -0,0 +1,36 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class GeoWorker:
+    def __init__(self, geo_service, max_workers=4):
+        self.geo_service = geo_service
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocode")
+        self.logger = logging.getLogger(__name__)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, district, street, callback, geo_service=None):
+        with self._lock:
+            self._pending += 1
+        return self.executor.submit(self._run, geo_service or self.geo_service, district, street, callback)
+
+    def _run(self, geo_service, district, street, callback):
+        coords = None
+        try:
+            coords = geo_service.get_coordinates(district=district, street=street)
+        except Exception as e:
+            self.logger.error(f"❌ Arka plan konum hatası ({district} / {street}): {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        try:
+            callback(coords)
+        except Exception as e:
+            self.logger.error(f"❌ Konum sonucu işlenemedi ({district} / {street}): {e}")
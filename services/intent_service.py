@@ -0,0 +1,192 @@
+import re
+import logging
+import threading
+from collections import Counter
+from typing import NamedTuple
+from services.text_utils import normalize_tr
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    patch: dict
+    confidence: float
+
+
+# intent -> (tam eşleşen ifadeler, patch)
+COMMANDS = {
+    "UNDO": (
+        ["geri al", "geri", "undo", "vazgectim", "son islemi geri al", "geri alir misin"],
+        {"_steps": 1},
+    ),
+    "REDO": (
+        ["ileri al", "yinele", "redo", "tekrar uygula", "geri almayi geri al"],
+        {"_steps": 1},
+    ),
+    "SHOW_SUMMARY": (
+        ["ozet", "ozet gec", "ozet ver", "ozeti goster", "tablo", "tablo goster", "tablo ver",
+         "tabloyu goster", "durum", "durum nedir", "durum ne", "hepsini goster", "rapor",
+         "rapor ver", "raporu goster"],
+        {"_system_status": "SHOW_SUMMARY"},
+    ),
+    "FINISHED": (
+        ["onayliyorum", "onayla", "onaylandi", "kaydet", "tamamdir", "tamam kaydet",
+         "evet onayliyorum", "evet kaydet"],
+        {"_system_status": "FINISHED"},
+    ),
+    "RESET_ALL": (
+        ["her seyi sil", "hersey sil", "tum tabloyu temizle", "bastan basla", "verileri sifirla",
+         "reset at", "reset", "sifirla", "hepsini sil"],
+        {"_system_status": "RESET_ALL"},
+    ),
+}
+
+# Sadece son soru onay sorusuyken kesin anlam taşıyan kısa cevaplar
+CONFIRMATIONS = {"evet", "evet onayliyorum", "onayliyorum", "evet kaydet", "tamam"}
+
+# Sadece ödeme yapma isteği bildiren kalıplar; "ödenek", "ödendi", "ödemesi" bütçe verisidir
+PAYMENT_VERBS = re.compile(
+    r"\b(ode(mek|yecegim|yecegiz|yebilir\w*|rim|riz|r miyim|meyi|memi|me yap\w*)?"
+    r"|nasil ode\w*|yatir(mak|acagim|irim|abilir\w*)|borcum\w*)\b"
+)
+# Tutar içeren mesajlar (bütçe, harcama) ödeme yönlendirmesi sayılmaz
+AMOUNT_WORDS = {"bin", "milyon", "milyar", "tl", "lira", "kurus"}
+PAYMENT_TOPICS = [
+    ("EMLAK", re.compile(r"\bemlak\b")),
+    ("SU", re.compile(r"\bsu (fatura\w*|borc\w*)|\bbuski\b")),
+    ("CEVRE", re.compile(r"\bcevre (temizlik )?vergi\w*")),
+    ("ILAN_REKLAM", re.compile(r"\bilan\w* (ve )?reklam\w*")),
+    ("GENEL", re.compile(r"\b(vergi\w*|harc(i|im|imi|imizi|lar|lari|larimi)?|ceza\w*|fatura\w*|borc\w*)\b")),
+]
+
+# "2 adım geri al", "geri al 3", "üç kez yinele"
+STEP_WORDS = {"bir": 1, "iki": 2, "uc": 3, "dort": 4, "bes": 5, "alti": 6, "yedi": 7, "sekiz": 8, "dokuz": 9, "on": 10}
+HISTORY_STEPS = re.compile(
+    r"^(?:(?:son )?(?P<before>\d+|\w+) (?:adim|islem|kez|kere) )?"
+    r"(?P<command>geri al|ileri al|yinele)"
+    r"(?: (?P<after>\d+) ?(?:adim|islem|kez|kere)?)?$"
+)
+
+# Geri dönüşü olmayan komutlar sadece tam ifadeyle çalışır; "bütçedeki her şeyi sil" tek alanı kasteder
+EXACT_ONLY = {"RESET_ALL", "FINISHED"}
+
+# Evet/Hayır sorularına (ör. mükerrer kayıt önerisi) verilen kısa cevaplar
+YES = {"evet", "e", "olur", "tamam", "ekle", "evet ekle", "bagla", "evet bagla", "ayni", "ayni proje"}
+NO = {"hayir", "h", "yok", "gerek yok", "ekleme", "hayir ekleme", "yeni", "yeni kayit", "hayir yeni kayit", "farkli"}
+
+NEGATIONS = re.compile(r"\b(istemiyorum|degil|hayir|yapma|etme|dur|bekle)\b")
+POLITE = {"lutfen", "misin", "mi", "artik", "simdi", "hadi"}
+
+
+class IntentService:
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.logger = logging.getLogger(__name__)
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def classify(self, user_input, last_question=None):
+        text = normalize_tr(user_input)
+        match = self._match(text, last_question)
+
+        with self._lock:
+            self._counters["requests"] += 1
+            if match and match.confidence >= self.threshold:
+                self._counters["hits"] += 1
+                self._counters[f"intent:{match.intent}"] += 1
+            elif match:
+                self._counters["ambiguous"] += 1
+
+        if match and match.confidence >= self.threshold:
+            self.logger.info(f"⚡ Yerel niyet: {match.intent} ({match.confidence:.2f})")
+            return match
+        return None
+
+    @staticmethod
+    def yes_no(user_input):
+        core = " ".join(t for t in normalize_tr(user_input).split() if t not in POLITE)
+        if core in YES:
+            return True
+        if core in NO:
+            return False
+        return None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters.get("requests", 0)
+        counters["hit_rate"] = counters.get("hits", 0) / requests if requests else 0.0
+        return counters
+
+    def _match(self, text, last_question):
+        if not text or NEGATIONS.search(text):
+            return None
+
+        tokens = [t for t in text.split() if t not in POLITE]
+        core = " ".join(tokens)
+
+        if last_question and last_question.startswith("✅") and core in CONFIRMATIONS:
+            return IntentMatch("FINISHED", dict(COMMANDS["FINISHED"][1]), 0.95)
+
+        history = self._match_history(core)
+        if history:
+            return history
+
+        best = None
+        for intent, (phrases, patch) in COMMANDS.items():
+            for phrase in phrases:
+                confidence = self._phrase_confidence(core, tokens, phrase, intent in EXACT_ONLY)
+                if confidence and (best is None or confidence > best.confidence):
+                    best = IntentMatch(intent, dict(patch) if patch else None, confidence)
+
+        payment = self._match_payment(text, tokens, last_question)
+        if payment and (best is None or payment.confidence > best.confidence):
+            best = payment
+        return best
+
+    @staticmethod
+    def _match_history(core):
+        match = HISTORY_STEPS.match(core)
+        if not match or not (match.group("before") or match.group("after")):
+            return None
+        count = match.group("before") or match.group("after")
+        steps = int(count) if count.isdigit() else STEP_WORDS.get(count)
+        if not steps:
+            return None
+        intent = "UNDO" if match.group("command") == "geri al" else "REDO"
+        return IntentMatch(intent, {"_steps": steps}, 1.0)
+
+    @staticmethod
+    def _phrase_confidence(core, tokens, phrase, exact=False):
+        if core == phrase:
+            return 1.0
+        if exact:
+            # Cümle içinde geçen yıkıcı komut eşiğin altında kalır -> LLM'e bırak
+            return 0.5 if re.search(rf"\b{re.escape(phrase)}\b", core) else 0.0
+        # Tek kelimelik komutlar ("geri", "durum") cümle içinde başka anlam taşır
+        if " " not in phrase or not re.search(rf"\b{re.escape(phrase)}\b", core):
+            return 0.0
+        # İfadenin dışında kalan kelimeler ve sayılar veri içerebilir -> LLM'e bırak
+        extra = len(tokens) - len(phrase.split())
+        if any(t.isdigit() for t in tokens):
+            return 0.3
+        if extra <= 2:
+            return 0.85
+        return 0.5
+
+    @staticmethod
+    def _match_payment(text, tokens, last_question=None):
+        if re.search(r"\b(butce|odenek)\w*", text) or "butce" in normalize_tr(last_question):
+            return None
+        if any(t.isdigit() or t in AMOUNT_WORDS for t in tokens):
+            return None
+        for category, pattern in PAYMENT_TOPICS:
+            if pattern.search(text):
+                confidence = 0.9 if PAYMENT_VERBS.search(text) else 0.6
+                if len(tokens) > 8:
+                    confidence = 0.5
+                return IntentMatch(
+                    "PAYMENT_REDIRECT",
+                    {"_system_status": "PAYMENT_REDIRECT", "_payment_category": category},
+                    confidence,
+                )
+        return None
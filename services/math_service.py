@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime, timedelta
+from services.text_utils import format_amount, parse_decimal
 
 class CalculateService:
     def __init__(self, date_format="%Y-%m-%d"):
@@ -10,10 +11,9 @@ class CalculateService:
     def _clean_numeric(value):
         if value is None or str(value).strip() == "" or str(value).lower() == "none":
             return None
-        try:
-            return float(str(value).replace(".", "").replace(",", ""))
-        except (ValueError, TypeError):
-            return None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return parse_decimal(value)
 
     def calculate_area(self, length, width):
         l = self._clean_numeric(length)
@@ -32,9 +32,9 @@ class CalculateService:
 
         if all(v is not None for v in [t, u, r]):
             return {
-                "total": str(int(t)),
-                "used": str(int(u)),
-                "remaining": str(int(r))
+                "total": format_amount(t),
+                "used": format_amount(u),
+                "remaining": format_amount(r)
             }
         return {}
 
@@ -0,0 +1,221 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Saniye cinsinden; LLM çağrıları için üst kovalar geniş tutulur
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Tahmini token sayıları için
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400, 12800)
+
+# İstek başına aşama süreleri (Server-Timing başlığı için); to_thread çağrıları bağlamı kopyaladığından
+# thread içindeki ölçümler de aynı sözlüğe yazılır
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} etiketleri: {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [kova sayaçları..., +Inf], toplam
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _render_value(self, key, value):
+        counts, total = value[0][:], value[1]
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector):
+        # Anlık değerler (ör. bellekteki oturum sayısı) çıktı üretilmeden hemen önce okunur
+        self._collectors.append(collector)
+
+    def render(self):
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "chatbot_stage_duration_seconds", "Tur aşamalarının süresi (llm, parse, geocode, derive, persist, turn)", ("stage",)
+)
+TOKENS = registry.counter("chatbot_llm_tokens_total", "Gemini token kullanımı", ("kind",))
+PROMPT_STATE_TOKENS = registry.histogram(
+    "chatbot_prompt_state_tokens", "Prompttaki proje durumunun tahmini token sayısı (compact: gönderilen, legacy: eski tam JSON)",
+    ("format",), buckets=TOKEN_BUCKETS,
+)
+LLM_CALLS = registry.counter("chatbot_llm_calls_total", "Gemini çağrıları", ("mode", "outcome"))
+PARSE_FAILURES = registry.counter("chatbot_llm_parse_failures_total", "JSON'a çevrilemeyen model çıktıları")
+PATCH_REPAIRS = registry.counter(
+    "chatbot_llm_patch_repairs_total", "Şemaya uymayıp yerelde onarılan model çıktıları", ("kind",)
+)
+ROUTES = registry.counter("chatbot_turn_routes_total", "Turların yönlendirildiği yol (yerel niyet/slot veya llm)", ("route",))
+STATUSES = registry.counter("chatbot_turn_status_total", "Uygulanan patch'lerin _system_status değerleri", ("status",))
+GEOCODES = registry.counter("chatbot_geocode_total", "Konum sorgularının çözüldüğü kaynak", ("source",))
+LLM_ATTEMPTS = registry.counter(
+    "chatbot_llm_attempts_total", "Tek tek Gemini denemeleri (yeniden deneme ve paralel istekler dahil)", ("model", "outcome")
+)
+LLM_ATTEMPT_SECONDS = registry.histogram("chatbot_llm_attempt_duration_seconds", "Gemini deneme süreleri", ("model",))
+LLM_HEDGES = registry.counter("chatbot_llm_hedges_total", "Yavaş isteğe paralel gönderilen ikinci istekler", ("outcome",))
+LLM_CIRCUIT = registry.gauge("chatbot_llm_circuit_state", "Devre kesici durumu (0 kapalı, 1 açık, 2 yarı açık)", ("model",))
+
+
+def observe(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def record_usage(usage):
+    # response.usage_metadata; alanlar modele göre boş gelebilir
+    if usage is None:
+        return
+    for kind, field in (
+        ("prompt", "prompt_token_count"),
+        ("output", "candidates_token_count"),
+        ("cached", "cached_content_token_count"),
+        ("thoughts", "thoughts_token_count"),
+    ):
+        value = getattr(usage, field, None)
+        if value:
+            TOKENS.inc(value, kind=kind)
+
+
+def start_request():
+    timings = {}
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def server_timing(timings):
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def render():
+    return registry.render()
@@ -0,0 +1,292 @@
+import re
+import json
+from typing import Annotated, Literal, Optional
+from pydantic import BeforeValidator, ConfigDict, Field, ValidationError, create_model
+import google.genai as genai
+from services import metrics
+from src.models import create_blank_structure
+
+# Sistemin kendisinin doldurduğu alanlar modelden istenmez
+SYSTEM_FIELDS = ("id", "projectCode", "lastUpdate", "detail")
+# Kurallarda geçen ama boş yapıda bulunmayan alanlar
+EXTRA_FIELDS = {"location": ("endPoint", "city"), "scope": ("totalArea",)}
+# Nesne yerine düz değer gelirse yazılacağı alan (Örn: "budget": "1000")
+SCALAR_TARGETS = {"budget": "total"}
+
+STATUSES = ("FINISHED", "CANCELLED", "IRRELEVANT", "ANSWER", "SHOW_SUMMARY", "PAYMENT_REDIRECT", "RESET_ALL")
+PAYMENT_CATEGORIES = ("EMLAK", "SU", "CEVRE", "ILAN_REKLAM", "GENEL")
+CONTROL_FIELDS = ("_system_status", "_response_message", "_payment_category")
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S | re.I)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def patch_template():
+    project = create_blank_structure()["projects"][0]
+    template = {key: value for key, value in project.items() if key not in SYSTEM_FIELDS}
+    for section, names in EXTRA_FIELDS.items():
+        for name in names:
+            template[section].setdefault(name, None)
+    return template
+
+
+TEMPLATE = patch_template()
+
+
+def _to_text(value):
+    if isinstance(value, bool):
+        raise ValueError("Mantıksal değer metin alanına yazılamaz")
+    if isinstance(value, (int, float)):
+        return str(int(value)) if float(value).is_integer() else str(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _to_list(value):
+    # "Ekip A, Ekip B" -> ["Ekip A", "Ekip B"]; liste dışı tekil değerler listeye alınır
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    if not isinstance(value, list):
+        value = [value]
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("name")
+        if isinstance(item, (str, int, float)) and not isinstance(item, bool):
+            item = _to_text(item)
+            if item:
+                items.append(item)
+    return items
+
+
+def _to_enum(value):
+    if isinstance(value, str):
+        return value.strip().upper().replace(" ", "_").replace("-", "_")
+    return value
+
+
+Text = Annotated[Optional[str], BeforeValidator(_to_text)]
+TextList = Annotated[Optional[list[str]], BeforeValidator(_to_list)]
+Status = Annotated[Optional[Literal[STATUSES]], BeforeValidator(_to_enum)]
+PaymentCategory = Annotated[Optional[Literal[PAYMENT_CATEGORIES]], BeforeValidator(_to_enum)]
+
+
+def _model_for(name, template, extra_fields=None):
+    fields = {}
+    for key, value in template.items():
+        if isinstance(value, dict):
+            annotation = Optional[_model_for(f"{name}_{key}", value)]
+        elif isinstance(value, list):
+            annotation = TextList
+        else:
+            annotation = Text
+        fields[key] = (annotation, None)
+    fields.update(extra_fields or {})
+    return create_model(name, __config__=ConfigDict(extra="ignore"), **fields)
+
+
+# Alt çizgili alanlar pydantic'te özel sayıldığından takma adla tanımlanır
+PatchModel = _model_for("Patch", TEMPLATE, {
+    "system_status": (Status, Field(None, alias="_system_status")),
+    "response_message": (Text, Field(None, alias="_response_message")),
+    "payment_category": (PaymentCategory, Field(None, alias="_payment_category")),
+})
+
+
+def _schema_for(value):
+    Type = genai.types.Type
+    if isinstance(value, dict):
+        return genai.types.Schema(
+            type=Type.OBJECT, properties={key: _schema_for(item) for key, item in value.items()}
+        )
+    if isinstance(value, list):
+        return genai.types.Schema(type=Type.ARRAY, nullable=True, items=genai.types.Schema(type=Type.STRING))
+    return genai.types.Schema(type=Type.STRING, nullable=True)
+
+
+def build_response_schema():
+    # Tüm alanlar isteğe bağlı: model sadece değişen alanları döndürür, silme için null kullanır
+    schema = _schema_for(TEMPLATE)
+    Type = genai.types.Type
+    schema.properties.update({
+        "_system_status": genai.types.Schema(type=Type.STRING, format="enum", enum=list(STATUSES)),
+        "_response_message": genai.types.Schema(type=Type.STRING),
+        "_payment_category": genai.types.Schema(type=Type.STRING, format="enum", enum=list(PAYMENT_CATEGORIES)),
+    })
+    return schema
+
+
+def _repaired(kind):
+    metrics.PATCH_REPAIRS.inc(kind=kind)
+
+
+def _loads(text):
+    raw = (text or "").strip()
+    fenced = _FENCE.search(raw)
+    if fenced:
+        _repaired("fence")
+        raw = fenced.group(1)
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+
+    # Açıklama metni içine gömülmüş JSON: ilk açılan parantezden son kapanana kadar
+    starts = [i for i in (raw.find("{"), raw.find("[")) if i >= 0]
+    end = max(raw.rfind("}"), raw.rfind("]"))
+    if not starts or end < min(starts):
+        raise ValueError("Model çıktısında JSON bulunamadı")
+    candidate = raw[min(starts):end + 1]
+    try:
+        value = json.loads(candidate)
+        _repaired("extract")
+        return value
+    except ValueError:
+        value = json.loads(_TRAILING_COMMA.sub(r"\1", candidate))
+        _repaired("trailing_comma")
+        return value
+
+
+def _set_path(target, parts, value):
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+    target[parts[-1]] = value
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def _is_operation(item):
+    return isinstance(item, dict) and "op" in item and "path" in item
+
+
+def _from_operations(operations):
+    # JSON Patch (RFC 6902) listesi -> iç içe sözlük; "/projects/0" öneki ve liste indisleri atılır
+    patch = {}
+    for operation in operations:
+        parts = [part for part in str(operation["path"]).split("/") if part]
+        if parts[:1] == ["projects"]:
+            parts = parts[2:] if len(parts) > 1 and parts[1].isdigit() else parts[1:]
+        while parts and (parts[-1].isdigit() or parts[-1] == "-"):
+            parts.pop()
+        if not parts:
+            continue
+        value = None if operation.get("op") == "remove" else operation.get("value")
+        _set_path(patch, parts, value)
+    return patch
+
+
+def _nulls(template):
+    # Bölüm komple silinirken sadece kullanıcı alanları boşaltılır; varsayılanı olanlar (used, currency) korunur
+    cleared = {}
+    for key, value in template.items():
+        if isinstance(value, dict):
+            cleared[key] = _nulls(value)
+        elif isinstance(value, list):
+            cleared[key] = []
+        elif value is None:
+            cleared[key] = None
+    return cleared
+
+
+def _reshape(data):
+    if isinstance(data, list):
+        if data and all(_is_operation(item) for item in data):
+            _repaired("json_patch")
+            data = _from_operations(data)
+        elif any(isinstance(item, dict) for item in data):
+            _repaired("list_merge")
+            merged = {}
+            for item in data:
+                if _is_operation(item):
+                    item = _from_operations([item])
+                if isinstance(item, dict):
+                    _merge(merged, item)
+            data = merged
+    elif _is_operation(data):
+        _repaired("json_patch")
+        data = _from_operations([data])
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Model çıktısı JSON nesnesi değil: {type(data).__name__}")
+
+    projects = data.get("projects")
+    if isinstance(projects, list) and projects and isinstance(projects[0], dict):
+        _repaired("unwrap")
+        data = _merge(projects[0], {k: v for k, v in data.items() if k in CONTROL_FIELDS})
+
+    patch = {}
+    for key, value in data.items():
+        if "." in key and not key.startswith("_"):
+            _repaired("dotted_key")
+            parts = key.split(".")
+            if parts[0] == "projects" and len(parts) > 2 and parts[1].isdigit():
+                parts = parts[2:]
+            _merge(patch, _from_path(parts, value))
+        elif isinstance(patch.get(key), dict) and isinstance(value, dict):
+            _merge(patch[key], value)
+        else:
+            patch[key] = value
+
+    for key, section in TEMPLATE.items():
+        if not isinstance(section, dict) or key not in patch or isinstance(patch[key], dict):
+            continue
+        if patch[key] is None:
+            _repaired("null_section")
+            patch[key] = _nulls(section)
+        elif key in SCALAR_TARGETS:
+            _repaired("scalar_section")
+            patch[key] = {SCALAR_TARGETS[key]: patch[key]}
+    return patch
+
+
+def _from_path(parts, value):
+    nested = {}
+    _set_path(nested, parts, value)
+    return nested
+
+
+def _drop(data, location):
+    # Doğrulanamayan alan patch'ten çıkarılır; liste elemanı hatasında alanın tamamı atılır
+    path = []
+    for part in location:
+        if isinstance(part, int):
+            break
+        path.append(part)
+    target = data
+    for part in path[:-1]:
+        target = target.get(part) if isinstance(target, dict) else None
+    if isinstance(target, dict) and path:
+        target.pop(path[-1], None)
+
+
+def coerce_patch(text):
+    # Model metni -> doğrulanmış patch sözlüğü; düzeltilebilen hatalar yeniden sormadan yerelde onarılır
+    data = _reshape(_loads(text))
+    for _ in range(3):
+        try:
+            model = PatchModel.model_validate(data)
+            break
+        except ValidationError as e:
+            for error in e.errors():
+                _repaired("invalid_field")
+                _drop(data, error["loc"])
+    else:
+        raise ValueError("Model çıktısı şemaya uydurulamadı")
+    # Sadece modelin gönderdiği alanlar; açıkça null verilenler (silme) korunur
+    patch = model.model_dump(by_alias=True, exclude_unset=True)
+    for key in CONTROL_FIELDS:
+        if key in patch and patch[key] is None:
+            del patch[key]
+    return patch
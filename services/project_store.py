@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from services.text_utils import fold_tr, parse_decimal
+from services.spatial_index import GridIndex, parse_point
+
+# Sorgu parametresi -> (sütun, karşılaştırma); metin alanları fold_tr ile büyük/küçük harf ve Türkçe karakterden bağımsız
+FILTERS = {
+    "district": ("district_key", "="),
+    "category": ("category_key", "="),
+    "projectType": ("project_type_key", "="),
+    "priority": ("priority_key", "="),
+    "start_from": ("planned_start", ">="),
+    "start_to": ("planned_start", "<="),
+    "end_from": ("planned_end", ">="),
+    "end_to": ("planned_end", "<="),
+    "budget_min": ("budget_total", ">="),
+    "budget_max": ("budget_total", "<="),
+}
+TEXT_FILTERS = {"district", "category", "projectType", "priority"}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS projects ("
+    "id TEXT PRIMARY KEY, project_code TEXT, name TEXT, source TEXT, "
+    "district_key TEXT, category_key TEXT, project_type_key TEXT, priority_key TEXT, "
+    "planned_start TEXT, planned_end TEXT, budget_total REAL, lat REAL, lon REAL, "
+    "data TEXT NOT NULL, committed_at REAL NOT NULL, seq INTEGER)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_district ON projects (district_key, committed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_category ON projects (category_key, committed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_type ON projects (project_type_key, committed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_priority ON projects (priority_key, committed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_district_category ON projects (district_key, category_key, priority_key, committed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_start ON projects (planned_start)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_end ON projects (planned_end)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_budget ON projects (budget_total)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_committed ON projects (committed_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_seq ON projects (seq)",
+]
+
+
+def _key(value):
+    return fold_tr(str(value)).strip() if value not in (None, "") else None
+
+
+def encode_cursor(committed_at, project_id):
+    raw = json.dumps([committed_at, project_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        committed_at, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(committed_at), str(project_id)
+    except (ValueError, TypeError):
+        raise ValueError("Geçersiz cursor")
+
+
+class ProjectStore:
+    # path=None: bellekte geçici depo (toplu iş, benchmark); diske hiçbir şey yazılmaz
+    def __init__(self, path="data/projects.sqlite3", refresh_interval=1.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA[0])
+        if "seq" not in {row[1] for row in self._conn.execute("PRAGMA table_info(projects)")}:
+            # Eski depo: değişiklik sırası sütunu eklenir, mevcut kayıtlar rowid ile numaralanır
+            self._conn.execute("ALTER TABLE projects ADD COLUMN seq INTEGER")
+            self._conn.execute("UPDATE projects SET seq = rowid")
+        for statement in SCHEMA[1:]:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+        # Başlangıç koordinatları bellekte ızgara indeksinde tutulur. Her yazım artan bir seq alır;
+        # diğer işçilerin/replikaların yazdıkları sorgudan önce bu filigranla (seq > son görülen) okunur.
+        self.spatial = GridIndex()
+        self._seq = 0
+        self._refreshed = 0.0
+        self.refresh(force=True)
+
+    def upsert(self, project, source=None):
+        if not project.get("id"):
+            raise ValueError("Proje kimliği (id) yok")
+
+        location = project.get("location") or {}
+        dates = project.get("dates") or {}
+        budget = project.get("budget") or {}
+        point = parse_point(location.get("startPoint"))
+        total = budget.get("total")
+        row = (
+            project["id"], project.get("projectCode"), project.get("projectName"), source,
+            _key(location.get("district")), _key(project.get("category")),
+            _key(project.get("projectType")), _key(project.get("priority")),
+            dates.get("plannedStart"), dates.get("plannedEnd"),
+            parse_decimal(total) if total not in (None, "") else None,
+            point[0] if point else None, point[1] if point else None,
+            json.dumps(project, ensure_ascii=False), time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO projects (id, project_code, name, source, district_key, category_key, "
+                "project_type_key, priority_key, planned_start, planned_end, budget_total, lat, lon, data, "
+                "committed_at, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                "(SELECT COALESCE(MAX(seq), 0) + 1 FROM projects)) "
+                "ON CONFLICT(id) DO UPDATE SET project_code = excluded.project_code, name = excluded.name, "
+                "source = COALESCE(excluded.source, projects.source), district_key = excluded.district_key, "
+                "category_key = excluded.category_key, project_type_key = excluded.project_type_key, "
+                "priority_key = excluded.priority_key, planned_start = excluded.planned_start, "
+                "planned_end = excluded.planned_end, budget_total = excluded.budget_total, lat = excluded.lat, "
+                "lon = excluded.lon, data = excluded.data, committed_at = excluded.committed_at, seq = excluded.seq",
+                row,
+            )
+            self._conn.commit()
+            if point:
+                self.spatial.upsert(project["id"], *point)
+            else:
+                self.spatial.remove(project["id"])
+        self.logger.info(f"🗂️ Proje kaydedildi: {project['id']}")
+
+    def changes_since(self, seq, limit=500):
+        # seq sırasıyla (seq, proje) çiftleri; indeksler kendi filigranlarından devam eder
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM projects WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def refresh(self, force=False):
+        # Bellekteki depoya başka süreç yazamaz; disk deposu en fazla refresh_interval saniyede bir okunur
+        if not force and (not self.path or time.monotonic() - self._refreshed < self.refresh_interval):
+            return
+        with self._refresh_lock:
+            self._refreshed = time.monotonic()
+            while True:
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT seq, id, lat, lon FROM projects WHERE seq > ? ORDER BY seq LIMIT 1000", (self._seq,)
+                    ).fetchall()
+                    for seq, project_id, lat, lon in rows:
+                        if lat is not None and lon is not None:
+                            self.spatial.upsert(project_id, lat, lon)
+                        else:
+                            self.spatial.remove(project_id)
+                        self._seq = seq
+                if len(rows) < 1000:
+                    return
+
+    def point(self, project_id):
+        self.refresh()
+        return self.spatial.get(project_id)
+
+    def append_report(self, project_id, report):
+        # Mükerrer bildirim tek UPDATE ile eklenir: eşzamanlı eklemeler birbirini ezmez, committed_at değişmez
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE projects SET data = json_set(data, '$.reports', "
+                "json(json_insert(COALESCE(json_extract(data, '$.reports'), '[]'), '$[#]', json(?)))) "
+                "WHERE id = ?",
+                (json.dumps(report, ensure_ascii=False), project_id),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, project_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, project_id):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            self._conn.commit()
+            self.spatial.remove(project_id)
+        return cursor.rowcount == 1
+
+    def iter_projects(self, batch_size=500):
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM projects WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield json.loads(row[1])
+            last_id = rows[-1][0]
+
+    def get_many(self, project_ids):
+        if not project_ids:
+            return []
+        placeholders = ",".join("?" * len(project_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM projects WHERE id IN ({placeholders})", list(project_ids)
+            ).fetchall()
+        found = {row[0]: json.loads(row[1]) for row in rows}
+        return [found[project_id] for project_id in project_ids if project_id in found]
+
+    def nearby(self, lat, lon, radius_m=None, limit=50, exclude=None):
+        # radius_m verilmezse en yakın `limit` proje
+        self.refresh()
+        if radius_m is None:
+            hits = self.spatial.nearest(lat, lon, k=limit, exclude=exclude)
+        else:
+            hits = self.spatial.within(lat, lon, radius_m, limit=limit, exclude=exclude)
+        projects = {p["id"]: p for p in self.get_many([project_id for project_id, _ in hits])}
+        return [
+            {"distance_m": round(distance, 1), "project": projects[project_id]}
+            for project_id, distance in hits if project_id in projects
+        ]
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon, limit=500):
+        self.refresh()
+        return self.get_many(self.spatial.bbox(min_lat, min_lon, max_lat, max_lon, limit=limit))
+
+    @staticmethod
+    def _conditions(filters):
+        clauses, params = [], []
+        for name, value in (filters or {}).items():
+            if value in (None, "") or name not in FILTERS:
+                continue
+            column, op = FILTERS[name]
+            clauses.append(f"{column} {op} ?")
+            params.append(_key(value) if name in TEXT_FILTERS else value)
+        return clauses, params
+
+    def query(self, filters=None, limit=50, cursor=None):
+        # En yeni kayıtlar önce; sayfalama (committed_at, id) üzerinden anahtar kümesiyle yapılır
+        clauses, params = self._conditions(filters)
+        if cursor:
+            committed_at, project_id = decode_cursor(cursor)
+            clauses.append("(committed_at < ? OR (committed_at = ? AND id < ?))")
+            params.extend([committed_at, committed_at, project_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT data, committed_at, id FROM projects {where} ORDER BY committed_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [json.loads(row[0]) for row in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][2]) if len(rows) > limit else None
+        return items, next_cursor
@@ -0,0 +1,221 @@
+import os
+import logging
+import threading
+import httpx
+import google.genai as genai
+from geopy.adapters import RequestsAdapter
+from geopy.geocoders import Nominatim
+from services.ai_service import AIService
+from services.resilience import ResilientCaller
+from services.geo_cache import GeoCache
+from services.geo_service import GeoService
+from services.gazetteer import DEFAULT_PATH as GAZETTEER_PATH, Gazetteer
+from services.geo_worker import GeoWorker
+from services.intent_service import IntentService
+from services.extract_service import SlotExtractor
+from services.rate_limiter import TokenBucket
+from services.project_store import ProjectStore
+from services.dedup_service import DuplicateDetector
+
+# Süreç genelinde paylaşılan istemciler. Her oturum kendi bağlantı havuzunu
+# kurmak yerine buradan ödünç alır; ilk erişimde tembel olarak oluşturulur.
+_lock = threading.RLock()
+_genai_clients = {}
+_geolocators = {}
+_ai_services = {}
+_geo_services = {}
+_shared = {}
+
+logger = logging.getLogger(__name__)
+
+
+def _get_or_create(cache, key, factory):
+    instance = cache.get(key)
+    if instance is None:
+        with _lock:
+            instance = cache.get(key)
+            if instance is None:
+                instance = factory()
+                cache[key] = instance
+    return instance
+
+
+def _max_keepalive():
+    return int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+
+def _http_limits():
+    return httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=_max_keepalive(),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def get_genai_client(api_key=None):
+    key = api_key or os.getenv("GEMINI_API_KEY")
+
+    def factory():
+        logger.info("🔌 Paylaşılan Gemini istemcisi oluşturuluyor")
+        return genai.Client(
+            api_key=key,
+            http_options=genai.types.HttpOptions(
+                # Yük testinde yerel sahte sunucuya yönlendirmek için (benchmarks/fake_servers.py)
+                base_url=os.getenv("GEMINI_BASE_URL") or None,
+                client_args={"limits": _http_limits()},
+                async_client_args={"limits": _http_limits()},
+            ),
+        )
+
+    return _get_or_create(_genai_clients, key, factory)
+
+
+def get_geolocator(user_agent="municipal_bot"):
+    def factory():
+        logger.info("🔌 Paylaşılan Nominatim istemcisi oluşturuluyor")
+        return Nominatim(
+            user_agent=user_agent,
+            domain=os.getenv("NOMINATIM_DOMAIN", "nominatim.openstreetmap.org"),
+            scheme=os.getenv("NOMINATIM_SCHEME", "https"),
+            adapter_factory=lambda **kwargs: RequestsAdapter(
+                pool_connections=_max_keepalive(),
+                pool_maxsize=_max_keepalive(),
+                **kwargs,
+            ),
+        )
+
+    return _get_or_create(_geolocators, user_agent, factory)
+
+
+def get_geo_cache():
+    return _get_or_create(
+        _shared,
+        "geo_cache",
+        lambda: GeoCache(
+            path=os.getenv("GEOCODE_CACHE_PATH", "data/geocache.sqlite3"),
+            max_items=int(os.getenv("GEOCODE_CACHE_SIZE", "4096")),
+            ttl=float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600))),
+            negative_ttl=float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600))),
+        ),
+    )
+
+
+def get_nominatim_limiter():
+    return _get_or_create(
+        _shared,
+        "nominatim_limiter",
+        lambda: TokenBucket(rate=float(os.getenv("NOMINATIM_RATE", "1.0"))),
+    )
+
+
+def get_ai_service(api_key=None, model_id="gemini-2.0-flash"):
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    return _get_or_create(
+        _ai_services,
+        (key, model_id),
+        lambda: AIService(
+            api_key=key,
+            model_id=model_id,
+            client=get_genai_client(key),
+            state_token_budget=int(os.getenv("PROMPT_STATE_TOKEN_BUDGET", "0")) or None,
+            relevant_state_only=os.getenv("PROMPT_RELEVANT_STATE_ONLY", "0") == "1",
+            context_cache=os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1",
+            context_cache_ttl=int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600")),
+            structured_output=os.getenv("GEMINI_RESPONSE_SCHEMA", "1") == "1",
+            resilience=ResilientCaller(
+                model_id,
+                fallback_model=os.getenv("GEMINI_FALLBACK_MODEL") or None,
+                deadline=float(os.getenv("LLM_DEADLINE", "20")),
+                max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+                attempt_timeout=float(os.getenv("LLM_ATTEMPT_TIMEOUT", "0")) or None,
+                hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0")),
+                hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0")),
+                breaker_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                breaker_reset=float(os.getenv("LLM_BREAKER_RESET", "30")),
+            ),
+        ),
+    )
+
+
+def get_geo_service(city="Bursa", country="Türkiye", user_agent="municipal_bot"):
+    return _get_or_create(
+        _geo_services,
+        (city, country, user_agent),
+        lambda: GeoService(
+            city=city,
+            country=country,
+            user_agent=user_agent,
+            geolocator=get_geolocator(user_agent),
+            cache=get_geo_cache(),
+            limiter=get_nominatim_limiter(),
+            gazetteer=get_gazetteer() if city == "Bursa" else None,
+        ),
+    )
+
+
+def get_gazetteer():
+    # GAZETTEER_ENABLED=0 ile tüm sorgular Nominatim'e gider
+    if os.getenv("GAZETTEER_ENABLED", "1") != "1":
+        return None
+    return _get_or_create(
+        _shared,
+        "gazetteer",
+        lambda: Gazetteer(
+            path=os.getenv("GAZETTEER_PATH", GAZETTEER_PATH),
+            min_score=float(os.getenv("GAZETTEER_MIN_SCORE", "0.8")),
+        ),
+    )
+
+
+def get_geo_worker():
+    return _get_or_create(
+        _shared,
+        "geo_worker",
+        lambda: GeoWorker(
+            geo_service=get_geo_service(),
+            max_workers=int(os.getenv("GEOCODE_WORKERS", "4")),
+        ),
+    )
+
+
+def get_project_store():
+    return _get_or_create(
+        _shared,
+        "project_store",
+        lambda: ProjectStore(
+            path=os.getenv("PROJECT_STORE_PATH", "data/projects.sqlite3"),
+            refresh_interval=float(os.getenv("PROJECT_STORE_REFRESH", "1.0")),
+        ),
+    )
+
+
+def get_dedup_service():
+    # DEDUP_ENABLED=0 ile kapatılır
+    if os.getenv("DEDUP_ENABLED", "1") != "1":
+        return None
+    return _get_or_create(
+        _shared,
+        "dedup_service",
+        lambda: DuplicateDetector(
+            project_store=get_project_store(),
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.6")),
+            radius_m=float(os.getenv("DEDUP_RADIUS", "250")),
+        ),
+    )
+
+
+def get_intent_service():
+    return _get_or_create(
+        _shared,
+        "intent_service",
+        lambda: IntentService(threshold=float(os.getenv("INTENT_THRESHOLD", "0.8"))),
+    )
+
+
+def get_slot_extractor():
+    return _get_or_create(_shared, "slot_extractor", SlotExtractor)
+
+
+def warm_up():
+    get_ai_service()
+    get_geo_service()
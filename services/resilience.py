@@ -0,0 +1,273 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+import httpx
+import google.genai as genai
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from services import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+def is_transient(error):
+    # Tekrar denemeye değer hatalar: 5xx, 429/408, zaman aşımı ve bağlantı hataları
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, genai.errors.ServerError):
+        return True
+    if isinstance(error, genai.errors.ClientError):
+        return error.code in (408, 429)
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException, httpx.TransportError))
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, minimum=0.05):
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded("Tur için ayrılan süre doldu")
+        return remaining
+
+
+class CircuitBreaker:
+    # Art arda `failure_threshold` geçici hatada açılır; `reset_timeout` sonra tek bir deneme isteğine izin verir
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        metrics.LLM_CIRCUIT.set(0, model=name)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.logger.warning(f"⚡ Devre kesici ({self.name}): {self.state} -> {state}")
+        self.state = state
+        metrics.LLM_CIRCUIT.set(_STATE_VALUES[state], model=self.name)
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+class LatencyTracker:
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class ResilientCaller:
+    # Bir turdaki model çağrısı: toplam süre sınırı, geçici hatalarda rastgele bekleyişli yeniden deneme,
+    # yavaş isteklere paralel ikinci istek (hedging), model başına devre kesici ve yedek model
+    def __init__(self, model_id, fallback_model=None, deadline=20.0, max_attempts=3,
+                 hedge_percentile=0.0, hedge_min_delay=1.0, breaker_threshold=5, breaker_reset=30.0,
+                 backoff=0.25, max_backoff=2.0, attempt_timeout=None):
+        self.model_id = model_id
+        self.fallback_model = fallback_model if fallback_model != model_id else None
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        # Tek denemenin süresi toplam sınırdan kısa tutulur; takılan istek sonraki denemeye (yedek modele) yer bırakır
+        self.attempt_timeout = attempt_timeout or deadline / self.max_attempts
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.logger = logging.getLogger(__name__)
+        self.breakers = {
+            model: CircuitBreaker(model, breaker_threshold, breaker_reset)
+            for model in filter(None, [model_id, self.fallback_model])
+        }
+        self.latency = LatencyTracker()
+
+    def pick_model(self, attempt=0):
+        # Son deneme (ilki değilse) yedek modelle yapılır; birincil modelin devresi açıksa doğrudan yedeğe geçilir
+        order = [self.model_id, self.fallback_model]
+        if self.fallback_model and attempt > 0 and attempt == self.max_attempts - 1:
+            order.reverse()
+        for model in filter(None, order):
+            if self.breakers[model].allow():
+                return model
+        raise CircuitOpen("Tüm modellerin devre kesicisi açık")
+
+    def _retrying(self, cls, deadline):
+        def wait(retry_state):
+            # Bekleme süresi kalan süreyi aşmaz
+            return min(wait_random_exponential(multiplier=self.backoff, max=self.max_backoff)(retry_state),
+                       max(0.0, deadline.remaining() - 0.1))
+
+        return cls(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait,
+            retry=retry_if_exception(is_transient),
+            before_sleep=lambda state: self.logger.warning(
+                f"🔁 Gemini denemesi {state.attempt_number} başarısız, tekrar deneniyor: {state.outcome.exception()}"
+            ),
+            reraise=True,
+        )
+
+    def record(self, model, start, error=None, hedge=False):
+        elapsed = time.perf_counter() - start
+        metrics.LLM_ATTEMPT_SECONDS.observe(elapsed, model=model)
+        breaker = self.breakers[model]
+        if error is None:
+            metrics.LLM_ATTEMPTS.inc(model=model, outcome="hedge_ok" if hedge else "ok")
+            self.latency.add(elapsed)
+            breaker.record_success()
+        elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            # Paralel isteğin kaybeden tarafı veya yarıda bırakılan akış; model hakkında bilgi vermez
+            metrics.LLM_ATTEMPTS.inc(model=model, outcome="cancelled")
+            breaker.release_probe()
+        else:
+            outcome = "timeout" if isinstance(error, (asyncio.TimeoutError, TimeoutError)) else "error"
+            metrics.LLM_ATTEMPTS.inc(model=model, outcome=outcome)
+            if is_transient(error):
+                breaker.record_failure()
+            else:
+                # 400 vb. istek hataları: servis cevap veriyor, devre açılmaz
+                breaker.record_success()
+
+    def _hedge_delay(self):
+        if not self.hedge_percentile:
+            return None
+        observed = self.latency.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, observed) if observed is not None else None
+
+    async def _timed(self, func, model, timeout, hedge=False):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(model, timeout), timeout)
+        except BaseException as e:
+            self.record(model, start, e, hedge)
+            raise
+        self.record(model, start, hedge=hedge)
+        return result
+
+    def _start(self, model, deadline):
+        # Model seçildikten sonra süre dolmuşsa yarı açık devrenin deneme hakkı geri verilir
+        try:
+            return min(self.attempt_timeout, deadline.check())
+        except DeadlineExceeded:
+            self.breakers[model].release_probe()
+            raise
+
+    async def _attempt(self, func, model, deadline, timeout):
+        first = asyncio.create_task(self._timed(func, model, timeout))
+        tasks = {first}
+        try:
+            delay = self._hedge_delay()
+            if delay is not None and delay < deadline.remaining():
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    metrics.LLM_HEDGES.inc(outcome="launched")
+                    timeout = min(self.attempt_timeout, deadline.check())
+                    tasks.add(asyncio.create_task(self._timed(func, model, timeout, hedge=True)))
+
+            error = None
+            while tasks:
+                # Denemelerin kendi zaman aşımı bundan önce dolar ve hata olarak kaydedilir
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=deadline.remaining() + 0.1, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise DeadlineExceeded("Tur için ayrılan süre doldu")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            metrics.LLM_HEDGES.inc(outcome="won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call_async(self, func):
+        # func(model_id, timeout_s) -> awaitable yanıt
+        deadline = Deadline(self.deadline)
+        attempt = 0
+        async for retry in self._retrying(AsyncRetrying, deadline):
+            with retry:
+                model = self.pick_model(attempt)
+                attempt += 1
+                return await self._attempt(func, model, deadline, self._start(model, deadline))
+
+    def call(self, func):
+        # Senkron yol (CLI): paralel istek yok; süre sınırı her denemeye istek zaman aşımı olarak verilir
+        deadline = Deadline(self.deadline)
+        attempt = 0
+        for retry in self._retrying(Retrying, deadline):
+            with retry:
+                model = self.pick_model(attempt)
+                attempt += 1
+                timeout = self._start(model, deadline)
+                start = time.perf_counter()
+                try:
+                    result = func(model, timeout)
+                except Exception as e:
+                    self.record(model, start, e)
+                    raise
+                self.record(model, start)
+                return result
+
+    def stats(self):
+        return {
+            "breakers": {model: breaker.state for model, breaker in self.breakers.items()},
+            "hedge_delay": self._hedge_delay(),
+        }
@@ -0,0 +1,151 @@
+import math
+import heapq
+import threading
+from collections import defaultdict
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = 111_320
+
+
+def parse_point(value):
+    # "40.1950, 29.0600" -> (40.195, 29.06)
+    try:
+        lat, lon = (float(part) for part in str(value).split(","))
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    # Sabit boyutlu hücrelere bölünmüş ızgara; varsayılan hücre ~0.005° (~550 m).
+    # Şehir ölçeğinde (Bursa) nokta yoğunluğu dengeli olduğundan R-tree'ye gerek yok.
+    def __init__(self, cell_size=0.005):
+        self.cell_size = cell_size
+        self._cells = defaultdict(dict)
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size))
+
+    def upsert(self, item_id, lat, lon):
+        with self._lock:
+            self.remove(item_id)
+            cell = self._cell(lat, lon)
+            self._cells[cell][item_id] = (lat, lon)
+            self._points[item_id] = (lat, lon, cell)
+
+    def remove(self, item_id):
+        with self._lock:
+            entry = self._points.pop(item_id, None)
+            if entry is None:
+                return False
+            cell = entry[2]
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del self._cells[cell]
+            return True
+
+    def get(self, item_id):
+        entry = self._points.get(item_id)
+        return entry[:2] if entry else None
+
+    def _cells_in(self, min_lat, min_lon, max_lat, max_lon):
+        low = self._cell(min_lat, min_lon)
+        high = self._cell(max_lat, max_lon)
+        # Seyrek veride tüm aralığı dolaşmak yerine dolu hücreler taranır
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self._cells):
+            return [cell for cell in self._cells if low[0] <= cell[0] <= high[0] and low[1] <= cell[1] <= high[1]]
+        return [(i, j) for i in range(low[0], high[0] + 1) for j in range(low[1], high[1] + 1)]
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None):
+        results = []
+        with self._lock:
+            for cell in self._cells_in(min_lat, min_lon, max_lat, max_lon):
+                for item_id, (lat, lon) in self._cells.get(cell, {}).items():
+                    if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                        results.append(item_id)
+                        if limit and len(results) >= limit:
+                            return results
+        return results
+
+    def within(self, lat, lon, radius_m, limit=None, exclude=None):
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        results = []
+        with self._lock:
+            for cell in self._cells_in(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+                for item_id, (plat, plon) in self._cells.get(cell, {}).items():
+                    if item_id == exclude:
+                        continue
+                    distance = haversine(lat, lon, plat, plon)
+                    if distance <= radius_m:
+                        results.append((item_id, distance))
+        results.sort(key=lambda item: item[1])
+        return results[:limit] if limit else results
+
+    def nearest(self, lat, lon, k=10, max_radius_m=None, exclude=None):
+        # Merkez hücreden halka halka genişler; k. en yakın noktadan uzak halkalara geçilmez
+        center = self._cell(lat, lon)
+        ring_m = self.cell_size * METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+        best = []
+
+        def scan(bucket):
+            for item_id, (plat, plon) in bucket.items():
+                if item_id == exclude:
+                    continue
+                distance = haversine(lat, lon, plat, plon)
+                if max_radius_m is not None and distance > max_radius_m:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, item_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, item_id))
+
+        with self._lock:
+            total = len(self._points)
+            visited = 0
+            ring = 0
+            while visited < total:
+                if len(best) >= k and (ring - 1) * ring_m > -best[0][0]:
+                    break
+                if max_radius_m is not None and (ring - 1) * ring_m > max_radius_m:
+                    break
+                if (2 * ring + 1) ** 2 > len(self._cells):
+                    # Taranan alan dolu hücre sayısını aştı (uzak/seyrek sorgu): kalan dolu hücreler doğrudan taranır
+                    for cell, bucket in self._cells.items():
+                        if max(abs(cell[0] - center[0]), abs(cell[1] - center[1])) >= ring:
+                            scan(bucket)
+                    break
+                for cell in self._ring(center, ring):
+                    bucket = self._cells.get(cell)
+                    if not bucket:
+                        continue
+                    visited += len(bucket)
+                    scan(bucket)
+                ring += 1
+        return sorted(((item_id, -negative) for negative, item_id in best), key=lambda item: item[1])
+
+    @staticmethod
+    def _ring(center, ring):
+        ci, cj = center
+        if ring == 0:
+            return [center]
+        cells = [(ci + d, cj + dj) for d in (-ring, ring) for dj in range(-ring, ring + 1)]
+        cells += [(ci + di, cj + d) for d in (-ring, ring) for di in range(-ring + 1, ring)]
+        return cells
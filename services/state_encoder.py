@@ -0,0 +1,97 @@
+import json
+import math
+
+# Sistemin kendisinin ürettiği, modelin görmesine gerek olmayan alanlar
+SYSTEM_FIELDS = {"id", "projectCode", "lastUpdate", "detail"}
+
+# Son sorulan sorudaki anahtar kelime -> ilgili üst seviye alanlar
+QUESTION_SECTIONS = [
+    ("adı", ["projectName"]),
+    ("açıklama", ["description"]),
+    ("kategori", ["category"]),
+    ("türü", ["projectType"]),
+    ("öncelik", ["priority"]),
+    ("ilçe", ["location"]),
+    ("mahalle", ["location"]),
+    ("başlangıç noktası", ["location"]),
+    ("sonlanacak", ["location"]),
+    ("uzunluğu", ["scope"]),
+    ("genişliği", ["scope"]),
+    ("alan", ["scope"]),
+    ("malzeme", ["scope"]),
+    ("başlayacak", ["dates"]),
+    ("gün", ["dates"]),
+    ("bütçe", ["budget"]),
+    ("yönetici", ["team"]),
+    ("telefon", ["team"]),
+    ("ekip", ["team"]),
+    ("onaylıyor", None),
+]
+
+
+def estimate_tokens(text):
+    # Gemini tokenizer'ı çağırmadan yaklaşık değer: ~4 karakter / token
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def compact(value):
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = compact(item)
+            if item not in (None, "", [], {}):
+                result[key] = item
+        return result
+    if isinstance(value, list):
+        return [item for item in (compact(v) for v in value) if item not in (None, "", [], {})]
+    return value
+
+
+class StateEncoder:
+    def __init__(self, token_budget=None, relevant_only=False):
+        self.token_budget = token_budget
+        self.relevant_only = relevant_only
+
+    @staticmethod
+    def _dumps(value):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def relevant_sections(last_question):
+        if not last_question:
+            return None
+        question = last_question.lower()
+        for keyword, sections in QUESTION_SECTIONS:
+            if keyword in question:
+                return sections
+        return None
+
+    def encode(self, state, last_question=None):
+        state = compact({k: v for k, v in (state or {}).items() if k not in SYSTEM_FIELDS})
+        relevant = self.relevant_sections(last_question)
+
+        if self.relevant_only and relevant:
+            state = {k: v for k, v in state.items() if k in relevant or k == "projectName"}
+
+        text = self._dumps(state)
+        if not self.token_budget or estimate_tokens(text) <= self.token_budget:
+            return text
+
+        # Bütçe aşılırsa önce soruyla ilgili alanlar, sonra kalanlar sığdığı kadar eklenir
+        order = [k for k in state if relevant and k in relevant] + [k for k in state if not relevant or k not in relevant]
+        packed = {}
+        for key in order:
+            candidate = dict(packed, **{key: state[key]})
+            if estimate_tokens(self._dumps(candidate)) <= self.token_budget:
+                packed = candidate
+        return self._dumps(packed)
+
+    def measure(self, state, encoded):
+        legacy = json.dumps(state, indent=2, ensure_ascii=False)
+        legacy_tokens = estimate_tokens(legacy)
+        state_tokens = estimate_tokens(encoded)
+        return {
+            "state_tokens": state_tokens,
+            "legacy_state_tokens": legacy_tokens,
+            "saved_tokens": legacy_tokens - state_tokens,
+        }
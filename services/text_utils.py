@@ -0,0 +1,62 @@
+import re
+import unicodedata
+
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_TR_FOLD = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+_ABBREVIATIONS = {
+    "mah": "mahallesi", "mh": "mahallesi", "mahalle": "mahallesi",
+    "sok": "sokak", "sk": "sokak", "sokagi": "sokak",
+    "cad": "caddesi", "cd": "caddesi", "cadde": "caddesi",
+    "bulv": "bulvari", "blv": "bulvari", "bulvar": "bulvari",
+}
+
+
+def lower_tr(text):
+    return str(text).translate(_TR_LOWER).lower()
+
+
+def normalize_tr(text, expand_abbreviations=True):
+    if text is None:
+        return ""
+    value = lower_tr(text).translate(_TR_FOLD)
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r"[^a-z0-9]+", " ", value).strip()
+    if expand_abbreviations:
+        value = " ".join(_ABBREVIATIONS.get(token, token) for token in value.split())
+    return value
+
+
+def fold_tr(text):
+    return lower_tr(text).translate(_TR_FOLD)
+
+
+def parse_decimal(text):
+    # Türkçe (1.234,5) ve İngilizce (1,234.5) yazımları; "3.5" -> 3.5, "20.000.000" -> 20000000
+    value = re.sub(r"[^0-9.,\-]", "", str(text))
+    if not value or not any(c.isdigit() for c in value):
+        return None
+
+    if "." in value and "," in value:
+        decimal = "." if value.rfind(".") > value.rfind(",") else ","
+        thousands = "," if decimal == "." else "."
+        value = value.replace(thousands, "").replace(decimal, ".")
+    else:
+        for sep in (".", ","):
+            if sep in value:
+                head, _, tail = value.rpartition(sep)
+                if value.count(sep) > 1 or len(tail) == 3:
+                    value = value.replace(sep, "")
+                else:
+                    value = f"{head}.{tail}"
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def format_amount(value):
+    # Tutarlar kuruş hassasiyetiyle yazılır: 1250.5 -> "1250.5", 3500000.0 -> "3500000"
+    value = round(float(value), 2)
+    return str(int(value)) if value.is_integer() else str(value)
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import contextlib
+from dotenv import load_dotenv
+from services import registry
+from src.manager import FullContextManager
+from services.project_store import ProjectStore
+
+# Toplu işte anlamı olmayan kontrol cevapları; kayıt üretmeden raporlanır
+SKIP_STATUSES = {"IRRELEVANT", "PAYMENT_REDIRECT", "ANSWER", "SHOW_SUMMARY", "CANCELLED", "RESET_ALL"}
+
+
+class NoGeocode:
+    def get_coordinates(self, district, street=None):
+        return None
+
+
+def parse_items(source):
+    # NDJSON satırları, JSON listesi elemanları: {"id": .., "message": ..} | "metin"
+    for index, raw in enumerate(source, 1):
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode("utf-8")
+        if isinstance(raw, str):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                pass
+        if isinstance(raw, dict):
+            yield str(raw.get("id") or index), str(raw.get("message") or raw.get("text") or "")
+        else:
+            yield str(index), str(raw)
+
+
+class BatchProcessor:
+    def __init__(self, concurrency=8, ai_service=None, geo_service=None, geocode=True,
+                 project_store=None, dedup_service=None):
+        self.concurrency = concurrency
+        self.ai_service = ai_service or registry.get_ai_service()
+        self.geo_service = geo_service or (registry.get_geo_service(city="Bursa") if geocode else NoGeocode())
+        # Toplu iş kayıtları ortak proje deposuna yazılmaz; mükerrer kontrolü sadece dedup_service verilirse yapılır
+        self.project_store = project_store or ProjectStore(path=None)
+        self.dedup_service = dedup_service
+        self.logger = logging.getLogger(__name__)
+        self.latencies = []
+        self.counts = {"ok": 0, "skipped": 0, "error": 0}
+        self._started = None
+
+    async def process_item(self, item_id, message):
+        start = time.perf_counter()
+        result = {"id": item_id, "message": message}
+        try:
+            if not message.strip():
+                raise ValueError("Boş mesaj")
+
+            manager = FullContextManager(
+                filename=f"batch_{item_id}", ai_service=self.ai_service, geo_service=self.geo_service,
+                background_geocode=False, persistence="memory",
+                project_store=self.project_store, dedup_service=self.dedup_service or False,
+            )
+            patch = await self.ai_service.process_ai_response_async(
+                user_input=message,
+                current_data=manager.data["projects"][0],
+                last_question=None
+            )
+            if patch is None:
+                raise ValueError("Veri çıkarılamadı")
+
+            status = patch.pop("_system_status", None)
+            patch.pop("_response_message", None)
+            if status in SKIP_STATUSES:
+                result.update(status="skipped", reason=status)
+            else:
+                # Türetilmiş alanlar (alan, bütçe, tarih, konum) sohbet akışıyla aynı şekilde doldurulur
+                await asyncio.to_thread(manager._handle_patch, patch)
+                missing = manager.get_next_missing_info()
+                result.update(
+                    status="ok",
+                    project=manager.build_detail(),
+                    missing=None if missing.startswith("✅") else missing,
+                )
+                if manager.duplicate_offer:
+                    result["possible_duplicate"] = manager.duplicate_offer._asdict()
+        except Exception as e:
+            self.logger.error(f"❌ Toplu kayıt işlenemedi ({item_id}): {e}")
+            result.update(status="error", error=str(e))
+
+        latency = (time.perf_counter() - start) * 1000
+        result["latency_ms"] = round(latency, 1)
+        self.latencies.append(latency)
+        self.counts[result["status"]] += 1
+        return result
+
+    async def run(self, items):
+        # Sonuçlar bittikçe (giriş sırasından bağımsız) döner; bellekte en fazla concurrency kadar iş bekler
+        self._started = time.perf_counter()
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        results = asyncio.Queue()
+
+        async def producer():
+            try:
+                for item in items:
+                    await queue.put(item)
+            finally:
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                await results.put(await self.process_item(*item))
+            await results.put(None)
+
+        tasks = [asyncio.create_task(producer())]
+        tasks += [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            finished = 0
+            while finished < self.concurrency:
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                    continue
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        latencies = sorted(self.latencies)
+        total = len(latencies)
+
+        def percentile(p):
+            return round(latencies[min(total - 1, int(total * p))], 1) if total else 0.0
+
+        return {
+            "type": "stats",
+            "items": total,
+            **self.counts,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(total / elapsed, 2) if elapsed else 0.0,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "latency_max_ms": round(latencies[-1], 1) if total else 0.0,
+        }
+
+
+async def _main(args):
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    processor = BatchProcessor(
+        concurrency=args.concurrency, geocode=not args.no_geocode,
+        # Ortak proje deposu sadece okunur: olası mükerrerler raporlanır
+        dedup_service=registry.get_dedup_service() if args.dedup else None,
+    )
+    try:
+        # Yöneticinin konsol mesajları NDJSON çıktısına karışmasın
+        with contextlib.redirect_stdout(sys.stderr):
+            async for result in processor.run(parse_items(source)):
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps(processor.stats(), ensure_ascii=False), file=sys.stderr)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serbest metin iş emirlerini toplu olarak proje kaydına dönüştürür")
+    parser.add_argument("input", help="NDJSON dosyası ('-' ile stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Sonuç NDJSON dosyası (varsayılan stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")))
+    parser.add_argument("--no-geocode", action="store_true", help="Koordinat sorgulamadan çalış")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Olası mükerrerleri ortak proje deposunda ara (PROJECT_STORE_PATH, sadece okunur)")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from collections import deque
+
+
+class JournalEntry:
+    def __init__(self, changes=None):
+        # Her değişiklik: [yol, eski değer var mıydı, eski değer, yeni değer]
+        self.changes = changes or []
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def record(self, path, existed, old, new):
+        self.changes.append([list(path), existed, old, new])
+
+    def paths(self):
+        return [tuple(change[0]) for change in self.changes]
+
+    def apply_reverse(self, root):
+        for path, existed, old, _ in reversed(self.changes):
+            _apply(root, path, existed, old)
+
+    def apply_forward(self, root):
+        for path, _, _, new in self.changes:
+            _apply(root, path, True, new)
+
+    def forward_ops(self):
+        return [[path, new] for path, _, _, new in self.changes]
+
+    def reverse_ops(self):
+        # Silinen anahtarlar tek elemanlı [yol] olarak yazılır
+        return [[path, old] if existed else [path] for path, existed, old, _ in reversed(self.changes)]
+
+
+def _apply(root, path, exists, value):
+    if not path:
+        return
+    parent = root
+    try:
+        for key in path[:-1]:
+            parent = parent[key]
+    except (KeyError, IndexError, TypeError):
+        return
+
+    key = path[-1]
+    if exists:
+        parent[key] = value
+    elif isinstance(parent, dict):
+        parent.pop(key, None)
+
+
+class UndoJournal:
+    def __init__(self, max_entries=50):
+        self.max_entries = max_entries
+        self._undo = deque(maxlen=max_entries)
+        self._redo = []
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def redo_depth(self):
+        return len(self._redo)
+
+    def commit(self, entry):
+        if not entry:
+            return
+        self._undo.append(entry)
+        self._redo.clear()
+
+    def peek(self):
+        return self._undo[-1] if self._undo else None
+
+    def undo(self, root, steps=1):
+        entries = []
+        while self._undo and len(entries) < steps:
+            entry = self._undo.pop()
+            entry.apply_reverse(root)
+            self._redo.append(entry)
+            entries.append(entry)
+        return entries
+
+    def redo(self, root, steps=1):
+        entries = []
+        while self._redo and len(entries) < steps:
+            entry = self._redo.pop()
+            entry.apply_forward(root)
+            self._undo.append(entry)
+            entries.append(entry)
+        return entries
+
+    def to_list(self):
+        return {
+            "undo": [entry.changes for entry in self._undo],
+            "redo": [entry.changes for entry in self._redo],
+        }
+
+    @classmethod
+    def from_list(cls, payload, max_entries=50):
+        journal = cls(max_entries=max_entries)
+        for changes in (payload or {}).get("undo", []):
+            journal._undo.append(JournalEntry(changes))
+        journal._redo = [JournalEntry(changes) for changes in (payload or {}).get("redo", [])]
+        return journal
@@ -1,25 +1,63 @@
 import os
-import json
+import re
+import asyncio
 import uuid
-import copy
 import logging
+import threading
 from datetime import datetime
 from src.models import create_blank_structure
-from services.ai_service import AIService
-from services.geo_service import GeoService
+from src.journal import JournalEntry, UndoJournal
+from src.storage import MemoryStorage, create_storage
+from services import metrics, registry
 from services.math_service import CalculateService
+from services.dedup_service import DuplicateMatch
+from services.project_store import ProjectStore
+
+PROJECT_PATH = ("projects", 0)
 
 class FullContextManager:
-    def __init__(self, filename="data/data.json", api_key=None, reset=False):
+    def __init__(self, filename="data/data.json", api_key=None, reset=False,
+                 ai_service=None, geo_service=None, background_geocode=True, undo_limit=50,
+                 write_detail=None, persistence=None, project_store=None, dedup_service=None):
         self.filename = filename
+        # json: her turda atomik tam yazım, journal: tur başına tek JSONL satırı + periyodik sıkıştırma, memory: diske yazılmaz
+        self.storage = create_storage(filename, persistence)
+        # "detail" alanı her turda kopyalanmaz; sadece dışa aktarımda üretilir.
+        # Eski dosya formatını bekleyenler için SESSION_WRITE_DETAIL=1 ile diske de yazılır.
+        if write_detail is None:
+            write_detail = os.getenv("SESSION_WRITE_DETAIL", "0") == "1"
+        self.write_detail = write_detail
         self.logger = logging.getLogger(__name__)
         
-        self.ai_service = AIService(api_key=api_key)
-        self.geo_service = GeoService(city="Bursa") 
+        self.ai_service = ai_service or registry.get_ai_service(api_key=api_key)
+        self.geo_service = geo_service or registry.get_geo_service(city="Bursa")
+        self.geo_worker = registry.get_geo_worker() if background_geocode else None
+        self.intent_service = registry.get_intent_service()
+        self.slot_extractor = registry.get_slot_extractor()
+        # Diske yazmayan oturumlar (toplu iş, benchmark) verilmedikçe ortak proje deposunu açmaz ve ona yazmaz
+        memory = isinstance(self.storage, MemoryStorage)
+        if project_store is None:
+            project_store = ProjectStore(path=None) if memory else registry.get_project_store()
+        self.project_store = project_store
+        if dedup_service is None and not memory:
+            dedup_service = registry.get_dedup_service()
+        self.dedup_service = dedup_service or None
         self.calc_service = CalculateService()
         
-        self.history_stack = []
+        # Geri alma: her tur için sadece değişen yolların eski/yeni değerleri tutulur
+        self.journal = UndoJournal(max_entries=undo_limit)
         self.last_question = None
+        # Son turda değişen alanlar (akış olayları için)
+        self.last_changes = []
+        # Mükerrer kayıt önerisi: bekleyen eşleşme, reddedilen projeler ve son kontrol edilen içerik
+        self.duplicate_offer = None
+        self._dedup_dismissed = set()
+        self._dedup_checked = None
+
+        # Arka plan konum işleri: sonuç gelene kadar ilgili alan "işlemde" sayılır
+        self._lock = threading.RLock()
+        self._geo_generation = 0
+        self.pending_geocode = set()
         
         #ödeme 
         self.payment_links = {
@@ -30,61 +68,141 @@ class FullContextManager:
             "GENEL": "https://ebelediye.bursa.bel.tr/hizli-odeme"
         }
 
-        if reset and os.path.exists(self.filename):
-            os.remove(self.filename)
+        if reset and self.storage.exists():
+            self.storage.delete()
             print(f"🗑️  Eski veri dosyası '{self.filename}' silindi.")
 
         self.data = self.load_data()
         
-        if not os.path.exists(self.filename):
+        if not self.storage.exists():
             self.save()
             print(f"♻️ Sistem sıfırlandı. '{self.filename}' dosyası oluşturuldu.")
         self.last_question = self.get_next_missing_info()
 
     def load_data(self):
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if "projects" in data and data["projects"]:
-                        return data
-            except Exception as e:
-                self.logger.error(f"Dosya okuma hatası: {e}")
+        data = self.storage.load()
+        if data and "projects" in data and data["projects"]:
+            for project in data["projects"]:
+                project["detail"] = {}
+            return data
         
         return create_blank_structure()
 
-    def save(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+    def build_detail(self, project=None):
+        project = project if project is not None else self.data["projects"][0]
+        return {k: v for k, v in project.items() if k != "detail"}
 
-    def create_snapshot(self, force=False):
-        if not self.history_stack:
-            self.history_stack.append(copy.deepcopy(self.data))
-            return
+    def export_data(self, include_detail=True):
+        if not include_detail:
+            return self.data
+        data = dict(self.data)
+        data["projects"] = [dict(p, detail=self.build_detail(p)) for p in self.data["projects"]]
+        return data
 
-        if force or self.data != self.history_stack[-1]:
-            self.history_stack.append(copy.deepcopy(self.data))
+    def save(self, final=False, ops=None):
+        with metrics.timed("persist"):
+            payload = self.export_data(include_detail=self.write_detail or final)
+            if final or ops is None:
+                self.storage.save(payload)
+            else:
+                self.storage.append(ops, payload)
 
-    def undo_last_action(self):
-        if not self.history_stack:
-            return "Geri alınacak işlem yok."
-        
-        self.data = self.history_stack.pop()
-        self.save()
+    def delete_files(self):
+        self.storage.delete()
+
+    def close(self):
+        # Bellekten çıkarılırken açık günlük dosyası kapatılır; veri her turda zaten yazılmıştır
+        with self._lock:
+            self.storage.close()
+
+    def export_state(self):
+        # Paylaşılan oturum deposu için: veri, son soru ve geri alma geçmişi
+        with self._lock:
+            return {
+                "data": self.data,
+                "last_question": self.last_question,
+                "journal": self.journal.to_list(),
+                "duplicate": {
+                    "offer": self.duplicate_offer._asdict() if self.duplicate_offer else None,
+                    "dismissed": sorted(self._dedup_dismissed),
+                },
+            }
+
+    def restore_state(self, state):
+        with self._lock:
+            self._cancel_geocode()
+            self.data = state["data"]
+            for project in self.data.get("projects", []):
+                project["detail"] = {}
+            self.journal = UndoJournal.from_list(state.get("journal"), max_entries=self.journal.max_entries)
+            self.last_question = state.get("last_question") or self.get_next_missing_info()
+            duplicate = state.get("duplicate") or {}
+            self.duplicate_offer = DuplicateMatch(**duplicate["offer"]) if duplicate.get("offer") else None
+            self._dedup_dismissed = set(duplicate.get("dismissed", []))
+
+    @property
+    def busy(self):
+        return bool(self.pending_geocode)
+
+    def undo_last_action(self, steps=1):
+        with self._lock:
+            self.last_changes = []
+            entries = self.journal.undo(self.data, steps)
+            if not entries:
+                return "Geri alınacak işlem yok."
+
+            self._after_history_move(entries, [op for entry in entries for op in entry.reverse_ops()])
+            label = "Son işlem" if len(entries) == 1 else f"Son {len(entries)} işlem"
+            return f"⏪ {label} geri alındı.\n\nAI: {self.last_question}"
+
+    def redo_last_action(self, steps=1):
+        with self._lock:
+            self.last_changes = []
+            entries = self.journal.redo(self.data, steps)
+            if not entries:
+                return "Yinelenecek işlem yok."
+
+            self._after_history_move(entries, [op for entry in entries for op in entry.forward_ops()])
+            label = "İşlem" if len(entries) == 1 else f"{len(entries)} işlem"
+            return f"⏩ {label} yeniden uygulandı.\n\nAI: {self.last_question}"
+
+    def _after_history_move(self, entries, ops):
+        self.last_changes = self._field_names(entries)
+        had_pending = bool(self.pending_geocode)
+        self._cancel_geocode()
+        p = self.data["projects"][0]
+        moved = {".".join(map(str, path[len(PROJECT_PATH):])) for entry in entries for path in entry.paths()}
+        # Tüm proje değiştiyse (reset) ya da yarım kalan konum sorgusu varsa konum yeniden çözülür
+        if had_pending or "" in moved or self._touches(moved, "location"):
+            entry = self.journal.peek()
+            before = len(entry.changes) if entry else 0
+            self._resolve_location(p.get("location", {}), entry)
+            # Senkron konum çözümü geri alma kaydına eklendiyse onu da günlüğe yaz
+            if entry and len(entry.changes) > before:
+                ops = ops + JournalEntry(entry.changes[before:]).forward_ops()
+        self.save(ops=ops)
         self.last_question = self.get_next_missing_info()
-        return f"⏪ Son işlem geri alındı.\n\nAI: {self.last_question}"
 
-    def update_recursive(self, target, source):
+    def _assign(self, container, key, value, path, entry=None):
+        if key in container and container[key] == value:
+            return False
+        if entry is not None:
+            entry.record(PROJECT_PATH + tuple(path), key in container, container.get(key), value)
+        container[key] = value
+        return True
+
+    def update_recursive(self, target, source, changed=None, path=(), entry=None):
         if not isinstance(source, dict):
             return
 
         for key, value in source.items():
+            key_path = (*path, key)
             if isinstance(value, dict):
                 if key not in target or not isinstance(target[key], dict):
-                    target[key] = {}
-                self.update_recursive(target[key], value)
-            else:
-                target[key] = value
+                    self._assign(target, key, {}, key_path, entry)
+                self.update_recursive(target[key], value, changed, key_path, entry)
+            elif self._assign(target, key, value, key_path, entry) and changed is not None:
+                changed.add(".".join(key_path))
 
     def generate_summary_table(self):
         p = self.data["projects"][0]
@@ -155,12 +273,6 @@ class FullContextManager:
             if key not in standard_keys:
                 extra_rows.append(row(f"Ekstra: {key}", value))
 
-        detail_obj = p.get("detail", {})
-        if isinstance(detail_obj, dict):
-            for k, v in detail_obj.items():
-                if k not in p: 
-                     extra_rows.append(row(f"Detay: {k}", v))
-
         if extra_rows:
             table.append(f"| {'--- EKSTRA DETAYLAR ---':<{w_label + w_value + 3}} |")
             table.append(line)
@@ -169,73 +281,249 @@ class FullContextManager:
 
         return "\n".join(table)
     
-    def auto_fill_system_fields(self):
+    @staticmethod
+    def _touches(changed, *prefixes):
+        if changed is None:
+            return True
+        return any(path == prefix or path.startswith(prefix + ".")
+                   for path in changed for prefix in prefixes)
+
+    def auto_fill_system_fields(self, changed=None, entry=None):
+        with metrics.timed("derive"):
+            self._derive_fields(changed, entry)
+
+    def _derive_fields(self, changed=None, entry=None):
+        # changed=None: tüm türetilmiş alanlar yeniden hesaplanır (reset, dosyadan yükleme vb.)
+        if changed is not None and not changed:
+            return
+
         p = self.data["projects"][0]   
-        loc = p.get("location", {})
-        dist = loc.get("district", "")
-        street = loc.get("street", "")
-  
-        if street and dist:
-            coords = self.geo_service.get_coordinates(district=dist, street=street)
-            if coords:
-                if loc.get("startPoint") != coords:
-                    print(f"[HARİTA GÜNCELLENDİ] {street} -> {coords}")
-                    loc["startPoint"] = coords
-        
-        elif dist and not loc.get("startPoint"):
-             coords = self.geo_service.get_coordinates(district=dist)
-             if coords: loc["startPoint"] = coords
 
-        scope = p.get("scope", {})
-        area = self.calc_service.calculate_area(scope.get("length"), scope.get("width"))
-        if area: scope["totalArea"] = area
+        if self._touches(changed, "location"):
+            self._resolve_location(p.get("location", {}), entry)
 
-        bud = p.get("budget", {})
-        budget_updates = self.calc_service.calculate_budget(
-            total=bud.get("total"), 
-            used=bud.get("used"), 
-            remaining=bud.get("remaining")
-        )
-        if budget_updates: bud.update(budget_updates)
+        if self._touches(changed, "scope.length", "scope.width"):
+            scope = p.get("scope", {})
+            area = self.calc_service.calculate_area(scope.get("length"), scope.get("width"))
+            if area: self._assign(scope, "totalArea", area, ("scope", "totalArea"), entry)
 
-        dates = p.get("dates", {})
-        date_updates = self.calc_service.calculate_dates(
-            start_str=dates.get("plannedStart"),
-            duration=dates.get("duration"),
-            end_str=dates.get("plannedEnd")
-        )
-        if date_updates: dates.update(date_updates)
+        if self._touches(changed, "budget"):
+            bud = p.get("budget", {})
+            budget_updates = self.calc_service.calculate_budget(
+                total=bud.get("total"), 
+                used=bud.get("used"), 
+                remaining=bud.get("remaining")
+            )
+            for key, value in budget_updates.items():
+                self._assign(bud, key, value, ("budget", key), entry)
+
+        if self._touches(changed, "dates"):
+            dates = p.get("dates", {})
+            date_updates = self.calc_service.calculate_dates(
+                start_str=dates.get("plannedStart"),
+                duration=dates.get("duration"),
+                end_str=dates.get("plannedEnd")
+            )
+            for key, value in date_updates.items():
+                self._assign(dates, key, value, ("dates", key), entry)
 
         if not p.get("id"): 
-            p["id"] = f"PRJ-{uuid.uuid4().hex[:6].upper()}"
+            self._assign(p, "id", f"PRJ-{uuid.uuid4().hex[:6].upper()}", ("id",), entry)
         
         if not p.get("projectCode"):
-            p["projectCode"] = datetime.now().strftime("KY-%Y%m%d")
+            self._assign(p, "projectCode", datetime.now().strftime("KY-%Y%m%d"), ("projectCode",), entry)
             
-        p["lastUpdate"] = datetime.now().isoformat()
+        self._assign(p, "lastUpdate", datetime.now().isoformat(), ("lastUpdate",), entry)
         
-        pm = p.get("team", {}).get("projectManager", {})
-        if pm.get("phone"):
-             import re
-             clean = re.sub(r'\D', '', pm["phone"])
-             if len(clean) >= 10:
-                 pm["phone"] = f"+90 {clean[-10:-7]} {clean[-7:-4]} {clean[-4:]}"
+        if self._touches(changed, "team.projectManager"):
+            pm = p.get("team", {}).get("projectManager", {})
+            if pm.get("phone"):
+                 clean = re.sub(r'\D', '', pm["phone"])
+                 if len(clean) >= 10:
+                     phone = f"+90 {clean[-10:-7]} {clean[-7:-4]} {clean[-4:]}"
+                     self._assign(pm, "phone", phone, ("team", "projectManager", "phone"), entry)
 
-        p["detail"] = copy.deepcopy(p)
-        if "detail" in p["detail"]: del p["detail"]["detail"]
 
     def _is_coord(self, value):
         return value and "," in str(value) and any(c.isdigit() for c in str(value))
 
+    def _location_jobs(self, loc):
+        dist = loc.get("district", "")
+        street = loc.get("street", "")
+        jobs = []
+
+        if street and dist:
+            jobs.append(("startPoint", dist, street))
+        elif dist and not loc.get("startPoint"):
+            jobs.append(("startPoint", dist, None))
+
+        end = loc.get("endPoint")
+        if dist and end and not self._is_coord(end):
+            jobs.append(("endPoint", dist, end))
+        return jobs
+
+    def _resolve_location(self, loc, entry=None):
+        jobs = self._location_jobs(loc)
+        self._cancel_geocode()
+
+        if self.geo_worker is None:
+            for field, dist, street in jobs:
+                coords = self.geo_service.get_coordinates(district=dist, street=street)
+                self._set_coordinate(loc, field, street, coords, entry)
+            return
+
+        # Yerel sözlükte bulunanlar turun içinde yazılır; kalanlar arka planda sorgulanır.
+        # Sonuç, işi başlatan turun geri alma kaydına eklenir
+        generation = self._geo_generation
+        local = getattr(self.geo_service, "get_local_coordinates", None)
+        for field, dist, street in jobs:
+            coords = local(district=dist, street=street) if local else None
+            if coords:
+                self._set_coordinate(loc, field, street, coords, entry)
+                continue
+            self.pending_geocode.add(field)
+            self.geo_worker.submit(
+                dist, street,
+                lambda coords, field=field, street=street: self._on_geocode(generation, entry, field, street, coords),
+                geo_service=self.geo_service,
+            )
+
+    def _cancel_geocode(self):
+        # Konum değiştiğinde havadaki eski sorguların sonuçları yok sayılır
+        self._geo_generation += 1
+        self.pending_geocode.clear()
+
+    def _on_geocode(self, generation, entry, field, street, coords):
+        with self._lock:
+            if generation != self._geo_generation:
+                return
+            self.pending_geocode.discard(field)
+            loc = self.data["projects"][0].get("location", {})
+            if self._set_coordinate(loc, field, street, coords, entry):
+                self.save(ops=[[list(PROJECT_PATH) + ["location", field], coords]])
+
+    def _set_coordinate(self, loc, field, street, coords, entry=None):
+        if not coords or loc.get(field) == coords:
+            return False
+        print(f"[HARİTA GÜNCELLENDİ] {street or loc.get('district')} -> {coords}")
+        return self._assign(loc, field, coords, ("location", field), entry)
+
+    def _route_locally(self, user_input):
+        # Komutlar ve sayısal/tarih cevapları LLM'e gitmeden yerelde çözülür
+        if self.duplicate_offer:
+            answer = self.intent_service.yes_no(user_input)
+            if answer is not None:
+                return "DUPLICATE", {"_system_status": "DUPLICATE_ATTACH" if answer else "DUPLICATE_DISMISS"}
+            # Öneri cevaplanmadan başka bilgi verildiyse yeni kayıt olarak devam edilir
+            self._dismiss_duplicate()
+
+        intent = self.intent_service.classify(user_input, self.last_question)
+        if intent:
+            return intent.intent, intent.patch
+
+        slot = self.slot_extractor.extract(user_input, self.last_question)
+        if slot:
+            return "SLOT", slot.patch
+        return None, None
+
+    def _route(self, user_input):
+        route, patch = self._route_locally(user_input)
+        metrics.ROUTES.inc(route=route or "LLM")
+        return route, patch
+
     def chat(self, user_input):
-        if user_input.lower() in ["geri al", "geri", "undo", "vazgeçtim"]:
-            return self.undo_last_action()
+        with metrics.timed("turn"):
+            return self._chat(user_input)
+
+    async def chat_async(self, user_input):
+        with metrics.timed("turn"):
+            return await self._chat_async(user_input)
+
+    def _chat(self, user_input):
+        route, patch = self._route(user_input)
+        if route == "UNDO":
+            return self.undo_last_action(patch["_steps"])
+        if route == "REDO":
+            return self.redo_last_action(patch["_steps"])
         
-        patch = self.ai_service.process_ai_response(
-            user_input=user_input, 
-            current_data=self.data["projects"][0], 
-            last_question=self.last_question
-        )
+        if route is None:
+            patch = self.ai_service.process_ai_response(
+                user_input=user_input, 
+                current_data=self.data["projects"][0], 
+                last_question=self.last_question
+            )
+        return self._handle_patch(patch)
+
+    async def _chat_async(self, user_input):
+        route, patch = self._route(user_input)
+        if route == "UNDO":
+            return await asyncio.to_thread(self.undo_last_action, patch["_steps"])
+        if route == "REDO":
+            return await asyncio.to_thread(self.redo_last_action, patch["_steps"])
+
+        if route is None:
+            patch = await self.ai_service.process_ai_response_async(
+                user_input=user_input,
+                current_data=self.data["projects"][0],
+                last_question=self.last_question
+            )
+        # Geocoding ve dosya yazımı senkron; event loop dışında çalıştırılır
+        return await asyncio.to_thread(self._handle_patch, patch)
+
+    async def chat_stream(self, user_input):
+        # Akış: received -> model-thinking* -> patch-applied -> geocode-pending -> next-question -> done
+        with metrics.timed("turn"):
+            yield {"event": "received"}
+            route, patch = self._route(user_input)
+            if route == "UNDO":
+                response = await asyncio.to_thread(self.undo_last_action, patch["_steps"])
+            elif route == "REDO":
+                response = await asyncio.to_thread(self.redo_last_action, patch["_steps"])
+            else:
+                if route is None:
+                    yield {"event": "model-thinking", "chars": 0}
+                    async for kind, value in self.ai_service.stream_ai_response(
+                        user_input=user_input,
+                        current_data=self.data["projects"][0],
+                        last_question=self.last_question
+                    ):
+                        if kind == "chunk":
+                            yield {"event": "model-thinking", "chars": value}
+                        else:
+                            patch = value
+                else:
+                    yield {"event": "routed", "route": route}
+                response = await asyncio.to_thread(self._handle_patch, patch)
+
+            if self.last_changes:
+                yield {"event": "patch-applied", "fields": self.last_changes}
+            if self.pending_geocode:
+                yield {"event": "geocode-pending", "fields": sorted(self.pending_geocode)}
+            if response not in ("SESSION_COMPLETED_SUCCESSFULLY", "SESSION_CANCELLED"):
+                yield {"event": "next-question", "question": self.last_question}
+            yield {
+                "event": "done",
+                "response": response,
+                "completed": response == "SESSION_COMPLETED_SUCCESSFULLY",
+            }
+
+    def _handle_patch(self, patch):
+        metrics.STATUSES.inc(status=(patch.get("_system_status") or "UPDATE") if patch else "EMPTY")
+        with self._lock:
+            self.last_changes = []
+            return self._process_patch(patch)
+
+    @staticmethod
+    def _field_names(entries):
+        fields = []
+        for entry in entries:
+            for path in entry.paths():
+                name = ".".join(map(str, path[len(PROJECT_PATH):])) or "*"
+                if name not in fields:
+                    fields.append(name)
+        return fields
+
+    def _process_patch(self, patch):
         if not patch:
             return "Veriyi anlayamadım, lütfen tekrar eder misiniz?"
         
@@ -260,11 +548,26 @@ class FullContextManager:
 
         if system_status == "SHOW_SUMMARY":
             return self.generate_summary_table() + f"\n\n🤖 AI: {self.last_question}"
+
+        if system_status == "DUPLICATE_ATTACH":
+            return self._attach_duplicate()
+
+        if system_status == "DUPLICATE_DISMISS":
+            self._dismiss_duplicate()
+            self.last_question = self.get_next_missing_info()
+            return f"🆕 Tamam, yeni kayıt olarak devam ediyoruz.\n\n🤖 AI: {self.last_question}"
         
+        changed = set()
+        entry = JournalEntry()
         if system_status == "RESET_ALL":
-            self.create_snapshot(force=True)
-            self.data = create_blank_structure()
-            self.save()
+            blank = create_blank_structure()["projects"][0]
+            entry.record(PROJECT_PATH, True, self.data["projects"][0], blank)
+            self.data["projects"][0] = blank
+            self._cancel_geocode()
+            self.duplicate_offer = None
+            self._dedup_dismissed.clear()
+            self._dedup_checked = None
+            changed = None
         
         if "_system_status" in patch:
             del patch["_system_status"]
@@ -273,20 +576,91 @@ class FullContextManager:
             del patch["_response_message"]
 
         if system_status == "FINISHED":
-            self.update_recursive(self.data["projects"][0], patch)
-            self.auto_fill_system_fields()
-            self.save()
+            self.update_recursive(self.data["projects"][0], patch, changed, entry=entry)
+            self.auto_fill_system_fields(changed, entry)
+            self.save(final=True)
+            self._commit_project()
+            self.last_changes = self._field_names([entry])
             return "SESSION_COMPLETED_SUCCESSFULLY"
         
-        self.create_snapshot()
-
-        self.update_recursive(self.data["projects"][0], patch)
-        self.auto_fill_system_fields()
-        self.save()
+        self.update_recursive(self.data["projects"][0], patch, changed, entry=entry)
+        self.auto_fill_system_fields(changed, entry)
+        self.journal.commit(entry)
+        self.save(ops=entry.forward_ops())
+        self.last_changes = self._field_names([entry])
         
         self.last_question = self.get_next_missing_info()
+        offer = self._check_duplicate()
+        if offer:
+            self.last_question = offer
         return self.last_question
         
+    def _commit_project(self):
+        # Onaylanan proje ortak proje deposuna (indeksli sorgular için) yazılır
+        try:
+            project = self.build_detail()
+            self.project_store.upsert(project, source=self.filename)
+            if self.dedup_service:
+                self.dedup_service.index(project)
+        except Exception as e:
+            self.logger.error(f"Proje deposuna yazılamadı: {e}")
+
+    def _check_duplicate(self):
+        # Ad/açıklama ve ilçe belli olunca (ve bunlar ya da konum değiştikçe) bir kez kontrol edilir
+        if not self.dedup_service:
+            return None
+        p = self.data["projects"][0]
+        loc = p.get("location", {})
+        if not (p.get("projectName") or p.get("description")) or not loc.get("district"):
+            return None
+        fingerprint = (p.get("projectName"), p.get("description"), p.get("category"),
+                       loc.get("district"), loc.get("startPoint"))
+        if fingerprint == self._dedup_checked:
+            return None
+        self._dedup_checked = fingerprint
+
+        try:
+            match = self.dedup_service.find(p, exclude=self._dedup_dismissed)
+        except Exception as e:
+            self.logger.error(f"Mükerrer kontrolü başarısız: {e}")
+            return None
+        if not match:
+            return None
+
+        self.duplicate_offer = match
+        distance = f", ~{int(match.distance_m)} m uzakta" if match.distance_m is not None else ""
+        return (f"🔁 Benzer bir kayıt zaten var: '{match.project_name}' ({match.project_id}{distance}). "
+                f"Bu bildirimi mevcut projeye eklemek ister misiniz? (Evet/Hayır)")
+
+    def _dismiss_duplicate(self):
+        if self.duplicate_offer:
+            self._dedup_dismissed.add(self.duplicate_offer.project_id)
+        self.duplicate_offer = None
+
+    def _attach_duplicate(self):
+        match = self.duplicate_offer
+        self.duplicate_offer = None
+        p = self.data["projects"][0]
+        # Yeni proje açılmaz; bildirim mevcut projenin "reports" listesine eklenir
+        report = {
+            "source": self.filename,
+            "projectName": p.get("projectName"),
+            "description": p.get("description"),
+            "location": dict(p.get("location", {})),
+            "reportedAt": datetime.now().isoformat(),
+        }
+        if not self.project_store.append_report(match.project_id, report):
+            self.last_question = self.get_next_missing_info()
+            return f"⚠️ Eşleşen kayıt artık bulunamadı, yeni kayıt olarak devam ediyoruz.\n\n🤖 AI: {self.last_question}"
+
+        entry = JournalEntry()
+        self._assign(p, "duplicateOf", match.project_id, ("duplicateOf",), entry)
+        self.journal.commit(entry)
+        self.save(final=True)
+        self.last_changes = self._field_names([entry])
+        print(f"[MÜKERRER] Bildirim {match.project_id} numaralı projeye eklendi.")
+        return "SESSION_COMPLETED_SUCCESSFULLY"
+
     def get_next_missing_info(self):
         p = self.data["projects"][0]
         if not p.get("projectName"): return "Projenin adı ne olsun?"
@@ -298,7 +672,7 @@ class FullContextManager:
         loc = p.get("location", {})
         if not loc.get("district"): return "Çalışma hangi ilçede yapılacak?"
         if not loc.get("street"): return "Hangi mahalle veya sokakta?" 
-        if not loc.get("startPoint"): 
+        if not loc.get("startPoint") and "startPoint" not in self.pending_geocode:
             if loc.get("street"):
                 return f"'{loc.get('street')}' civarında tam başlangıç noktası neresi? (Bina no, Cami, Okul vb.)"
             return "Tam başlangıç noktası neresi?"
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+
+class SessionConflict(Exception):
+    pass
+
+
+class SessionBusy(Exception):
+    pass
+
+
+class SessionRecord(NamedTuple):
+    state: dict
+    version: int
+
+
+class SessionBackend(ABC):
+    # Süreçler arası paylaşılan oturum deposu. Redis benzeri bir uygulama:
+    # load/save -> GET + WATCH/MULTI (sürüm karşılaştırmalı yazım), acquire/release -> SET NX PX
+    @abstractmethod
+    def load(self, session_id):
+        ...
+
+    @abstractmethod
+    def version(self, session_id):
+        ...
+
+    @abstractmethod
+    def save(self, session_id, state, expected_version):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id):
+        ...
+
+    @abstractmethod
+    def acquire(self, session_id, owner, ttl):
+        ...
+
+    @abstractmethod
+    def release(self, session_id, owner):
+        ...
+
+
+class SqliteSessionBackend(SessionBackend):
+    def __init__(self, path="data/sessions.sqlite3", busy_timeout=5.0):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, version INTEGER NOT NULL, "
+            "updated_at REAL NOT NULL, lock_owner TEXT, lock_expires REAL)"
+        )
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, version FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return SessionRecord(json.loads(row[0]), row[1])
+
+    def version(self, session_id):
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id, state, expected_version):
+        payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            if expected_version == 0:
+                try:
+                    self._conn.execute(
+                        "INSERT INTO sessions (id, state, version, updated_at) VALUES (?, ?, 1, ?)",
+                        (session_id, payload, now),
+                    )
+                except sqlite3.IntegrityError:
+                    raise SessionConflict(session_id)
+                return 1
+
+            cursor = self._conn.execute(
+                "UPDATE sessions SET state = ?, version = version + 1, updated_at = ? "
+                "WHERE id = ? AND version = ?",
+                (payload, now, session_id, expected_version),
+            )
+        if cursor.rowcount != 1:
+            raise SessionConflict(session_id)
+        return expected_version + 1
+
+    def delete(self, session_id):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return cursor.rowcount == 1
+
+    def acquire(self, session_id, owner, ttl):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET lock_owner = ?, lock_expires = ? "
+                "WHERE id = ? AND (lock_owner IS NULL OR lock_owner = ? OR lock_expires < ?)",
+                (owner, now + ttl, session_id, owner, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, session_id, owner):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET lock_owner = NULL, lock_expires = NULL WHERE id = ? AND lock_owner = ?",
+                (session_id, owner),
+            )
+
+
+def create_backend(kind=None):
+    kind = kind or os.getenv("SESSION_BACKEND", "local")
+    if kind == "sqlite":
+        return SqliteSessionBackend(path=os.getenv("SESSION_DB_PATH", "data/sessions.sqlite3"))
+    return None
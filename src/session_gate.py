@@ -0,0 +1,115 @@
+import time
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SessionGate:
+    # Aynı oturumun mesajları geliş sırasıyla tek tek işlenir (asyncio.Lock FIFO'dur).
+    # Aynı Idempotency-Key ile tekrarlanan istek ikinci kez LLM'e gitmez. Anahtarsız mesajlar metne göre
+    # birleştirilmez: art arda iki "geri al" bilinçli olarak iki adım geri alır.
+    def __init__(self, max_queue=4, idempotency_ttl=300, max_results=10000):
+        self.max_queue = max_queue
+        self.idempotency_ttl = idempotency_ttl
+        self.max_results = max_results
+        self.logger = logging.getLogger(__name__)
+
+        self._locks = {}
+        self._queued = Counter()
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._counters = Counter()
+
+    async def run(self, session_id, func, idempotency_key=None):
+        # Dönüş: (sonuç, tekrar mı)
+        if not idempotency_key:
+            async with self.hold(session_id):
+                result = await func()
+            self._counters["executed"] += 1
+            return result, False
+
+        key = (session_id, idempotency_key)
+
+        cached = self._cached(key)
+        if cached is not None:
+            self._counters["replayed"] += 1
+            return cached, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._counters["coalesced"] += 1
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Bekleyen olmazsa "exception was never retrieved" uyarısı basılmasın
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            async with self.hold(session_id):
+                result = await func()
+            future.set_result(result)
+            self._remember(key, result)
+            self._counters["executed"] += 1
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    @asynccontextmanager
+    async def hold(self, session_id):
+        # Akış uçları sonucu paylaşamaz; sadece sıraya girer
+        if self._queued[session_id] >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise QueueFull(session_id)
+
+        self._queued[session_id] += 1
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        try:
+            async with lock:
+                yield
+        finally:
+            self._queued[session_id] -= 1
+            if self._queued[session_id] <= 0:
+                del self._queued[session_id]
+                self._locks.pop(session_id, None)
+
+    def _cached(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._results[key]
+            return None
+        return result
+
+    def _remember(self, key, result):
+        self._results[key] = (time.monotonic() + self.idempotency_ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def forget(self, session_id):
+        for key in [k for k in self._results if k[0] == session_id]:
+            del self._results[key]
+
+    def stats(self):
+        counters = dict(self._counters)
+        counters.update({
+            "queued_sessions": len(self._queued),
+            "queued_requests": sum(self._queued.values()),
+            "cached_results": len(self._results),
+            "max_queue": self.max_queue,
+        })
+        return counters
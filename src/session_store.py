@@ -0,0 +1,301 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from src.manager import FullContextManager
+from src.storage import JsonFileStorage, MemoryStorage, create_storage
+from src.session_backend import SessionBusy, create_backend
+from services import registry
+
+# uuid4().hex[:8]; dosya yoluna girdiği için başka biçim kabul edilmez
+SESSION_ID = re.compile(r"^[0-9a-f]{8}$")
+
+
+class SessionStore:
+    def __init__(self, directory="data", max_resident=1000, idle_ttl=1800, persistence=None,
+                 factory=FullContextManager, backend=None, lock_ttl=120, lock_timeout=30):
+        self.directory = directory
+        self.max_resident = max_resident
+        self.idle_ttl = idle_ttl
+        self.persistence = persistence
+        self.factory = factory
+        # backend varsa oturumun asıl kaydı odur; bellekteki kopya sadece sürümü güncelse kullanılır
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.lock_timeout = lock_timeout
+        self.logger = logging.getLogger(__name__)
+
+        # session_id -> [manager, son erişim, sürüm]; sıralama LRU sırasıdır
+        self._sessions = OrderedDict()
+        self._leases = Counter()
+        self._loading = {}
+        self._lock = asyncio.Lock()
+        self._counters = Counter()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.getenv("SESSION_DIR", "data"),
+            max_resident=int(os.getenv("SESSION_MAX_RESIDENT", "1000")),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+            backend=create_backend(),
+            lock_ttl=float(os.getenv("SESSION_LOCK_TTL", "120")),
+            lock_timeout=float(os.getenv("SESSION_LOCK_TIMEOUT", "30")),
+        )
+
+    def filename(self, session_id):
+        return os.path.join(self.directory, f"session_{session_id}.json")
+
+    def history_filename(self, session_id):
+        return os.path.join(self.directory, f"session_{session_id}.history.json")
+
+    @staticmethod
+    def is_valid_id(session_id):
+        return bool(SESSION_ID.match(session_id or ""))
+
+    def _build(self, session_id, reset):
+        if self.backend is None:
+            return self.factory(filename=self.filename(session_id), reset=reset, persistence=self.persistence)
+        # Paylaşılan modda tur sonunda tüm durum depoya yazılır; konum da tur içinde çözülür.
+        # Oturum dosyası olmasa da onaylanan projeler ortak proje deposuna gider
+        return self.factory(filename=self.filename(session_id), reset=reset, persistence="memory",
+                            background_geocode=False, project_store=registry.get_project_store(),
+                            dedup_service=registry.get_dedup_service())
+
+    async def create(self):
+        session_id = uuid.uuid4().hex[:8]
+        manager = await asyncio.to_thread(self._build, session_id, True)
+        version = 0
+        if self.backend is not None:
+            version = await asyncio.to_thread(self.backend.save, session_id, manager.export_state(), 0)
+        await self._remember(session_id, manager, version)
+        async with self._lock:
+            self._counters["created"] += 1
+        return session_id, manager
+
+    async def get(self, session_id):
+        if not self.is_valid_id(session_id):
+            return None
+
+        version = 0
+        if self.backend is not None:
+            version = await asyncio.to_thread(self.backend.version, session_id)
+            if version is None:
+                async with self._lock:
+                    self._sessions.pop(session_id, None)
+                    self._counters["not_found"] += 1
+                return None
+
+        async with self._lock:
+            record = self._sessions.get(session_id)
+            if record and record[2] == version:
+                record[1] = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                self._counters["hits"] += 1
+                return record[0]
+
+            # Aynı oturum için eşzamanlı istekler tek bir yüklemeyi paylaşır
+            loading = self._loading.get(session_id)
+            if loading is None:
+                loading = asyncio.ensure_future(self._rehydrate(session_id, record))
+                self._loading[session_id] = loading
+
+        return await asyncio.shield(loading)
+
+    @asynccontextmanager
+    async def session(self, session_id):
+        # Kullanımdaki oturum bellekten çıkarılmaz; aksi halde aynı dosyaya iki kopya yazardı
+        owner = None
+        if self.backend is not None and self.is_valid_id(session_id):
+            owner = await self._acquire(session_id)
+            if owner is None:
+                yield None
+                return
+
+        try:
+            manager = await self.get(session_id)
+            if manager is None:
+                yield None
+                return
+
+            self._leases[session_id] += 1
+            try:
+                yield manager
+                if owner:
+                    await self._commit(session_id, manager)
+            except BaseException:
+                if owner:
+                    # Yarım kalan tur depoya yazılmaz; bellekteki kopya bir sonraki istekte yeniden yüklenir
+                    async with self._lock:
+                        self._sessions.pop(session_id, None)
+                raise
+            finally:
+                self._leases[session_id] -= 1
+                if self._leases[session_id] <= 0:
+                    del self._leases[session_id]
+        finally:
+            if owner:
+                await asyncio.to_thread(self.backend.release, session_id, owner)
+
+    async def _acquire(self, session_id):
+        # Oturum kilidi: aynı anda tek bir işçi (worker) tur işleyebilir
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            if await asyncio.to_thread(self.backend.acquire, session_id, owner, self.lock_ttl):
+                return owner
+            if await asyncio.to_thread(self.backend.version, session_id) is None:
+                return None
+            if time.monotonic() >= deadline:
+                self._counters["lock_timeouts"] += 1
+                raise SessionBusy(session_id)
+            await asyncio.sleep(0.05)
+
+    async def _commit(self, session_id, manager):
+        async with self._lock:
+            record = self._sessions.get(session_id)
+            version = record[2] if record else None
+        if version is None:
+            return
+        version = await asyncio.to_thread(self.backend.save, session_id, manager.export_state(), version)
+        async with self._lock:
+            record = self._sessions.get(session_id)
+            if record and record[0] is manager:
+                record[2] = version
+
+    async def _rehydrate(self, session_id, stale):
+        try:
+            if self.backend is not None:
+                loaded = await asyncio.to_thread(self.backend.load, session_id)
+                if loaded is None:
+                    return None
+                # Başka bir işçi oturumu ilerlettiyse mevcut nesne yeni durumla güncellenir
+                manager = stale[0] if stale else await asyncio.to_thread(self._build, session_id, False)
+                await asyncio.to_thread(manager.restore_state, loaded.state)
+                version = loaded.version
+                self._counters["refreshed" if stale else "rehydrated"] += 1
+            else:
+                storage = create_storage(self.filename(session_id), self.persistence)
+                if not await asyncio.to_thread(storage.exists):
+                    self._counters["not_found"] += 1
+                    return None
+                manager = await asyncio.to_thread(self._build, session_id, False)
+                await asyncio.to_thread(self._unpark, session_id, manager)
+                version = 0
+                self._counters["rehydrated"] += 1
+
+            self.logger.info(f"💾 Oturum yüklendi: {session_id}")
+            await self._remember(session_id, manager, version)
+            return manager
+        finally:
+            self._loading.pop(session_id, None)
+
+    async def _remember(self, session_id, manager, version):
+        async with self._lock:
+            self._sessions[session_id] = [manager, time.monotonic(), version]
+            self._sessions.move_to_end(session_id)
+            evicted = self._pop_over_capacity()
+        await self._spill(evicted, "lru")
+
+    async def delete(self, session_id):
+        if not self.is_valid_id(session_id):
+            return False
+
+        async with self._lock:
+            record = self._sessions.pop(session_id, None)
+
+        if self.backend is not None:
+            return await asyncio.to_thread(self.backend.delete, session_id)
+
+        await asyncio.to_thread(JsonFileStorage(self.history_filename(session_id)).delete)
+        if record:
+            await asyncio.to_thread(record[0].delete_files)
+            return True
+
+        storage = create_storage(self.filename(session_id), self.persistence)
+        if not await asyncio.to_thread(storage.exists):
+            return False
+        await asyncio.to_thread(storage.delete)
+        return True
+
+    def _evictable(self, session_id, manager):
+        return not self._leases.get(session_id) and not manager.busy
+
+    def _pop_over_capacity(self):
+        evicted = []
+        if len(self._sessions) <= self.max_resident:
+            return evicted
+        for session_id, (manager, _, _) in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_resident:
+                break
+            if self._evictable(session_id, manager):
+                del self._sessions[session_id]
+                evicted.append((session_id, manager))
+        return evicted
+
+    async def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        async with self._lock:
+            evicted = []
+            for session_id, (manager, last_access, _) in list(self._sessions.items()):
+                if last_access > cutoff:
+                    break
+                if self._evictable(session_id, manager):
+                    del self._sessions[session_id]
+                    evicted.append((session_id, manager))
+        await self._spill(evicted, "idle")
+        return len(evicted)
+
+    async def _spill(self, evicted, reason):
+        if not evicted:
+            return
+        for session_id, manager in evicted:
+            await asyncio.to_thread(self._park, session_id, manager)
+        self._counters[f"evicted_{reason}"] += len(evicted)
+        self.logger.info(f"🧹 {len(evicted)} oturum bellekten çıkarıldı ({reason})")
+
+    def _park(self, session_id, manager):
+        # Yerel modda geri alma geçmişi, son soru ve mükerrer önerisi oturum dosyasında yoktur;
+        # bellekten çıkarken yan dosyaya yazılır, geri yüklenince okunup silinir
+        try:
+            if self.backend is None and not isinstance(manager.storage, MemoryStorage):
+                state = manager.export_state()
+                del state["data"]
+                JsonFileStorage(self.history_filename(session_id)).save(state)
+        except Exception as e:
+            self.logger.error(f"❌ Oturum geçmişi yazılamadı ({session_id}): {e}")
+        finally:
+            manager.close()
+
+    def _unpark(self, session_id, manager):
+        history = JsonFileStorage(self.history_filename(session_id))
+        state = history.load()
+        if state:
+            manager.restore_state({**state, "data": manager.data})
+        # Eski geçmiş yeni turlarla uyuşmaz; tek kullanımlıktır
+        history.delete()
+
+    async def run_sweeper(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                self.logger.error(f"❌ Oturum temizliği başarısız: {e}")
+
+    def stats(self):
+        counters = dict(self._counters)
+        lookups = counters.get("hits", 0) + counters.get("rehydrated", 0) + counters.get("refreshed", 0)
+        counters.update({
+            "backend": type(self.backend).__name__ if self.backend else "local",
+            "resident": len(self._sessions),
+            "max_resident": self.max_resident,
+            "leased": len(self._leases),
+            "idle_ttl": self.idle_ttl,
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+        })
+        return counters
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import logging
+import tempfile
+
+
+def apply_ops(root, ops):
+    # op: [yol, değer] -> atama, [yol] -> anahtar silme
+    for op in ops:
+        path = op[0]
+        if not path:
+            continue
+        parent = root
+        try:
+            for key in path[:-1]:
+                parent = parent[key]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if len(op) > 1:
+            parent[path[-1]] = op[1]
+        elif isinstance(parent, dict):
+            parent.pop(path[-1], None)
+
+
+class JsonFileStorage:
+    def __init__(self, filename):
+        self.filename = filename
+        self.logger = logging.getLogger(__name__)
+        self.bytes_written = 0
+
+    def exists(self):
+        return os.path.exists(self.filename)
+
+    def load(self):
+        if not self.exists():
+            return None
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Dosya okuma hatası: {e}")
+            return None
+
+    def save(self, data):
+        # Yarım kalan yazım dosyayı bozmasın: geçici dosyaya yaz, fsync, atomik rename
+        directory = os.path.dirname(self.filename) or "."
+        os.makedirs(directory, exist_ok=True)
+        payload = json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.bytes_written += len(payload)
+
+    def append(self, ops, data):
+        self.save(data)
+
+    def close(self):
+        pass
+
+    def delete(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+class JournalStorage(JsonFileStorage):
+    def __init__(self, filename, fsync="interval", fsync_interval=1.0, compact_every=50):
+        super().__init__(filename)
+        self.journal_path = f"{os.path.splitext(filename)[0]}.journal.jsonl"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self._pending_lines = 0
+        self._last_fsync = 0.0
+        self._journal = None
+
+    def exists(self):
+        return super().exists() or os.path.exists(self.journal_path)
+
+    def load(self):
+        data = super().load()
+        if not os.path.exists(self.journal_path):
+            return data
+
+        replayed = 0
+        valid_size = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("eksik satır")
+                    record = json.loads(line)
+                except ValueError:
+                    # Çökme anında yarım yazılmış son satır; sonraki eklemeler bozulmasın diye kesilir
+                    self.logger.warning(f"Günlükte bozuk satır atlandı: {self.journal_path}")
+                    break
+                valid_size += len(line)
+                if data is not None:
+                    apply_ops(data, record.get("ops", []))
+                    replayed += 1
+        if valid_size < os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, valid_size)
+        self._pending_lines = replayed
+        return data
+
+    def _open_journal(self):
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            self._journal = open(self.journal_path, 'ab')
+        return self._journal
+
+    def append(self, ops, data):
+        if not ops:
+            return
+        line = (json.dumps({"ts": time.time(), "ops": ops}, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        journal = self._open_journal()
+        journal.write(line)
+        journal.flush()
+
+        now = time.monotonic()
+        if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(journal.fileno())
+            self._last_fsync = now
+
+        self.bytes_written += len(line)
+        self._pending_lines += 1
+        if self._pending_lines >= self.compact_every:
+            self.save(data)
+
+    def save(self, data):
+        # Sıkıştırma: önce yeni anlık görüntü atomik olarak yazılır, sonra günlük boşaltılır.
+        # Arada çökülürse günlük tekrar oynatılır; işlemler mutlak değer atadığı için sonuç aynıdır.
+        super().save(data)
+        self.close()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._pending_lines = 0
+
+    def close(self):
+        if self._journal is not None:
+            try:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            finally:
+                self._journal.close()
+                self._journal = None
+
+    def delete(self):
+        self.close()
+        super().delete()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class MemoryStorage:
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.bytes_written = 0
+        self._data = None
+
+    def exists(self):
+        return self._data is not None
+
+    def load(self):
+        return self._data
+
+    def save(self, data):
+        self._data = data
+
+    def append(self, ops, data):
+        self._data = data
+
+    def close(self):
+        pass
+
+    def delete(self):
+        self._data = None
+
+
+def create_storage(filename, persistence=None):
+    persistence = persistence or os.getenv("SESSION_PERSISTENCE", "json")
+    if persistence == "journal":
+        return JournalStorage(
+            filename,
+            fsync=os.getenv("SESSION_JOURNAL_FSYNC", "interval"),
+            fsync_interval=float(os.getenv("SESSION_JOURNAL_FSYNC_INTERVAL", "1.0")),
+            compact_every=int(os.getenv("SESSION_JOURNAL_COMPACT_EVERY", "50")),
+        )
+    if persistence == "memory":
+        return MemoryStorage(filename)
+    return JsonFileStorage(filename)
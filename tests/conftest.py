@@ -0,0 +1,4 @@
+import os
+
+# services.ai_service modül yüklenirken logs/bot.log dosyasına yazar; klasör depoda tutulmaz
+os.makedirs("logs", exist_ok=True)
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+from services import metrics
+from services.ai_service import AIService
+from services.resilience import HALF_OPEN, OPEN, CLOSED, ResilientCaller
+from src.models import create_blank_structure
+
+
+def make_service():
+    caller = ResilientCaller("birincil", deadline=5.0, breaker_threshold=1)
+    service = AIService(api_key=None, client=object(), model_id="birincil", context_cache=False, resilience=caller)
+
+    async def generate_stream(prompt, model_id=None, timeout=None):
+        for text in ('{"projectName": ', '"Ata Bulvarı"}'):
+            yield SimpleNamespace(text=text, usage_metadata=None)
+
+    service._generate_stream = generate_stream
+    return service
+
+
+def half_open(service):
+    breaker = service.resilience.breakers["birincil"]
+    breaker._set_state(OPEN)
+    breaker._opened_at = 0.0
+    return breaker
+
+
+def stream(service):
+    project = create_blank_structure()["projects"][0]
+    return service.stream_ai_response("Ata Bulvarı", project, "Projenin adı nedir?")
+
+
+def test_disconnected_stream_is_neither_success_nor_failure():
+    service = make_service()
+    breaker = half_open(service)
+
+    async def disconnect():
+        events = stream(service)
+        assert (await events.__anext__())[0] == "chunk"
+        # İstemci kopunca StreamingResponse üreticiyi kapatır (GeneratorExit)
+        await events.aclose()
+
+    asyncio.run(disconnect())
+    assert breaker.state == HALF_OPEN
+    assert breaker._failures == 0
+    # Deneme hakkı serbest kalır; sıradaki istek devreyi sınayabilir
+    assert breaker.allow()
+
+
+def test_completed_stream_closes_breaker():
+    service = make_service()
+    breaker = half_open(service)
+
+    async def consume():
+        return [event async for event in stream(service)]
+
+    events = asyncio.run(consume())
+    assert events[-1] == ("patch", {"projectName": "Ata Bulvarı"})
+    assert breaker.state == CLOSED
+
+
+def test_prompt_state_size_is_recorded_per_turn():
+    service = make_service()
+    project = create_blank_structure()["projects"][0]
+    project["projectName"] = "Ata Bulvarı asfalt yenileme"
+    before = {kind: metrics.PROMPT_STATE_TOKENS.count(format=kind) for kind in ("compact", "legacy")}
+
+    service._build_prompt("500 metre", project, "Yolun uzunluğu kaç metre?")
+
+    assert metrics.PROMPT_STATE_TOKENS.count(format="compact") == before["compact"] + 1
+    assert metrics.PROMPT_STATE_TOKENS.count(format="legacy") == before["legacy"] + 1
+    # Ölçüm paylaşılan servis nesnesinde tutulmaz
+    assert not hasattr(service, "last_prompt_stats")
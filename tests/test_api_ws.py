@@ -0,0 +1,14 @@
+import pytest
+from fastapi.testclient import TestClient
+import api
+
+
+@pytest.mark.parametrize("payload", ['{"message": 5}', '{"message": null}', '{}'])
+def test_ws_rejects_non_string_message(payload):
+    # Yaşam döngüsü (Gemini ısınması) çalıştırılmadan; hata oturum açılmadan döner
+    client = TestClient(api.app)
+    with client.websocket_connect("/sessions/yok/ws") as websocket:
+        websocket.send_text(payload)
+        assert websocket.receive_json() == {"event": "error", "status": 422, "detail": "message must be a string"}
+        websocket.send_text("merhaba")
+        assert websocket.receive_json()["status"] == 404
@@ -0,0 +1,67 @@
+from datetime import date
+import pytest
+from services.extract_service import SlotExtractor
+
+BUDGET_Q = "Projenin bütçesi ne kadar?"
+TODAY = date(2026, 3, 4)  # Çarşamba
+
+
+@pytest.fixture
+def extractor():
+    return SlotExtractor(today=TODAY)
+
+
+def total(extractor, text):
+    match = extractor.extract(text, BUDGET_Q)
+    return match.patch["budget"]["total"] if match else None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,5", "1.5"),
+    ("0,75 TL", "0.75"),
+    ("1,5 milyon TL", "1500000"),
+    ("üç buçuk milyon", "3500000"),
+    ("250 bin lira", "250000"),
+    ("3.250.000 TL", "3250000"),
+    ("20 milyon 500 bin", "20500000"),
+])
+def test_budget_keeps_decimals(extractor, text, expected):
+    assert total(extractor, text) == expected
+
+
+@pytest.mark.parametrize("text", ["bilmiyorum", "sıfır", "2 milyon ama emin değilim"])
+def test_budget_rejects_uncertain_answers(extractor, text):
+    assert total(extractor, text) is None
+
+
+def test_length_is_converted_to_metres(extractor):
+    match = extractor.extract("3,2 km", "Yolun uzunluğu kaç metre?")
+    assert match.patch == {"scope": {"length": 3200}}
+    match = extractor.extract("7,5", "Genişliği ne kadar?")
+    assert match.patch == {"scope": {"width": 7.5}}
+
+
+def test_area_and_duration(extractor):
+    assert extractor.extract("2 dönüm", "Toplam alan nedir?").patch == {"scope": {"totalArea": 2000}}
+    assert extractor.extract("2 hafta", "Kaç gün sürecek?").patch == {"dates": {"duration": "14"}}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("yarın", "2026-03-05"),
+    ("1 Mayıs", "2026-05-01"),
+    ("1 Şubat", "2027-02-01"),
+    ("01.04.2026", "2026-04-01"),
+    ("cuma", "2026-03-06"),
+    ("haftaya cuma", "2026-03-13"),
+    ("3 gün sonra", "2026-03-07"),
+])
+def test_planned_start(extractor, text, expected):
+    match = extractor.extract(text, "Proje ne zaman başlayacak?")
+    assert match.patch == {"dates": {"plannedStart": expected}}
+
+
+def test_phone_and_unknown_question(extractor):
+    match = extractor.extract("0532 123 45 67", "Proje müdürünün telefon numarası?")
+    assert match.patch == {"team": {"projectManager": {"phone": "05321234567"}}}
+    assert extractor.extract("1,5", "Projenin adı ne?") is None
+    assert extractor.stats()["requests"] == 2
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import pytest
+from services.gazetteer import Gazetteer, clean_name, similarity
+from services.geo_service import GeoService
+from services.rate_limiter import TokenBucket
+
+
+class FakeGeolocator:
+    def __init__(self, found=True):
+        self.found = found
+        self.queries = []
+
+    def geocode(self, query, timeout=None):
+        self.queries.append(query)
+        return SimpleNamespace(latitude=40.0, longitude=29.0) if self.found else None
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer()
+
+
+def make_service(gazetteer, found=True):
+    geolocator = FakeGeolocator(found)
+    return GeoService(geolocator=geolocator, limiter=TokenBucket(rate=1000), gazetteer=gazetteer), geolocator
+
+
+def test_clean_name_and_similarity():
+    assert clean_name("Fethiye Mah.") == ("fethiye", "mahalle")
+    assert similarity("fethiye", "fetiye") > 0.8
+    assert similarity("nilufer", "osmangazi", cutoff=0.8) == 0.0
+
+
+def test_match_exact_and_fuzzy(gazetteer):
+    assert gazetteer.match("Nilüfer", kinds=("ilce",))[0].name == "Nilüfer"
+    assert gazetteer.match("nilufr", kinds=("ilce",), exact=True) is None
+    assert gazetteer.match("nilufr", kinds=("ilce",))[0].name == "Nilüfer"
+    assert gazetteer.area("nilufer fetiye").name == "Fethiye Mahallesi"
+    assert gazetteer.area("nilufer fetiye", exact=True).name == "Nilüfer"
+
+
+def test_exact_district_and_mahalle_are_local(gazetteer):
+    service, geolocator = make_service(gazetteer)
+    district = gazetteer.match("Nilüfer", kinds=("ilce",))[0]
+    mahalle = gazetteer.match("Fethiye", kinds=("mahalle",))[0]
+
+    assert service.get_coordinates("Nilüfer") == district.coords
+    assert service.get_coordinates("Nilüfer", "Fethiye Mahallesi") == mahalle.coords
+    assert geolocator.queries == []
+
+
+@pytest.mark.parametrize("district, street", [
+    ("Nilüfer", "Fethiye Mahallesi, Ata Bulvarı"),
+    ("Nilüfer", "Fetiye Mahallesi"),
+    ("Nilüfer", "İhsaniye Metro Durağı"),
+])
+def test_streets_and_typos_go_to_nominatim(gazetteer, district, street):
+    service, geolocator = make_service(gazetteer)
+    assert service.get_local_coordinates(district, street) is None
+    assert service.get_coordinates(district, street) == "40.0, 29.0"
+    assert geolocator.queries == [f"{street}, Nilüfer, Bursa, Türkiye"]
+
+
+def test_misspelled_district_is_corrected_and_falls_back_to_centroid(gazetteer):
+    service, geolocator = make_service(gazetteer, found=False)
+    area = gazetteer.area("nilufr")
+    assert service.get_coordinates("nilufr", "Bilinmeyen Sokak") == area.coords
+    assert geolocator.queries == ["Bilinmeyen Sokak, Nilüfer, Bursa, Türkiye"]
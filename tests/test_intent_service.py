@@ -0,0 +1,75 @@
+import pytest
+from services.intent_service import IntentService
+
+BUDGET_QUESTION = "Proje için ayrılan bütçe ne kadar?"
+
+
+@pytest.fixture
+def service():
+    return IntentService()
+
+
+@pytest.mark.parametrize("text, category", [
+    ("Emlak vergimi nasıl öderim", "EMLAK"),
+    ("Su faturamı ödemek istiyorum", "SU"),
+    ("Çevre temizlik vergisi ödemek istiyorum", "CEVRE"),
+    ("Trafik cezamı ödemek istiyorum", "GENEL"),
+    ("Harç borcum var", "GENEL"),
+    ("emlak vergisi öde", "EMLAK"),
+])
+def test_payment_redirect(service, text, category):
+    match = service.classify(text)
+    assert match.intent == "PAYMENT_REDIRECT"
+    assert match.patch == {"_system_status": "PAYMENT_REDIRECT", "_payment_category": category}
+
+
+@pytest.mark.parametrize("text", [
+    "Bütçeden 1 milyon harcandı ve ödendi",
+    "Kalan ödenek 3 milyon, 1 milyonu harcandı",
+    "Harçlar ödendi",
+    "Fatura kesildi, yol yapımı ödemesi yapıldı",
+    "Müteahhide 500 bin TL fatura ödemesi yapıldı",
+])
+def test_budget_wording_is_not_payment(service, text):
+    assert service.classify(text) is None
+
+
+def test_budget_question_answer_is_not_payment(service):
+    assert service.classify("Vergi borcum dahil", last_question=BUDGET_QUESTION) is None
+
+
+@pytest.mark.parametrize("text, intent, patch", [
+    ("geri al", "UNDO", {"_steps": 1}),
+    ("2 adım geri al", "UNDO", {"_steps": 2}),
+    ("üç kez yinele", "REDO", {"_steps": 3}),
+    ("özet", "SHOW_SUMMARY", {"_system_status": "SHOW_SUMMARY"}),
+    ("her şeyi sil lütfen", "RESET_ALL", {"_system_status": "RESET_ALL"}),
+])
+def test_commands(service, text, intent, patch):
+    match = service.classify(text)
+    assert (match.intent, match.patch) == (intent, patch)
+
+
+@pytest.mark.parametrize("text", [
+    "ekiplerin hepsini sil",
+    "bütçedeki her şeyi sil",
+    "konumu baştan başla",
+    "bütçeyi kaydet",
+])
+def test_embedded_destructive_command_goes_to_llm(service, text):
+    assert service.classify(text) is None
+
+
+def test_confirmation_only_after_summary_question(service):
+    assert service.classify("evet") is None
+    assert service.classify("evet", last_question="✅ Kaydı onaylıyor musunuz?").intent == "FINISHED"
+
+
+def test_negation_and_data_go_to_llm(service):
+    assert service.classify("kaydetme, bekle") is None
+    assert service.classify("özet geç ama bütçe 500 bin olsun") is None
+
+
+@pytest.mark.parametrize("text, expected", [("evet", True), ("hayır yeni kayıt", False), ("belki", None)])
+def test_yes_no(text, expected):
+    assert IntentService.yes_no(text) is expected
@@ -0,0 +1,111 @@
+import json
+import os
+from src.journal import JournalEntry, UndoJournal
+from src.storage import JournalStorage, apply_ops
+
+
+def entry(root, path, value):
+    # Manager'ın _assign'ı gibi: eski değeri kaydedip atar
+    parent = root
+    for key in path[:-1]:
+        parent = parent[key]
+    record = JournalEntry()
+    record.record(path, path[-1] in parent, parent.get(path[-1]), value)
+    parent[path[-1]] = value
+    return record
+
+
+def test_undo_redo_restores_values_and_missing_keys():
+    data = {"budget": {"total": "100"}}
+    journal = UndoJournal()
+    journal.commit(entry(data, ["budget", "total"], "200"))
+    journal.commit(entry(data, ["budget", "used"], "50"))
+
+    assert [e.reverse_ops() for e in journal.undo(data, steps=2)] == [[[["budget", "used"]]], [[["budget", "total"], "100"]]]
+    assert data == {"budget": {"total": "100"}}
+    journal.redo(data)
+    assert data == {"budget": {"total": "200"}}
+    assert (len(journal), journal.redo_depth) == (1, 1)
+
+    # Yeni işlem ileri alma geçmişini temizler
+    journal.commit(entry(data, ["budget", "total"], "300"))
+    assert journal.redo_depth == 0
+
+
+def test_journal_is_bounded_and_round_trips():
+    data = {"n": 0}
+    journal = UndoJournal(max_entries=3)
+    for i in range(1, 6):
+        journal.commit(entry(data, ["n"], i))
+    journal.undo(data)
+
+    restored = UndoJournal.from_list(json.loads(json.dumps(journal.to_list())), max_entries=3)
+    assert (len(restored), restored.redo_depth) == (2, 1)
+    restored.undo(data, steps=5)
+    assert data == {"n": 2}
+    restored.redo(data, steps=5)
+    assert data == {"n": 5}
+
+
+def test_journal_storage_replays_ops_over_snapshot(tmp_path):
+    filename = str(tmp_path / "session.json")
+    storage = JournalStorage(filename, fsync="never", compact_every=100)
+    data = {"projects": [{"projectName": None, "budget": {"total": None}}]}
+    storage.save(data)
+
+    data["projects"][0]["projectName"] = "Ata Bulvarı"
+    storage.append([[["projects", 0, "projectName"], "Ata Bulvarı"]], data)
+    data["projects"][0]["budget"]["total"] = "1250.5"
+    storage.append([[["projects", 0, "budget", "total"], "1250.5"]], data)
+    storage.append([[["projects", 0, "budget", "total"]]], data)
+    storage.close()
+
+    loaded = JournalStorage(filename).load()
+    assert loaded == {"projects": [{"projectName": "Ata Bulvarı", "budget": {}}]}
+    with open(filename, encoding="utf-8") as f:
+        assert json.load(f)["projects"][0]["projectName"] is None
+
+
+def test_journal_storage_compacts_after_limit(tmp_path):
+    filename = str(tmp_path / "session.json")
+    storage = JournalStorage(filename, fsync="never", compact_every=3)
+    data = {"n": 0}
+    storage.save(data)
+    for i in range(1, 4):
+        data["n"] = i
+        storage.append([[["n"], i]], data)
+
+    assert not os.path.exists(storage.journal_path)
+    with open(filename, encoding="utf-8") as f:
+        assert json.load(f) == {"n": 3}
+
+    data["n"] = 4
+    storage.append([[["n"], 4]], data)
+    storage.close()
+    assert JournalStorage(filename).load() == {"n": 4}
+
+
+def test_torn_last_line_is_skipped_and_truncated(tmp_path):
+    filename = str(tmp_path / "session.json")
+    storage = JournalStorage(filename, fsync="never")
+    storage.save({"n": 0})
+    storage.append([[["n"], 1]], {"n": 1})
+    storage.close()
+    with open(storage.journal_path, "ab") as f:
+        f.write(b'{"ts": 1, "ops": [[["n"], 2]')
+    size = os.path.getsize(storage.journal_path)
+
+    reloaded = JournalStorage(filename, fsync="never")
+    assert reloaded.load() == {"n": 1}
+    assert os.path.getsize(reloaded.journal_path) < size
+
+    # Kesilen satırdan sonra eklenenler sağlam okunur
+    reloaded.append([[["n"], 3]], {"n": 3})
+    reloaded.close()
+    assert JournalStorage(filename).load() == {"n": 3}
+
+
+def test_apply_ops_ignores_missing_parents():
+    root = {"a": {}}
+    apply_ops(root, [[["x", "y"], 1], [["a", "b"], 2], [["a", "c"]], [[], 3]])
+    assert root == {"a": {"b": 2}}
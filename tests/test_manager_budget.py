@@ -0,0 +1,44 @@
+import pytest
+from src.manager import FullContextManager
+
+
+class ScriptedAI:
+    def __init__(self, *patches):
+        self.patches = list(patches)
+
+    def process_ai_response(self, **kwargs):
+        return self.patches.pop(0)
+
+
+class FixedGeo:
+    def get_coordinates(self, district, street=None):
+        return None
+
+
+@pytest.fixture
+def manager():
+    manager = FullContextManager(filename="budget.json", ai_service=ScriptedAI({"budget": {"used": "100,25"}}),
+                                 geo_service=FixedGeo(), background_geocode=False, persistence="memory")
+    manager.last_question = "Proje için ayrılan bütçe ne kadar?"
+    return manager
+
+
+def budget(manager):
+    return manager.data["projects"][0]["budget"]
+
+
+def test_decimal_budget_survives_derivation(manager):
+    manager.chat("1250,50 TL")
+    assert manager.last_changes and budget(manager)["total"] == "1250.5"
+    assert budget(manager)["remaining"] == "1250.5"
+
+    # LLM yolundan gelen harcama da kuruşuyla düşülür
+    manager.chat("100 lira 25 kuruş harcandı")
+    assert budget(manager)["used"] == "100.25"
+    assert budget(manager)["remaining"] == "1150.25"
+
+
+def test_magnitude_budget_is_whole(manager):
+    manager.chat("1,5 milyon TL")
+    assert budget(manager)["total"] == "1500000"
+    assert budget(manager)["remaining"] == "1500000"
@@ -0,0 +1,63 @@
+import pytest
+from services.patch_schema import PAYMENT_CATEGORIES, STATUSES, build_response_schema, coerce_patch
+
+
+def test_valid_patch_is_normalized():
+    patch = coerce_patch('{"projectName": "X", "scope": {"length": 500, "width": 7.5}}')
+    assert patch == {"projectName": "X", "scope": {"length": "500", "width": "7.5"}}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"projectName": "X"}\n```',
+    'Tabii, güncelleme şöyle: {"projectName": "X"} umarım yardımcı olur',
+    '{"projectName": "X",}',
+    '[{"op": "replace", "path": "/projects/0/projectName", "value": "X"}]',
+    '[{"projectName": "X"}]',
+    '{"projects": [{"projectName": "X"}]}',
+])
+def test_repairs(text):
+    assert coerce_patch(text) == {"projectName": "X"}
+
+
+def test_dotted_keys_and_operations_are_nested():
+    assert coerce_patch('{"location.district": "Nilüfer"}') == {"location": {"district": "Nilüfer"}}
+    patch = coerce_patch('[{"op": "add", "path": "/team/assignedTeams/-", "value": "Ekip A"}]')
+    assert patch == {"team": {"assignedTeams": ["Ekip A"]}}
+    patch = coerce_patch('[{"op": "remove", "path": "/budget/total"}]')
+    assert patch == {"budget": {"total": None}}
+
+
+def test_explicit_nulls_are_kept():
+    assert coerce_patch('{"description": null}') == {"description": None}
+    # Bölüm silinirken varsayılanlı alanlar (used, currency) korunur
+    assert coerce_patch('{"budget": null}') == {"budget": {"total": None, "remaining": None}}
+
+
+def test_scalar_section_and_lists():
+    assert coerce_patch('{"budget": 1000}') == {"budget": {"total": "1000"}}
+    patch = coerce_patch('{"team": {"assignedTeams": "Ekip A, Ekip B"}}')
+    assert patch == {"team": {"assignedTeams": ["Ekip A", "Ekip B"]}}
+
+
+def test_invalid_fields_are_dropped():
+    patch = coerce_patch('{"projectName": "X", "priority": true, "_system_status": "BOGUS", "unknown": 1}')
+    assert patch == {"projectName": "X"}
+
+
+def test_control_fields():
+    patch = coerce_patch('{"_system_status": "payment redirect", "_payment_category": "su", "_response_message": null}')
+    assert patch == {"_system_status": "PAYMENT_REDIRECT", "_payment_category": "SU"}
+
+
+@pytest.mark.parametrize("text", ["", "Anlayamadım", "[1, 2]", '"metin"'])
+def test_unparseable_output_raises(text):
+    with pytest.raises(ValueError):
+        coerce_patch(text)
+
+
+def test_response_schema():
+    schema = build_response_schema()
+    assert "id" not in schema.properties and "detail" not in schema.properties
+    assert "totalArea" in schema.properties["scope"].properties
+    assert schema.properties["_system_status"].enum == list(STATUSES)
+    assert schema.properties["_payment_category"].enum == list(PAYMENT_CATEGORIES)
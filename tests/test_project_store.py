@@ -0,0 +1,96 @@
+import threading
+from services.project_store import ProjectStore
+
+
+def committed_at(store, project_id):
+    return store._conn.execute("SELECT committed_at FROM projects WHERE id = ?", (project_id,)).fetchone()[0]
+
+
+def test_append_report_is_atomic_and_keeps_committed_at(tmp_path):
+    path = str(tmp_path / "projects.sqlite3")
+    store = ProjectStore(path)
+    other = ProjectStore(path)
+    store.upsert({"id": "PRJ-1", "projectName": "Ata Bulvarı asfalt", "location": {"startPoint": "40.2, 29.0"}})
+    before = committed_at(store, "PRJ-1")
+
+    def attach(target, name):
+        for i in range(25):
+            assert target.append_report("PRJ-1", {"source": f"{name}-{i}", "projectName": "Çöken yol"})
+
+    threads = [threading.Thread(target=attach, args=(target, name))
+               for target, name in ((store, "a"), (store, "b"), (other, "c"), (other, "d"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    project = store.get("PRJ-1")
+    assert len(project["reports"]) == 100
+    assert {"source": "a-0", "projectName": "Çöken yol"} in project["reports"]
+    assert project["projectName"] == "Ata Bulvarı asfalt"
+    assert committed_at(store, "PRJ-1") == before
+
+
+def test_append_report_to_missing_project(tmp_path):
+    store = ProjectStore(str(tmp_path / "projects.sqlite3"))
+    assert store.append_report("PRJ-YOK", {"source": "x"}) is False
+
+
+def test_memory_store_writes_nothing_to_disk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ProjectStore(path=None)
+    store.upsert({"id": "PRJ-1", "projectName": "Geçici", "location": {"startPoint": "40.2, 29.0"}})
+    assert store.get("PRJ-1")["projectName"] == "Geçici"
+    assert store.nearby(40.2, 29.0)[0]["project"]["id"] == "PRJ-1"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_indexes_pick_up_projects_committed_by_another_worker(tmp_path):
+    from services.dedup_service import DuplicateDetector
+
+    path = str(tmp_path / "projects.sqlite3")
+    reader = ProjectStore(path, refresh_interval=0)
+    detector = DuplicateDetector(project_store=reader)
+    writer = ProjectStore(path)
+    project = {"id": "PRJ-2", "projectName": "Fethiye Mahallesi içme suyu hattı yenileme",
+               "location": {"district": "Nilüfer", "startPoint": "40.2000, 29.0000"}}
+    writer.upsert(project)
+
+    assert [item["project"]["id"] for item in reader.nearby(40.2001, 29.0001, radius_m=100)] == ["PRJ-2"]
+    assert [p["id"] for p in reader.in_bbox(40.1, 28.9, 40.3, 29.1)] == ["PRJ-2"]
+    assert reader.point("PRJ-2") == (40.2, 29.0)
+    match = detector.find({"projectName": "Fethiye Mah. içme suyu hattı yenileme",
+                           "location": {"district": "Nilüfer", "startPoint": "40.2001, 29.0001"}})
+    assert match and match.project_id == "PRJ-2"
+
+    # Koordinat silinirse diğer işçinin ızgarasından da çıkar
+    writer.upsert({**project, "location": {"district": "Nilüfer"}})
+    assert reader.nearby(40.2, 29.0, radius_m=100) == []
+
+
+def test_refresh_is_throttled(tmp_path):
+    path = str(tmp_path / "projects.sqlite3")
+    reader = ProjectStore(path, refresh_interval=60)
+    ProjectStore(path).upsert({"id": "PRJ-3", "location": {"startPoint": "40.2, 29.0"}})
+    assert reader.nearby(40.2, 29.0, radius_m=100) == []
+    reader.refresh(force=True)
+    assert len(reader.nearby(40.2, 29.0, radius_m=100)) == 1
+
+
+def test_legacy_store_gets_change_sequence(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "projects.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE projects (id TEXT PRIMARY KEY, project_code TEXT, name TEXT, source TEXT, "
+                 "district_key TEXT, category_key TEXT, project_type_key TEXT, priority_key TEXT, "
+                 "planned_start TEXT, planned_end TEXT, budget_total REAL, lat REAL, lon REAL, "
+                 "data TEXT NOT NULL, committed_at REAL NOT NULL)")
+    conn.execute("INSERT INTO projects (id, lat, lon, data, committed_at) VALUES ('ESKI', 40.2, 29.0, '{\"id\": \"ESKI\"}', 1)")
+    conn.commit()
+    conn.close()
+
+    store = ProjectStore(path)
+    assert store.point("ESKI") == (40.2, 29.0)
+    store.upsert({"id": "YENI"})
+    assert [seq for seq, _ in store.changes_since(0)] == [1, 2]
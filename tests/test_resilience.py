@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitOpen, DeadlineExceeded, ResilientCaller
+
+
+def make_caller(**kwargs):
+    options = dict(fallback_model="yedek", deadline=1.0, max_attempts=3, attempt_timeout=0.1,
+                   breaker_threshold=5, backoff=0.01, max_backoff=0.02)
+    options.update(kwargs)
+    return ResilientCaller("birincil", **options)
+
+
+def hang_on(models, calls):
+    async def func(model, timeout):
+        calls.append(model)
+        if model in models:
+            await asyncio.sleep(60)
+        return f"ok:{model}"
+    return func
+
+
+def test_hung_call_times_out_and_falls_back():
+    caller = make_caller()
+    calls = []
+    start = time.perf_counter()
+    result = asyncio.run(caller.call_async(hang_on({"birincil"}, calls)))
+
+    assert result == "ok:yedek"
+    assert calls == ["birincil", "birincil", "yedek"]
+    assert time.perf_counter() - start < 1.0
+    assert caller.breakers["birincil"]._failures == 2
+
+
+def test_hung_calls_open_breaker_and_skip_primary():
+    caller = make_caller(breaker_threshold=2)
+    calls = []
+    asyncio.run(caller.call_async(hang_on({"birincil"}, calls)))
+    assert caller.breakers["birincil"].state == OPEN
+
+    calls.clear()
+    assert asyncio.run(caller.call_async(hang_on({"birincil"}, calls))) == "ok:yedek"
+    assert calls == ["yedek"]
+
+
+def test_all_breakers_open():
+    caller = make_caller(breaker_threshold=1, max_attempts=1, fallback_model=None)
+    with pytest.raises(TimeoutError):
+        asyncio.run(caller.call_async(hang_on({"birincil"}, [])))
+    with pytest.raises(CircuitOpen):
+        asyncio.run(caller.call_async(hang_on(set(), [])))
+
+
+def test_expired_deadline_releases_half_open_probe():
+    caller = make_caller(breaker_threshold=1, breaker_reset=0.0, fallback_model=None, deadline=0.01)
+    breaker = caller.breakers["birincil"]
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(caller.call_async(hang_on(set(), [])))
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_sync_call_uses_attempt_timeout():
+    caller = make_caller()
+    timeouts = []
+
+    def func(model, timeout):
+        timeouts.append(timeout)
+        return model
+
+    assert caller.call(func) == "birincil"
+    assert timeouts[0] == pytest.approx(0.1)
+    assert caller.breakers["birincil"].state == CLOSED
@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from src.session_gate import QueueFull, SessionGate
+
+
+def turn(calls, result, delay=0.02):
+    async def func():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+    return func
+
+
+def test_identical_messages_without_key_run_twice():
+    gate = SessionGate()
+    calls = []
+
+    async def main():
+        # İki hızlı "geri al": iki ayrı geri alma adımı
+        return await asyncio.gather(gate.run("s1", turn(calls, "geri alındı")),
+                                    gate.run("s1", turn(calls, "geri alındı")))
+
+    results = asyncio.run(main())
+    assert results == [("geri alındı", False), ("geri alındı", False)]
+    assert len(calls) == 2
+
+
+def test_same_idempotency_key_is_coalesced_and_replayed():
+    gate = SessionGate()
+    calls = []
+
+    async def main():
+        first = await asyncio.gather(gate.run("s1", turn(calls, "a"), "k1"), gate.run("s1", turn(calls, "b"), "k1"))
+        again = await gate.run("s1", turn(calls, "c"), "k1")
+        other = await gate.run("s2", turn(calls, "d"), "k1")
+        return first, again, other
+
+    first, again, other = asyncio.run(main())
+    assert first == [("a", False), ("a", True)]
+    assert again == ("a", True)
+    assert other == ("d", False)
+    assert calls == ["a", "d"]
+
+    gate.forget("s1")
+    assert asyncio.run(gate.run("s1", turn(calls, "e"), "k1")) == ("e", False)
+
+
+def test_turns_are_serialized_in_order():
+    gate = SessionGate()
+    events = []
+
+    def step(name):
+        async def func():
+            events.append(f"{name}:başla")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}:bitir")
+            return name
+        return func
+
+    async def main():
+        tasks = [asyncio.create_task(gate.run("s1", step(name))) for name in "abc"]
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert events == ["a:başla", "a:bitir", "b:başla", "b:bitir", "c:başla", "c:bitir"]
+
+
+def test_queue_limit_rejects_and_recovers():
+    gate = SessionGate(max_queue=2)
+    calls = []
+
+    async def main():
+        tasks = [asyncio.create_task(gate.run("s1", turn(calls, i, delay=0.05))) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull):
+            await gate.run("s1", turn(calls, "fazla"))
+        # Diğer oturumlar etkilenmez
+        assert await gate.run("s2", turn(calls, "s2")) == ("s2", False)
+        await asyncio.gather(*tasks)
+        return await gate.run("s1", turn(calls, "sonra"))
+
+    assert asyncio.run(main()) == ("sonra", False)
+    assert gate.stats()["rejected"] == 1
+    assert gate.stats()["queued_requests"] == 0
+
+
+def test_cancelled_turn_releases_queue_and_waiters():
+    gate = SessionGate()
+    calls = []
+
+    async def main():
+        first = asyncio.create_task(gate.run("s1", turn(calls, "uzun", delay=10), "k1"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(gate.run("s1", turn(calls, "x"), "k1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # İptal edilen tur sonucu saklanmaz; aynı anahtarla tekrar çalışır
+        return await gate.run("s1", turn(calls, "yeniden"), "k1")
+
+    assert asyncio.run(main()) == ("yeniden", False)
+    assert gate.stats()["queued_sessions"] == 0
+
+
+def test_failed_turn_is_not_replayed():
+    gate = SessionGate()
+
+    async def boom():
+        raise RuntimeError("patladı")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await gate.run("s1", boom, "k1")
+        return await gate.run("s1", turn([], "tamam"), "k1")
+
+    assert asyncio.run(main()) == ("tamam", False)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import pytest
+from services import registry
+from services.dedup_service import DuplicateMatch
+from services.project_store import ProjectStore
+from src.manager import FullContextManager
+from src.session_backend import SessionBusy, SessionConflict, SqliteSessionBackend
+from src.session_store import SessionStore
+
+OFFER = DuplicateMatch("PRJ-1", "Ata Bulvarı asfalt", 0.82, 0.75, 40.0)
+
+
+class EchoAI:
+    # Kullanıcı mesajı doğrudan patch olarak kullanılır
+    def process_ai_response(self, user_input, **kwargs):
+        return json.loads(user_input)
+
+
+class FixedGeo:
+    def get_coordinates(self, district, street=None):
+        return None
+
+
+def factory(**kwargs):
+    kwargs.setdefault("background_geocode", False)
+    return FullContextManager(ai_service=EchoAI(), geo_service=FixedGeo(), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Paylaşılan modda oturumlar ortak proje deposunu açar; testte bellekte tutulur
+    monkeypatch.setattr(registry, "get_project_store", lambda: ProjectStore(path=None))
+    monkeypatch.setattr(registry, "get_dedup_service", lambda: None)
+
+
+def name(manager):
+    return manager.data["projects"][0]["projectName"]
+
+
+async def turn(store, session_id, patch):
+    async with store.session(session_id) as manager:
+        return await asyncio.to_thread(manager.chat, json.dumps(patch))
+
+
+@pytest.mark.parametrize("persistence", ["json", "journal"])
+def test_lru_eviction_keeps_history_and_duplicate_offer(tmp_path, persistence):
+    store = SessionStore(directory=str(tmp_path), max_resident=1, persistence=persistence, factory=factory)
+
+    async def main():
+        first, manager = await store.create()
+        await turn(store, first, {"projectName": "A"})
+        await turn(store, first, {"projectName": "B"})
+        manager.duplicate_offer = OFFER
+        manager._dedup_dismissed = {"PRJ-0"}
+        question = manager.last_question
+
+        await store.create()  # kapasite 1: ilk oturum LRU ile çıkarılır
+        assert store.stats()["evicted_lru"] == 1
+        assert os.path.exists(store.history_filename(first))
+
+        restored = await store.get(first)
+        assert restored is not manager
+        assert name(restored) == "B" and restored.last_question == question
+        assert restored.duplicate_offer == OFFER and restored._dedup_dismissed == {"PRJ-0"}
+        assert not os.path.exists(store.history_filename(first))
+
+        restored.undo_last_action()
+        assert name(restored) == "A"
+        restored.redo_last_action()
+        assert name(restored) == "B"
+        return first
+
+    first = asyncio.run(main())
+    assert store.stats()["rehydrated"] == 1
+
+    # Silinen oturumun yan dosyası da kalmaz
+    assert asyncio.run(store.delete(first))
+    assert not any(first in f for f in os.listdir(tmp_path))
+
+
+def test_leased_session_is_not_evicted_and_idle_ones_are(tmp_path):
+    store = SessionStore(directory=str(tmp_path), max_resident=1, idle_ttl=0, factory=factory)
+
+    async def main():
+        first, _ = await store.create()
+        async with store.session(first):
+            second, _ = await store.create()
+            # Kullanımdaki oturum kapasite aşılsa da bellekte kalır; yerine boştaki çıkarılır
+            assert list(store._sessions) == [first]
+        assert await store.evict_idle() == 1
+        assert store.stats()["resident"] == 0
+        assert name(await store.get(first)) is None
+        assert await store.get(second) is not None
+
+    asyncio.run(main())
+    assert store.stats()["evicted_idle"] == 1
+
+
+def test_concurrent_gets_share_one_rehydration(tmp_path):
+    store = SessionStore(directory=str(tmp_path), max_resident=1, factory=factory)
+
+    async def main():
+        first, _ = await store.create()
+        await store.create()
+        managers = await asyncio.gather(*(store.get(first) for _ in range(5)))
+        assert all(m is managers[0] for m in managers)
+        assert await store.get("ffffffff") is None
+        assert await store.get("../etc") is None
+
+    asyncio.run(main())
+    assert store.stats()["rehydrated"] == 1
+
+
+def test_backend_round_trip_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SessionStore(directory=str(tmp_path), factory=factory, backend=SqliteSessionBackend(path))
+    worker_b = SessionStore(directory=str(tmp_path), factory=factory, backend=SqliteSessionBackend(path))
+
+    async def main():
+        session_id, manager = await worker_a.create()
+        await turn(worker_a, session_id, {"projectName": "A"})
+        await turn(worker_a, session_id, {"projectName": "B"})
+        async with worker_a.session(session_id) as current:
+            current.duplicate_offer = OFFER
+
+        # Diğer işçi en son sürümü görür: veri, geri alma geçmişi ve öneri dahil
+        async with worker_b.session(session_id) as other:
+            assert name(other) == "B" and other.duplicate_offer == OFFER
+            other.undo_last_action()
+        # İlk işçinin bellekteki kopyası eskidi; sürüm farkıyla yenilenir
+        refreshed = await worker_a.get(session_id)
+        assert refreshed is manager and name(manager) == "A"
+        assert worker_a.stats()["refreshed"] == 1
+
+    asyncio.run(main())
+
+
+def test_backend_lease_blocks_other_worker(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SessionStore(directory=str(tmp_path), factory=factory, backend=SqliteSessionBackend(path))
+    worker_b = SessionStore(directory=str(tmp_path), factory=factory, backend=SqliteSessionBackend(path),
+                            lock_timeout=0.1)
+
+    async def main():
+        session_id, _ = await worker_a.create()
+        async with worker_a.session(session_id):
+            with pytest.raises(SessionBusy):
+                async with worker_b.session(session_id):
+                    pass
+        async with worker_b.session(session_id) as manager:
+            assert manager is not None
+        async with worker_b.session("ffffffff") as manager:
+            assert manager is None
+
+    asyncio.run(main())
+    assert worker_b.stats()["lock_timeouts"] == 1
+
+
+def test_failed_turn_is_not_committed(tmp_path):
+    backend = SqliteSessionBackend(str(tmp_path / "sessions.sqlite3"))
+    store = SessionStore(directory=str(tmp_path), factory=factory, backend=backend)
+
+    async def main():
+        session_id, _ = await store.create()
+        with pytest.raises(RuntimeError):
+            async with store.session(session_id) as manager:
+                manager.data["projects"][0]["projectName"] = "yarım"
+                raise RuntimeError("tur yarıda kaldı")
+        assert backend.load(session_id).version == 1
+        # Yarım tur bellekte de kalmaz; depodan yeniden yüklenir
+        assert name(await store.get(session_id)) is None
+
+    asyncio.run(main())
+
+
+def test_sqlite_backend_version_check_and_lease_expiry(tmp_path):
+    backend = SqliteSessionBackend(str(tmp_path / "sessions.sqlite3"))
+    assert backend.save("s1", {"n": 1}, 0) == 1
+    with pytest.raises(SessionConflict):
+        backend.save("s1", {"n": 1}, 0)
+    assert backend.save("s1", {"n": 2}, 1) == 2
+    with pytest.raises(SessionConflict):
+        backend.save("s1", {"n": 3}, 1)
+    assert backend.load("s1") == ({"n": 2}, 2)
+
+    assert backend.acquire("s1", "a", ttl=60)
+    assert not backend.acquire("s1", "b", ttl=60)
+    backend.release("s1", "b")  # sahibi olmayan bırakamaz
+    assert not backend.acquire("s1", "b", ttl=60)
+    backend.release("s1", "a")
+    assert backend.acquire("s1", "b", ttl=-1)
+    # Süresi dolan kilit devralınır
+    assert backend.acquire("s1", "c", ttl=60)
+    assert not backend.acquire("yok", "a", ttl=60)
+
+    assert backend.delete("s1") and backend.version("s1") is None
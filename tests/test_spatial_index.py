@@ -0,0 +1,78 @@
+import time
+import random
+import pytest
+from services.spatial_index import GridIndex, haversine, parse_point
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(7)
+    return [(f"PRJ-{i}", rng.gauss(40.20, 0.05), rng.gauss(29.02, 0.08)) for i in range(1000)]
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    index = GridIndex()
+    for item_id, lat, lon in points:
+        index.upsert(item_id, lat, lon)
+    return index
+
+
+def brute_nearest(points, lat, lon, k, max_radius_m=None, exclude=None):
+    hits = [(item_id, haversine(lat, lon, plat, plon)) for item_id, plat, plon in points if item_id != exclude]
+    hits = [hit for hit in hits if max_radius_m is None or hit[1] <= max_radius_m]
+    return sorted(hits, key=lambda hit: hit[1])[:k]
+
+
+@pytest.mark.parametrize("lat, lon", [(40.20, 29.02), (40.31, 28.85), (40.0, 29.5), (39.0, 27.0)])
+def test_nearest_matches_brute_force(points, index, lat, lon):
+    assert [hit[0] for hit in index.nearest(lat, lon, k=10)] == [hit[0] for hit in brute_nearest(points, lat, lon, 10)]
+
+
+def test_nearest_with_radius_and_exclude(points, index):
+    item_id, lat, lon = points[0]
+    expected = brute_nearest(points, lat, lon, 5, max_radius_m=2000, exclude=item_id)
+    assert [hit[0] for hit in index.nearest(lat, lon, k=5, max_radius_m=2000, exclude=item_id)] == [hit[0] for hit in expected]
+
+
+@pytest.mark.parametrize("lat, lon", [(0.0, 0.0), (-45.0, -120.0), (89.0, 179.0)])
+def test_far_away_query_is_bounded(points, index, lat, lon):
+    start = time.perf_counter()
+    hits = index.nearest(lat, lon, k=3)
+    assert time.perf_counter() - start < 0.5
+    assert [hit[0] for hit in hits] == [hit[0] for hit in brute_nearest(points, lat, lon, 3)]
+
+
+def test_far_away_query_outside_radius(index):
+    assert index.nearest(0.0, 0.0, k=3, max_radius_m=1000) == []
+
+
+def test_within_and_bbox(points, index):
+    lat, lon = 40.20, 29.02
+    expected = {item_id for item_id, plat, plon in points if haversine(lat, lon, plat, plon) <= 1500}
+    assert {hit[0] for hit in index.within(lat, lon, 1500)} == expected
+
+    box = (40.18, 29.0, 40.22, 29.05)
+    inside = {item_id for item_id, plat, plon in points if box[0] <= plat <= box[2] and box[1] <= plon <= box[3]}
+    assert set(index.bbox(*box)) == inside
+
+
+def test_upsert_moves_and_remove():
+    index = GridIndex()
+    index.upsert("a", 40.2, 29.0)
+    index.upsert("a", 40.3, 29.1)
+    assert len(index) == 1
+    assert index.get("a") == (40.3, 29.1)
+    assert index.nearest(40.2, 29.0, k=1)[0][0] == "a"
+    assert index.remove("a") and not index.remove("a")
+    assert index.nearest(40.2, 29.0) == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("40.1950, 29.0600", (40.195, 29.06)),
+    ("95, 29", None),
+    ("Nilüfer", None),
+    (None, None),
+])
+def test_parse_point(value, expected):
+    assert parse_point(value) == expected